@@ -21,6 +21,7 @@ License: MIT
 
 Public API:
     - ArchiveFS: Main entry point. Provides .files, .dirs, .archives, .batch, .config namespaces.
+    - AsyncArchiveFS: asyncio counterpart with awaitable .files, .dirs and .batch namespaces.
 
 Example usage:
     from arcfs import ArchiveFS
@@ -36,6 +37,7 @@ Example usage:
 
 import arcfs.handlers
 from .arcfs import ArchiveFS
+from .async_arcfs import AsyncArchiveFS
 
 __version__ = '0.1.0'
-__all__ = ["ArchiveFS"]
+__all__ = ["ArchiveFS", "AsyncArchiveFS"]
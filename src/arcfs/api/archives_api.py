@@ -0,0 +1,111 @@
+"""
+Archive operations for the Archive File System.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import os
+import shutil
+import tarfile
+import zipfile
+from typing import Callable, Optional
+
+from arcfs.core import extraction, packing
+from arcfs.core.extraction import ExtractProgress
+from arcfs.core.progress import ProgressTracker, TransferProgress
+
+
+class ArchivesAPI:
+    """
+    ARCFS Public API: Whole-archive Operations
+    Exposed as fs.archives.
+
+    Usage:
+        fs.archives.extract_all('archive.tar.gz', 'extracted_files')
+        fs.archives.compress_dir('my_folder', 'my_folder.zip')
+    """
+
+    def __init__(self, archive_fs):
+        self._fs = archive_fs
+        self._path_resolver = archive_fs._path_resolver
+        self._stream_provider = archive_fs._stream_provider
+
+    def extract_all(self, archive_path: str, target_dir: str, workers: Optional[int] = None,
+                    progress: Optional[Callable[[ExtractProgress], None]] = None) -> ExtractProgress:
+        """
+        Extract an entire archive to a directory.
+
+        ZIP members are decompressed in parallel, each worker reading through its own file
+        descriptor; tar archives are decompressed once, in order, while a pool of threads
+        writes the files. Archives nested inside other archives, and other formats, are
+        extracted member by member through their handler, which is opened only once.
+
+        Args:
+            archive_path: Path to the archive
+            target_dir: Directory to extract to (created if needed)
+            workers: Threads to use (defaults to GlobalConfig 'extract_workers', or the CPU count)
+            progress: Optional callback receiving ExtractProgress (files and bytes done,
+                elapsed time and throughput) as the extraction proceeds
+
+        Returns:
+            The final ExtractProgress
+        """
+        path_info = self._path_resolver.resolve(archive_path)
+        target_dir = os.path.abspath(target_dir)
+        if not path_info.archive_components and os.path.isfile(path_info.physical_path):
+            physical_path = path_info.physical_path
+            if zipfile.is_zipfile(physical_path):
+                return extraction.extract_zip(physical_path, target_dir, workers, progress)
+            if tarfile.is_tarfile(physical_path):
+                return extraction.extract_tar(physical_path, target_dir, workers, progress)
+        # An archive stored inside another archive is extracted as an archive of its own
+        path_info = self._path_resolver.as_archive_root(path_info) or path_info
+        with self._stream_provider.get_archive_handler(path_info, 'r') as handler:
+            return extraction.extract_entries(handler, target_dir, progress)
+
+    def compress_dir(self, source_dir: str, archive_path: str, workers: Optional[int] = None,
+                     progress: Optional[Callable[[TransferProgress], None]] = None) -> TransferProgress:
+        """
+        Create an archive from the contents of a directory, replacing any existing archive.
+
+        ZIP members are split into blocks deflated on a thread pool and written in order by
+        one writer; .tar.gz, .tar.bz2 and .tar.xz archives are compressed in parallel chunks.
+        Other archive types, and archives inside other archives, are written through a
+        batch session so the target is only rebuilt once.
+
+        Args:
+            source_dir: Directory whose contents are archived
+            archive_path: Path of the archive to create
+            workers: Threads to use (defaults to GlobalConfig 'compress_workers', or the CPU count)
+            progress: Optional callback receiving TransferProgress (files and bytes done,
+                elapsed time and throughput) as the archive is written
+
+        Returns:
+            The final TransferProgress
+        """
+        if not os.path.isdir(source_dir):
+            raise NotADirectoryError(f"Not a directory: {source_dir}")
+        path_info = self._path_resolver.resolve(archive_path)
+        kind = packing.archive_kind(path_info.physical_path)
+        if not path_info.archive_components and kind is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path_info.physical_path)), exist_ok=True)
+            if kind == 'zip':
+                return packing.pack_zip(source_dir, path_info.physical_path, workers, progress)
+            return packing.pack_tar(source_dir, path_info.physical_path, workers, progress)
+        return self._compress_entries(source_dir, archive_path, progress)
+
+    def _compress_entries(self, source_dir: str, archive_path: str,
+                          progress: Optional[Callable[[TransferProgress], None]]) -> TransferProgress:
+        tracker = ProgressTracker(progress)
+        with self._fs.batch as batch:
+            for name, path, kind in packing.scan_tree(source_dir):
+                target = f"{archive_path.rstrip('/')}/{name}"
+                if kind == 'dir':
+                    batch.mkdir(target)
+                elif os.path.isfile(path):
+                    with open(path, 'rb') as src, batch.open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    tracker.add(files=1, nbytes=os.path.getsize(path))
+        return tracker.finish()
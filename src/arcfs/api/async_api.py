@@ -0,0 +1,261 @@
+"""
+ARCFS asyncio API
+
+Summary:
+    Awaitable counterparts of fs.files, fs.dirs and fs.batch, exposed through
+    AsyncArchiveFS. Every call runs the synchronous operation on the AsyncArchiveFS
+    executor, so archive parsing, compression and commits never block the event loop.
+    Calls on the same physical archive are limited to 'async_archive_concurrency' at a
+    time; calls on different archives overlap freely up to the executor size.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import functools
+import io
+from typing import Any, AsyncIterator, Callable, List, Tuple
+
+# Chunk size yielded by 'async for' over a binary stream
+STREAM_CHUNK = 64 * 1024
+
+
+class AsyncStream:
+    """
+    Async wrapper around a file object returned by fs.files.open().
+
+    Usage:
+        async with await afs.files.open('archive.zip/data.bin', 'rb') as stream:
+            async for chunk in stream:
+                ...
+
+    Iterating a binary stream yields chunks of up to STREAM_CHUNK bytes; iterating a text
+    stream yields lines. Closing a write stream commits it, which runs on the executor too.
+    """
+
+    def __init__(self, afs, path: str, stream: Any):
+        """
+        Initialize the stream.
+
+        Args:
+            afs: The owning AsyncArchiveFS
+            path: Path the stream was opened on (selects the per-archive limit)
+            stream: The synchronous file object
+        """
+        self._afs = afs
+        self._path = path
+        self._stream = stream
+
+    @property
+    def closed(self) -> bool:
+        return getattr(self._stream, 'closed', False)
+
+    @property
+    def raw(self) -> Any:
+        """The wrapped synchronous file object."""
+        return self._stream
+
+    def _call(self, name: str, *args):
+        return self._afs._run(self._path, getattr(self._stream, name), *args)
+
+    async def read(self, size: int = -1):
+        return await self._call('read', size)
+
+    async def readline(self, size: int = -1):
+        return await self._call('readline', size)
+
+    async def write(self, data) -> int:
+        return await self._call('write', data)
+
+    async def seek(self, offset: int, whence: int = 0) -> int:
+        return await self._call('seek', offset, whence)
+
+    async def tell(self) -> int:
+        return await self._call('tell')
+
+    async def flush(self) -> None:
+        return await self._call('flush')
+
+    async def close(self) -> None:
+        if not self.closed:
+            await self._call('close')
+
+    def __aiter__(self) -> 'AsyncStream':
+        return self
+
+    async def __anext__(self):
+        # Text streams over archive entries wrap a binary stream and carry no 'mode'
+        text = isinstance(self._stream, io.TextIOBase)
+        data = await (self.readline() if text else self.read(STREAM_CHUNK))
+        if not data:
+            raise StopAsyncIteration
+        return data
+
+    async def __aenter__(self) -> 'AsyncStream':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+
+class _AsyncNamespace:
+    """
+    Awaitable proxy for a synchronous API namespace.
+    Any callable attribute of the namespace is returned as a coroutine function that runs
+    it on the executor, limited by the archive named in its first argument.
+    """
+
+    def __init__(self, afs, target: Any):
+        self._afs = afs
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            path = args[0] if args and isinstance(args[0], str) else None
+            return await self._afs._run(path, attr, *args, **kwargs)
+        return call
+
+
+class AsyncFilesAPI(_AsyncNamespace):
+    """
+    Awaitable file operations, exposed as afs.files.
+    Mirrors FilesAPI: read, write, append, exists, remove, copy, move, get_info, ...
+    """
+
+    async def open(self, path: str, mode: str = 'r', **kwargs) -> AsyncStream:
+        """
+        Open a file at the specified path.
+
+        Args:
+            path: Path to the file
+            mode: File mode
+            **kwargs: Passed to FilesAPI.open (encoding, errors, newline, ...)
+
+        Returns:
+            An AsyncStream over the opened file
+        """
+        stream = await self._afs._run(path, self._target.open, path, mode, **kwargs)
+        return AsyncStream(self._afs, path, stream)
+
+    def transaction(self, paths: List[str]) -> '_AsyncTransaction':
+        """
+        Async context manager counterpart of FilesAPI.transaction().
+
+        Args:
+            paths: List of paths that will be modified in the transaction
+        """
+        return _AsyncTransaction(self._afs, self._target.transaction(paths))
+
+
+class _AsyncTransaction:
+    """Drives a synchronous transaction context manager on the executor."""
+
+    def __init__(self, afs, context: Any):
+        self._afs = afs
+        self._context = context
+
+    async def __aenter__(self):
+        return await self._afs._run(None, self._context.__enter__)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return await self._afs._run(None, self._context.__exit__, exc_type, exc_val, exc_tb)
+
+
+class AsyncDirsAPI(_AsyncNamespace):
+    """
+    Awaitable directory operations, exposed as afs.dirs.
+    Mirrors DirsAPI: mkdir, rmdir, list_dir, exists, is_dir, glob, ...
+    walk and scandir are async generators.
+    """
+
+    async def walk(self, path: str) -> AsyncIterator[Tuple[str, List[str], List[str]]]:
+        """
+        Async generator yielding (root, dirs, files) tuples for a directory tree.
+        Each step of the walk runs on the executor.
+
+        Args:
+            path: Starting path for walk
+        """
+        iterator = await self._afs._run(path, lambda: iter(self._target.walk(path)))
+        done = object()
+        while True:
+            item = await self._afs._run(path, next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+
+    async def scandir(self, path: str) -> AsyncIterator[Any]:
+        """
+        Async generator yielding the ArchiveDirEntry objects of fs.dirs.scandir().
+        Each step of the scan runs on the executor.
+
+        Args:
+            path: Directory or archive path to scan
+        """
+        iterator = await self._afs._run(path, self._target.scandir, path)
+        done = object()
+        try:
+            while True:
+                item = await self._afs._run(path, next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            await self._afs._run(path, iterator.close)
+
+
+class AsyncBatchAPI:
+    """
+    Awaitable batch sessions, exposed as afs.batch.
+
+    Usage:
+        async with afs.batch as batch:
+            await batch.write('archive.zip/foo.txt', 'data')
+            await batch.mkdir('archive.zip/bar')
+        # Committed on the executor at the end of the block, or discarded if it raised.
+    """
+
+    def __init__(self, afs):
+        self._afs = afs
+        self._session = None
+
+    async def __aenter__(self) -> _AsyncNamespace:
+        from ..core.batch_session import BatchSession
+        if self._session is None:
+            self._session = BatchSession(self._afs.sync)
+        return _AsyncNamespace(self._afs, self._session)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        session, self._session = self._session, None
+        if session is not None:
+            await self._afs._run(None, session.__exit__, exc_type, exc_val, exc_tb)
+
+    def __getattr__(self, name: str) -> Callable:
+        # Outside a context, the first call starts a manual session that lasts until commit()
+        if name.startswith('_'):
+            raise AttributeError(name)
+        from ..core.batch_session import BatchSession
+        if self._session is None:
+            self._session = BatchSession(self._afs.sync)
+        return getattr(_AsyncNamespace(self._afs, self._session), name)
+
+    async def commit(self) -> None:
+        session, self._session = self._session, None
+        if session is None:
+            raise RuntimeError("No active batch session to commit.")
+        await self._afs._run(None, session.commit)
+
+    async def rollback(self) -> None:
+        session, self._session = self._session, None
+        if session is None:
+            raise RuntimeError("No active batch session to roll back.")
+        await self._afs._run(None, session.rollback)
@@ -25,7 +25,8 @@ class BatchAPI:
             batch.append('archive.zip/foo.txt', 'more', binary=False)
             batch.mkdir('archive.zip/bar')
             batch.open('archive.zip/foo.txt', 'w')
-        # All changes are committed at the end of the block.
+        # All changes are committed at the end of the block, each archive rebuilt once.
+        # If the block raises, the changes are discarded instead.
 
         # Manual session:
         batch = fs.batch
@@ -35,36 +36,79 @@ class BatchAPI:
     Available operations (proxied from BatchSession):
         - write(path, data, binary=False): Write data to a file in an archive.
         - append(path, data, binary=False): Append data to a file in an archive.
+        - read(path, binary=False): Read a file, including changes made in the session.
+        - remove(path): Remove a file from an archive.
         - mkdir(path, create_parents=False): Create a directory in an archive.
         - open(path, mode='r', encoding='utf-8'): Open a file in an archive.
         - commit(): Commit all pending changes (auto-called at context exit).
+        - rollback(): Discard all pending changes.
 
-    All methods not explicitly defined here are dynamically proxied to BatchSession.
-    See arcfs.batch_session.BatchSession for full details and additional methods.
+    The write operations above, and begin(), start a manual session if none is running;
+    other attributes are proxied to the running session only, so merely inspecting
+    fs.batch never starts one. See arcfs.batch_session.BatchSession for details.
     """
     def __init__(self, archive_fs):
         self._fs = archive_fs
         self._session = None
 
     def __enter__(self):
-        self._session = BatchSession(self._fs)
+        if self._session is None:
+            self._session = BatchSession(self._fs)
         return self._session
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self._session:
-            self._session.commit()
-            self._session = None
+        session, self._session = self._session, None
+        if session is not None:
+            session.__exit__(exc_type, exc_val, exc_tb)
 
     def __getattr__(self, name):
-        # Proxy methods to a new session if not in a context
-        if self._session is not None:
-            return getattr(self._session, name)
-        # Create a temporary session for one-off calls
-        temp_session = BatchSession(self._fs)
-        return getattr(temp_session, name)
+        # Other session attributes are only available while a session is running
+        if name.startswith('_') or self._session is None:
+            raise AttributeError(name)
+        return getattr(self._session, name)
+
+    def begin(self):
+        """
+        Start a manual session that lasts until commit() or rollback().
+
+        Returns:
+            The BatchSession
+        """
+        if self._session is None:
+            self._session = BatchSession(self._fs)
+        return self._session
+
+    # Explicit operations start a manual session if none is running
+    def write(self, path, data, binary=False):
+        return self.begin().write(path, data, binary=binary)
+
+    def append(self, path, data, binary=False):
+        return self.begin().append(path, data, binary=binary)
+
+    def remove(self, path):
+        return self.begin().remove(path)
+
+    def mkdir(self, path, create_parents=False):
+        return self.begin().mkdir(path, create_parents=create_parents)
+
+    def open(self, path, mode='r', encoding='utf-8'):
+        return self.begin().open(path, mode, encoding=encoding)
+
+    def read(self, path, binary=False):
+        # Reading alone does not start a session
+        if self._session is None:
+            with self._fs.files.open(path, 'rb' if binary else 'r') as f:
+                return f.read()
+        return self._session.read(path, binary=binary)
 
     def commit(self):
-        if self._session:
-            self._session.commit()
-        else:
+        session, self._session = self._session, None
+        if session is None:
             raise RuntimeError("No active batch session to commit.")
+        session.commit()
+
+    def rollback(self):
+        session, self._session = self._session, None
+        if session is None:
+            raise RuntimeError("No active batch session to roll back.")
+        session.rollback()
@@ -9,12 +9,15 @@ Contact: https://github.com/Munger
 License: MIT
 """
 
-from typing import List, Iterator, Tuple, Dict, Any
+from typing import List, Iterator, Tuple, Dict, Any, Callable, Optional
+import fnmatch
+import functools
 import os
 import re
-from fnmatch import fnmatch
 
+from arcfs.core.dir_entry import ArchiveDirEntry, ScandirIterator
 from arcfs.core.utils import is_archive_format
+from arcfs.core.walker import walk_tree
 
 from arcfs.core.logging import debug_print
 
@@ -27,11 +30,51 @@ class DirsAPI:
         import os
         return os.path.dirname(path)
 
+    def basename(self, path: str) -> str:
+        """
+        Return the final component of a path.
+        """
+        return os.path.basename(path)
+
+    def join(self, *paths: str) -> str:
+        """
+        Join physical path components (equivalent to os.path.join).
+        """
+        return os.path.join(*paths)
+
+    def relpath(self, path: str, start: str) -> str:
+        """
+        Return path relative to start (equivalent to os.path.relpath).
+        """
+        return os.path.relpath(path, start)
+
+    def getmtime(self, path: str) -> float:
+        """
+        Return the modification time of a physical path.
+        """
+        return os.path.getmtime(path)
+
+    def listdir(self, path: str) -> List[str]:
+        """
+        Alias of list_dir() for handler code.
+        """
+        return self.list_dir(path)
+
+    def mkdtemp(self, suffix: str = '', prefix: str = 'arcfs_', dir: str = None) -> str:
+        """
+        Create a secure temporary directory. Returns path.
+        """
+        import tempfile
+        path = tempfile.mkdtemp(suffix=suffix, prefix=prefix, dir=dir)
+        debug_print(f"[DirsAPI.mkdtemp] Created temp dir: {path}", level=2)
+        return path
+
     """
     ARCFS Public API: Directory Operations. This class is exposed as fs.dirs on ArchiveFS.
     This class is not meant to be used directly, but through ArchiveFS.
     """
     def __init__(self, archive_fs=None):
+        self._archive_fs = archive_fs
         if archive_fs is not None:
             self._path_resolver = archive_fs._path_resolver
             self._stream_provider = archive_fs._stream_provider
@@ -47,6 +90,20 @@ class DirsAPI:
         """
         if os.path.isdir(path):
             return True
+        path_info = self._path_resolver.resolve(path)
+        if path_info.archive_components:
+            # Answered from the stat cache or the archive's directory tree, without listing the directory
+            parent_path_info = self._path_resolver.get_parent_archive(path_info)
+            if not parent_path_info or not os.path.exists(parent_path_info.physical_path):
+                return False
+            try:
+                info = self._stream_provider.entry_info(path_info)
+            except (FileNotFoundError, NotADirectoryError):
+                return False
+            if not info:
+                return False
+            # An archive stored inside the archive is a directory of its own
+            return info.get('is_dir', False) or self._path_resolver.as_archive_root(path_info) is not None
         try:
             items = self.list_dir(path)
             return True
@@ -87,7 +144,7 @@ class DirsAPI:
         """
         # If the path exists as a file, we can't create a directory there
         from ..core.arcfs_physical_io import ArcfsPhysicalIO
-        if ArcfsPhysicalIO.stat(path) and ArcfsPhysicalIO.stat(path).st_mode & 0o170000 != 0o040000:
+        if ArcfsPhysicalIO.exists(path) and ArcfsPhysicalIO.stat(path).st_mode & 0o170000 != 0o040000:
             from arcfs.api.config_api import ConfigAPI
             debug_print(f"[DirsAPI.mkdir] File exists at path: {path}", level=2)
             raise FileExistsError(f"Cannot create directory '{path}': File exists")
@@ -121,10 +178,10 @@ class DirsAPI:
                 from ..core.archive_handlers import get_handler_for_path
                 handler_cls = get_handler_for_path(archive_part)
                 if handler_cls:
-                    handler_cls.create_empty(archive_part)
+                    handler_cls.create_empty(archive_part, fs=self._stream_provider.fs)
                 
                 # Now we can create the directory inside
-                with handler_cls(archive_part, 'a') as handler:
+                with self._stream_provider.get_archive_handler(self._path_resolver.resolve(path), 'a') as handler:
                     dir_path = '/'.join(parts[1:])
                     handler.create_dir(dir_path)
                 return
@@ -167,16 +224,13 @@ class DirsAPI:
                 from ..core.archive_handlers import get_handler_for_path
                 handler_cls = get_handler_for_path(parent_path_info.physical_path)
                 if handler_cls:
-                    handler_cls.create_empty(parent_path_info.physical_path, fs=self._archive_fs)
+                    handler_cls.create_empty(parent_path_info.physical_path, fs=self._stream_provider.fs)
             else:
                 raise FileNotFoundError(f"No such file or directory: '{parent_path_info.physical_path}'")
         
         # Create directory in archive
-        from ..core.archive_handlers import get_handler_for_path
-        handler_cls = get_handler_for_path(parent_path_info.physical_path)
-        if handler_cls:
-            with handler_cls(parent_path_info.physical_path, 'a') as handler:
-                handler.create_dir(path_info.get_entry_path())
+        with self._stream_provider.get_archive_handler(path_info, 'a') as handler:
+            handler.create_dir(path_info.get_entry_path())
     
     def rmdir(self, path: str, recursive: bool = False) -> None:
         """
@@ -262,11 +316,8 @@ class DirsAPI:
             # Check if it might be an archive itself
             if is_archive_format(path) and os.path.isfile(path_info.physical_path):
                 # Treat as if the path has archive components (it's the archive itself)
-                from ..core.archive_handlers import get_handler_for_path
-                handler_cls = get_handler_for_path(path)
-                if handler_cls:
-                    with handler_cls(path, 'r') as handler:
-                        return handler.list_dir("")
+                with self._stream_provider.get_archive_handler(path_info, 'r') as handler:
+                    return handler.list_dir("")
             
             # Otherwise, it should be a directory
             if not os.path.isdir(path_info.physical_path):
@@ -277,122 +328,209 @@ class DirsAPI:
         parent_path_info = self._path_resolver.get_parent_archive(path_info)
         if not parent_path_info or not os.path.exists(parent_path_info.physical_path):
             raise FileNotFoundError(f"No such file or directory: '{path}'")
-                
-        from ..core.archive_handlers import get_handler_for_path
-        handler_cls = get_handler_for_path(parent_path_info.physical_path)
-        if handler_cls:
-            with handler_cls(parent_path_info.physical_path, 'r') as handler:
-                return handler.list_dir("")
+
+        # An archive stored inside the archive is listed as a directory of its own
+        path_info = self._path_resolver.as_archive_root(path_info) or path_info
+        with self._stream_provider.get_archive_handler(path_info, 'r') as handler:
+            return handler.list_dir(path_info.get_entry_path())
     
-    def walk(self, path: str):
+    def scandir(self, path: str) -> ScandirIterator:
+        """
+        Iterate the entries of a directory or archive, like os.scandir().
+
+        Each ArchiveDirEntry carries its name, full path, is_dir(), size, mtime and
+        compressed_size. For archives these come from the listing the handler has already
+        parsed, so no entry needs a get_info() call. Entries are produced lazily; the
+        archive handler is held until the iterator is exhausted or closed.
+
+        Args:
+            path: Directory or archive path to scan
+
+        Returns:
+            ScandirIterator of ArchiveDirEntry objects (usable as a context manager)
+        """
+        if os.path.isdir(path):
+            return ScandirIterator(self._scan_physical(path, path))
+        path_info = self._path_resolver.resolve(path)
+        if not path_info.archive_components:
+            if not (is_archive_format(path) and os.path.isfile(path_info.physical_path)):
+                if not os.path.isdir(path_info.physical_path):
+                    raise NotADirectoryError(f"Not a directory: '{path}'")
+                return ScandirIterator(self._scan_physical(path_info.physical_path, path))
+        else:
+            parent_path_info = self._path_resolver.get_parent_archive(path_info)
+            if not parent_path_info or not os.path.exists(parent_path_info.physical_path):
+                raise FileNotFoundError(f"No such file or directory: '{path}'")
+            # An archive stored inside the archive is scanned as a directory of its own
+            path_info = self._path_resolver.as_archive_root(path_info) or path_info
+        return ScandirIterator(self._scan_archive(path_info, path.rstrip('/')))
+
+    @staticmethod
+    def _scan_physical(physical_path: str, path: str):
+        with os.scandir(physical_path) as it:
+            for entry in it:
+                yield ArchiveDirEntry(entry.name, os.path.join(path, entry.name), os_entry=entry)
+
+    def _scan_archive(self, path_info, base: str):
+        with self._stream_provider.get_archive_handler(path_info, 'r') as handler:
+            for name, info in handler.scandir(path_info.get_entry_path()):
+                yield ArchiveDirEntry(name, f"{base}/{name}", info)
+
+    def walk(self, path: str, onerror: Optional[Callable[[Exception], None]] = None):
         """
         Generator yielding (root, dirs, files) tuples for directory tree.
-        
+
+        Under a physical directory, ZIP and TAR archives are listed among the dirs and
+        walked into. Directories are scanned and archives listed ahead of the caller on a
+        thread pool ('walk_workers', 'walk_max_open_archives' and 'walk_max_memory' in
+        GlobalConfig), and the steps come out top-down with names sorted. Removing names
+        from dirs skips them.
+
         Args:
             path: Starting path for walk
-            
+            onerror: Called with the exception when a directory or archive under a physical
+                     directory cannot be read (by default it is logged and skipped)
+
         Returns:
             Generator yielding (root, dirs, files) tuples
         """
         # Use self.is_dir to support both physical and archive/virtual directories
         if self.is_dir(path):
-            # If it's a physical directory, use os.walk for efficiency
             if os.path.isdir(path):
-                for root, dirs, files in os.walk(path):
-                    # Archive transparency: handle single-file and multi-file archives
-                    from ..core.archive_handlers import get_handler_for_path
-                    from arcfs.core.utils import is_archive_format
-                    new_dirs = list(dirs)
-                    new_files = []
-                    for f in files:
-                        file_path = os.path.join(root, f)
-                        if is_archive_format(f) and os.path.isfile(file_path):
-                            handler_cls = get_handler_for_path(file_path)
-                            if handler_cls:
-                                if handler_cls.is_single_file_archive():
-                                    # Single-file archive: replace with decompressed name
-                                    decompressed_name = handler_cls.get_decompressed_name(file_path)
-                                    new_files.append(decompressed_name)
-                                else:
-                                    # Multi-file archive: treat as directory
-                                    new_dirs.append(f)
-                                    # Yield contents of the archive
-                                    with handler_cls(file_path, 'r') as handler:
-                                        for archive_root, archive_dirs, archive_files in handler.walk(""):
-                                            yield os.path.join(root, f, archive_root), archive_dirs, archive_files
-                        else:
-                            new_files.append(f)
-                    yield root, new_dirs, new_files
-                    # Recurse into both real and archive directories
-                    for d in new_dirs:
-                        dir_path = os.path.join(root, d)
-                        yield from self.walk(dir_path)
-
-                return
-            # Otherwise, walk the virtual/archive directory tree
-            try:
-                items = self.list_dir(path)
-            except (FileNotFoundError, NotADirectoryError):
+                open_archive = lambda p: self._stream_provider.get_archive_handler(self._path_resolver.resolve(p), 'r')
+                yield from walk_tree(path, open_archive, onerror=onerror)
                 return
-            dirs = []
-            files = []
-            for item in items:
-                item_path = f"{path}/{item}"
-                if self.is_dir(item_path):
-                    dirs.append(item)
-                else:
-                    files.append(item)
-            yield path, dirs, files
-            for dir_name in dirs:
-                dir_path = f"{path}/{dir_name}"
-                yield from self.walk(dir_path)
+            # Otherwise, walk the archive by scanning each directory through one handler
+            path_info = self._path_resolver.resolve(path)
+            path_info = self._path_resolver.as_archive_root(path_info) or path_info
+            with self._stream_provider.get_archive_handler(path_info, 'r') as handler:
+                stack = [(path.rstrip('/'), path_info.get_entry_path().strip('/'))]
+                while stack:
+                    root, entry = stack.pop()
+                    dirs, files = [], []
+                    for name, info in handler.scandir(entry):
+                        (dirs if info.get('is_dir') else files).append(name)
+                    yield root, dirs, files
+                    # Reversed so the stack pops them in name order; names removed from dirs are skipped
+                    stack.extend((f"{root}/{name}", f"{entry}/{name}" if entry else name) for name in reversed(dirs))
         # If not a directory, do nothing
         return
 
     def glob(self, pattern: str) -> List[str]:
         """
         Return paths matching a glob pattern.
-        
+
+        The pattern is matched one path component at a time: '*' and '?' never match '/',
+        '[...]' matches a character set, and a '**' component matches zero or more
+        directories. Literal components are looked up directly instead of listed, and a
+        directory is only scanned when the rest of the pattern can match below it.
+
+        An archive is entered only where a pattern component matches the archive itself
+        and more components follow, as in '**/*.tar.gz/config/*.ini'; '**' alone does not
+        cross into archives. Inside an archive, matching runs against its directory tree,
+        so no member is opened.
+
         Args:
             pattern: Glob pattern to match
-        
+
         Returns:
             List of matching paths
         """
-        # Convert glob pattern to regex
-        regex_pattern = pattern.replace(".", r"\.").replace("*", ".*").replace("?", ".") + "$"
-        regex = re.compile(regex_pattern)
-        
-        # Extract the base path from the pattern (up to the first wildcard)
-        wildcard_pos = min(
-            (pattern.find('*') if pattern.find('*') != -1 else len(pattern)),
-            (pattern.find('?') if pattern.find('?') != -1 else len(pattern))
-        )
-        base_path = pattern[:wildcard_pos] if wildcard_pos != len(pattern) else pattern
-        base_path = base_path.rstrip("/")
-        
-        # Find all matching paths
-        matching_paths = []
-        
-        # If the base path doesn't exist, return empty list
-        if not self.exists(base_path):
-            return matching_paths
-        
-        # If base path is a file and it matches the pattern, return it
-        if not self.is_dir(base_path) and regex.match(base_path):
-            matching_paths.append(base_path)
-            return matching_paths
-        
-        # Walk the directory tree from the base path
-        for root, dirs, files in self.walk(base_path):
-            # Check if current directory matches
-            if regex.match(root):
-                matching_paths.append(root)
-            
-            # Check files in current directory
-            for file in files:
-                file_path = f"{root}/{file}"
-                if regex.match(file_path):
-                    matching_paths.append(file_path)
-        
-        return matching_paths
\ No newline at end of file
+        parts = pattern.split('/')
+        # Leading literal components name the directory the search starts from
+        split = next((i for i, part in enumerate(parts) if _MAGIC.search(part)), len(parts))
+        base = '/'.join(parts[:split])
+        if pattern.startswith('/') and not base:
+            base = '/'
+        if split == len(parts):
+            return [pattern] if self._lookup(pattern) is not None else []
+        if split and self._lookup(base) is not True:
+            return []
+        matches: Dict[str, None] = {}
+        self._glob_in(base, [part for part in parts[split:] if part], matches)
+        return list(matches)
+
+    def _glob_in(self, path: str, parts: List[str], matches: Dict[str, None]) -> None:
+        """Match the pattern components 'parts' below the directory 'path'."""
+        part, rest = parts[0], parts[1:]
+        if part == '**':
+            # Zero directories, then one more directory each time round
+            if rest:
+                self._glob_in(path, rest, matches)
+            elif path and path != '/':
+                matches[path] = None
+            for name, is_dir, _, is_link in self._glob_entries(path):
+                # Symlinked directories are not followed, so a link loop cannot recurse forever
+                if is_dir and not is_link:
+                    self._glob_in(_join(path, name), parts, matches)
+            return
+        if not _MAGIC.search(part):
+            child = _join(path, part)
+            kind = self._lookup(child)
+            if kind is None:
+                return
+            if not rest:
+                matches[child] = None
+            elif kind:
+                self._glob_in(child, rest, matches)
+            return
+        regex = _compile_component(part)
+        for name, is_dir, is_archive, _ in self._glob_entries(path):
+            if not regex.match(name):
+                continue
+            child = _join(path, name)
+            if not rest:
+                matches[child] = None
+            elif is_dir or is_archive:
+                self._glob_in(child, rest, matches)
+
+    def _glob_entries(self, path: str):
+        """(name, is_dir, is_archive, is_symlink) for each entry of a directory, in name order."""
+        try:
+            with self.scandir(path or '.') as entries:
+                found = [(e.name, e.is_dir(), is_archive_format(e.name), e.is_symlink()) for e in entries]
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return []
+        found.sort()
+        return found
+
+    def _lookup(self, path: str) -> Optional[bool]:
+        """
+        Look up one path without listing its parent.
+
+        Returns:
+            None if it does not exist, True for a directory or an archive, False for a file
+        """
+        if os.path.isdir(path):
+            return True
+        if os.path.lexists(path):
+            return is_archive_format(os.path.basename(path))
+        path_info = self._path_resolver.resolve(path)
+        if not path_info.archive_components:
+            return None
+        parent_path_info = self._path_resolver.get_parent_archive(path_info)
+        if not parent_path_info or not os.path.exists(parent_path_info.physical_path):
+            return None
+        try:
+            info = self._stream_provider.entry_info(path_info)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not info:
+            return None
+        return bool(info.get('is_dir')) or self._path_resolver.as_archive_root(path_info) is not None
+
+
+# Glob wildcards, as in the standard glob module
+_MAGIC = re.compile(r'[*?[]')
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_component(part: str):
+    """Regex matching one path component against a glob component."""
+    return re.compile(fnmatch.translate(part))
+
+
+def _join(path: str, name: str) -> str:
+    if not path:
+        return name
+    return path + name if path.endswith('/') else f"{path}/{name}"
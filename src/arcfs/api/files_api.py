@@ -25,6 +25,8 @@ License: MIT
 import contextlib
 import shutil
 
+from arcfs.core.logging import debug_print
+
 class FilesAPI:
     """
     Implementation of file operations for ArchiveFS.
@@ -112,6 +114,19 @@ class FilesAPI:
             debug_print(f"[FilesAPI.close_fd] Failed to close fd {fd}: {e}", level=1)
             raise IOError(f"Failed to close file descriptor {fd}: {e}")
 
+    def stat(self, path: str) -> os.stat_result:
+        """
+        Return os.stat() information for a physical file.
+        """
+        from ..core.arcfs_physical_io import ArcfsPhysicalIO
+        return ArcfsPhysicalIO.stat(path)
+
+    def chmod(self, path: str, mode: int) -> None:
+        """
+        Change the permission bits of a physical file.
+        """
+        os.chmod(path, mode)
+
     """
     Implementation of file operations for ArchiveFS.
     This class is not meant to be used directly, but through ArchiveFS.
@@ -123,18 +138,31 @@ class FilesAPI:
         """
         from ..core.arcfs_physical_io import ArcfsPhysicalIO
         from arcfs.core.buffering import HybridBufferedFile
+        from arcfs.core.stream_provider import is_read_only_mode
+        # Anonymous buffer (path=None): handlers use this for spill-to-disk buffering
+        if path is None:
+            return HybridBufferedFile.open(path, mode, buffering, encoding, errors, newline)
+        from ..core import snapshot
         # Physical file
         if ArcfsPhysicalIO.exists(path) and not self.is_archive_path(path):
+            if not is_read_only_mode(mode):
+                # Writing through the path would also change a transaction's hardlinked snapshot
+                snapshot.detach(path, copy='a' in mode or '+' in mode)
             return open(path, mode, buffering=buffering, encoding=encoding, errors=errors, newline=newline)
         # Archive/virtual file
         path_info = self._path_resolver.resolve(path)
         if not path_info.archive_components:
+            if not is_read_only_mode(mode):
+                snapshot.detach(path_info.physical_path, copy='a' in mode or '+' in mode)
             return open(path_info.physical_path, mode, buffering=buffering, encoding=encoding, errors=errors, newline=newline)
         parent_path_info = self._path_resolver.get_parent_archive(path_info)
-        if not parent_path_info or not ArcfsPhysicalIO.exists(parent_path_info.physical_path):
+        if not parent_path_info:
             raise FileNotFoundError(f"No such file or archive: '{path}'")
-        with self._stream_provider.get_archive_handler(parent_path_info) as handler:
-            return handler.open_entry(path_info.get_entry_path(), mode)
+        if (is_read_only_mode(mode) and not ArcfsPhysicalIO.exists(parent_path_info.physical_path)
+                and not self._stream_provider.in_batch(parent_path_info.physical_path)):
+            raise FileNotFoundError(f"No such file or archive: '{path}'")
+        # Streams are returned from the provider so they outlive the handler lookup
+        return self._stream_provider.get_stream(path_info, mode, encoding=encoding or 'utf-8')
 
     def read(self, path: str, size: int = -1, encoding: str = None) -> Any:
         """
@@ -171,7 +199,7 @@ class FilesAPI:
         parent_path_info = self._path_resolver.get_parent_archive(path_info)
         if not parent_path_info or not ArcfsPhysicalIO.exists(parent_path_info.physical_path):
             raise FileNotFoundError(f"No such file or archive: '{src}'")
-        with self._stream_provider.get_archive_handler(parent_path_info) as handler:
+        with self._stream_provider.get_archive_handler(path_info, 'a') as handler:
             handler.rename_entry(path_info.get_entry_path(), dst)
 
     def touch(self, path: str) -> None:
@@ -243,10 +271,9 @@ class FilesAPI:
                 debug_print(f"[FilesAPI.exists] Parent archive does not exist for: {path}", level=2)
                 return False
 
-            with self._stream_provider.get_archive_handler(parent_path_info) as handler:
-                exists = handler.entry_exists(path_info.get_entry_path())
-                debug_print(f"[FilesAPI.exists] Entry exists in archive: {exists} for {path}", level=2)
-                return exists
+            exists = self._stream_provider.entry_info(path_info) is not None
+            debug_print(f"[FilesAPI.exists] Entry exists in archive: {exists} for {path}", level=2)
+            return exists
 
         except Exception as e:
             debug_print(f"[FilesAPI.exists] Exception: {e}", level=1, exc=e)
@@ -285,10 +312,11 @@ class FilesAPI:
 
         # Otherwise, we need to remove the entry from the archive
         parent_path_info = self._path_resolver.get_parent_archive(path_info)
-        if not parent_path_info or not os.path.exists(parent_path_info.physical_path):
+        if not parent_path_info or not (os.path.exists(parent_path_info.physical_path)
+                                        or self._stream_provider.in_batch(parent_path_info.physical_path)):
             raise FileNotFoundError(f"No such file or directory: '{path}'")
 
-        with self._stream_provider.get_archive_handler(parent_path_info) as handler:
+        with self._stream_provider.get_archive_handler(path_info, 'a') as handler:
             handler.remove_entry(path_info.get_entry_path())
 
     def copy(self, src_path: str, dst_path: str) -> None:
@@ -319,6 +347,9 @@ class FilesAPI:
             # Copy the file directly using built-in file operations
             from arcfs.api.config_api import ConfigAPI
             debug_print(f"[FilesAPI._copy_file] Copying file via ArcfsPhysicalIO: {src_path} -> {dst_path}", level=2)
+            # Overwriting in place would also change a transaction's hardlinked snapshot
+            from ..core import snapshot
+            snapshot.detach(dst_path, copy=False)
             with ArcfsPhysicalIO.open(src_path, 'rb') as src, ArcfsPhysicalIO.open(dst_path, 'wb') as dst:
                 dst.write(src.read())
             return
@@ -361,8 +392,8 @@ class FilesAPI:
                 # Make sure the destination directory exists
                 dst_dir = os.path.dirname(dst_path)
                 if dst_dir:
-                    from .directory_operations import DirectoryOperations
-                    DirectoryOperations().mkdir(dst_dir, create_parents=True)
+                    from .dirs_api import DirsAPI
+                    DirsAPI(self._archive_fs).mkdir(dst_dir, create_parents=True)
 
                 # Use os.rename for efficiency
                 os.rename(src_path, dst_path)
@@ -373,6 +404,10 @@ class FilesAPI:
                 pass
 
         # Archive path or different filesystem: copy and remove
+        if os.path.isfile(dst_path):
+            # Overwriting in place would also change a transaction's hardlinked snapshot
+            from ..core import snapshot
+            snapshot.detach(dst_path, copy=False)
         self.copy(src_path, dst_path)
         self.remove(src_path)
 
@@ -415,12 +450,20 @@ class FilesAPI:
         parent_path_info = self._path_resolver.get_parent_archive(path_info)
         if not parent_path_info or not os.path.exists(parent_path_info.physical_path):
             raise FileNotFoundError(f"No such file or directory: '{path}'")
-        with self._stream_provider.get_archive_handler(parent_path_info) as handler:
-            entry_info = handler.get_entry_info(path_info.get_entry_path())
-            if not entry_info:
-                raise FileNotFoundError(f"No such file or directory: '{path}'")
-            entry_info['path'] = path
-            return entry_info
+        entry_info = self._stream_provider.entry_info(path_info)
+        if not entry_info:
+            raise FileNotFoundError(f"No such file or directory: '{path}'")
+        entry_info['path'] = path
+        return entry_info
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Counters of the entry metadata cache behind exists(), is_file(), is_dir() and get_info().
+
+        Returns:
+            Dictionary with the entry count, hits, negative hits and misses
+        """
+        return self._stream_provider.stat_cache.stats()
 
     def is_dir(self, path: str) -> bool:
         """
@@ -449,38 +492,36 @@ class FilesAPI:
     def transaction(self, paths: List[str]):
         """
         Context manager ensuring atomicity for operations.
-      
+
+        Every existing archive holding one of the paths is snapshotted before the body runs,
+        as a reflink or hardlink where the filesystem allows, so starting a transaction costs
+        O(1) in archive size. If the body raises, the snapshots are renamed back over the
+        archives. A journal next to the archives lets an interrupted transaction be rolled
+        back the next time one of them is opened (see arcfs.core.snapshot).
+
         Args:
             paths: List of paths that will be modified in the transaction
         """
-        import os
-        from .utils import is_archive_format
-      
-        # Create backup copies of all archives that will be modified
-        backups = {}
+        from ..core import snapshot
+        from ..core.utils import is_archive_format
+
+        archives = []
+        for path in paths:
+            # Only physical archives are snapshotted; entries are covered by their archive
+            physical_path = self._path_resolver.resolve(path).physical_path
+            if physical_path and is_archive_format(physical_path) and os.path.isfile(physical_path):
+                archives.append(physical_path)
+        journal = snapshot.TransactionJournal(archives)
+        journal.begin()
         try:
-            for path in paths:
-                if self.exists(path) and is_archive_format(path):
-                    path_info = self._path_resolver.resolve(path)
-                    if not path_info.archive_components:
-                        # Only backup physical archives, not entries inside archives
-                        backup_path = f"{path_info.physical_path}.bak"
-                        shutil.copy2(path_info.physical_path, backup_path)
-                        backups[path] = backup_path
-          
             # Execute the transaction body
             yield
-          
-            # If we get here, transaction succeeded, clean up backups
-            for backup_path in backups.values():
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
-                  
         except Exception as e:
             debug_print(f"[FilesAPI.transaction] Exception: {e}", level=1, exc=e)
-            # Transaction failed, restore backups
-            for path, backup_path in backups.items():
-                if os.path.exists(backup_path):
-                    path_info = self._path_resolver.resolve(path)
-                    os.replace(backup_path, path_info.physical_path)
-            raise e
\ No newline at end of file
+            # Transaction failed, restore the snapshots
+            journal.rollback()
+            for archive_path in archives:
+                self._stream_provider.invalidate(archive_path)
+            raise
+        # If we get here, transaction succeeded, drop the snapshots
+        journal.commit()
\ No newline at end of file
@@ -28,6 +28,7 @@ from .api.dirs_api import DirsAPI
 
 from .api.config_api import ConfigAPI
 from .api.batch_api import BatchAPI
+from .api.archives_api import ArchivesAPI
 
 __version__ = '0.1.0'
 
@@ -40,7 +41,7 @@ class ArchiveFS:
     Attributes:
         files: File operations (open, read, write, etc.)
         dirs: Directory operations (mkdir, rmdir, list, etc.)
-        archives: Archive operations (create, extract, compress, etc.)
+        archives: Archive operations (extract_all, ...)
         batch: Batch/transactional operations
         config: Configuration
     """
@@ -51,12 +52,14 @@ class ArchiveFS:
         from .api.dirs_api import DirsAPI
         from .api.config_api import ConfigAPI
         from .api.batch_api import BatchAPI
+        from .api.archives_api import ArchivesAPI
         self._path_resolver = PathResolver()
-        self._stream_provider = StreamProvider()
+        self._stream_provider = StreamProvider(self)
         self.files = FilesAPI(self)
         self.dirs = DirsAPI(self)
         self.config = ConfigAPI()
         self.batch = BatchAPI(self)
+        self.archives = ArchivesAPI(self)
 
     # TODO: This method should be accessed via the appropriate API (e.g., files, dirs, batch, etc.)
     """
@@ -168,14 +171,17 @@ class ArchiveFS:
     def batch_session(self):
         """
         Return a session object for grouping operations.
+        Changes are committed when the block exits normally and discarded if it raises.
         
         Returns:
             Session object with the same interface as ArchiveFS
         """
-        from .api.batch_api import BatchAPI
+        from .core.batch_session import BatchSession
         session = BatchSession(self)
         try:
             yield session
-        finally:
-            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        session.commit()
     
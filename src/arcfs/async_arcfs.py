@@ -0,0 +1,113 @@
+"""
+ArcFS: Transparent Archive File System
+
+asyncio front end for ArchiveFS. AsyncArchiveFS mirrors fs.files, fs.dirs and fs.batch
+with awaitable methods and async streams, running every operation on a bounded thread
+pool so the event loop is never blocked by archive I/O or compression.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import asyncio
+import functools
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .arcfs import ArchiveFS
+from .api.async_api import AsyncBatchAPI, AsyncDirsAPI, AsyncFilesAPI
+from .core.global_config import GlobalConfig
+from .core.utils import is_archive_format
+
+
+class AsyncArchiveFS:
+    """
+    Async entry point for the Archive File System.
+
+    Usage:
+        async with AsyncArchiveFS() as afs:
+            await afs.files.write('archive.zip/foo.txt', 'data')
+            async with await afs.files.open('archive.zip/foo.txt') as f:
+                async for line in f:
+                    ...
+
+    Attributes:
+        files: Awaitable file operations
+        dirs: Awaitable directory operations
+        batch: Async batch sessions
+        config: Configuration (synchronous)
+        sync: The wrapped ArchiveFS
+    """
+
+    def __init__(self, fs: Optional[ArchiveFS] = None, max_workers: Optional[int] = None,
+                 archive_concurrency: Optional[int] = None):
+        """
+        Initialize the async file system.
+
+        Args:
+            fs: ArchiveFS to wrap (a new one by default)
+            max_workers: Executor threads (defaults to GlobalConfig 'async_max_workers',
+                or the CPU count plus 4)
+            archive_concurrency: Operations allowed at once on the same physical archive
+                (defaults to GlobalConfig 'async_archive_concurrency')
+        """
+        self.sync = fs if fs is not None else ArchiveFS()
+        if max_workers is None:
+            max_workers = GlobalConfig.get('async_max_workers') or min(32, (os.cpu_count() or 1) + 4)
+        if archive_concurrency is None:
+            archive_concurrency = GlobalConfig.get('async_archive_concurrency')
+        self._executor = ThreadPoolExecutor(max(1, int(max_workers)), thread_name_prefix='arcfs-async')
+        self._archive_concurrency = max(1, int(archive_concurrency))
+        # asyncio primitives belong to one event loop, so limits are kept per loop
+        self._limits: 'weakref.WeakKeyDictionary[Any, Dict[str, asyncio.Semaphore]]' = weakref.WeakKeyDictionary()
+        self.files = AsyncFilesAPI(self, self.sync.files)
+        self.dirs = AsyncDirsAPI(self, self.sync.dirs)
+        self.batch = AsyncBatchAPI(self)
+        self.config = self.sync.config
+
+    def _limit(self, path: Optional[str]) -> Optional[asyncio.Semaphore]:
+        """The semaphore of the archive holding path, or None for plain files."""
+        if not path:
+            return None
+        physical_path = self.sync._path_resolver.resolve(path).physical_path
+        if not physical_path or not is_archive_format(physical_path):
+            return None
+        limits = self._limits.setdefault(asyncio.get_running_loop(), {})
+        key = os.path.realpath(physical_path)
+        limit = limits.get(key)
+        if limit is None:
+            limit = limits[key] = asyncio.Semaphore(self._archive_concurrency)
+        return limit
+
+    async def _run(self, path: Optional[str], func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a synchronous call on the executor, within the limit of the archive holding path.
+
+        Args:
+            path: Path the call operates on, or None
+            func: Callable to run
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            The result of func
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        limit = self._limit(path)
+        if limit is None:
+            return await loop.run_in_executor(self._executor, call)
+        async with limit:
+            return await loop.run_in_executor(self._executor, call)
+
+    async def aclose(self) -> None:
+        """Wait for running operations and shut the executor down."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self) -> 'AsyncArchiveFS':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
@@ -0,0 +1,185 @@
+"""
+Rollback journal for in-place archive appends in the Archive File System.
+
+Handlers that update an archive by appending to it (instead of rebuilding it into a new
+file) record the archive's original length in '<archive>.arcfs-journal' before writing.
+Any existing ranges the update will overwrite in place (headers, same-size members) are
+copied to '<archive>.arcfs-journal.undo' first, so truncating the archive back to the
+recorded length and restoring those ranges brings it back exactly. The journal is removed
+only after the archive has been flushed to disk; a journal found later means the update
+did not complete, and the archive is rolled back before it is used.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import json
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from arcfs.core.logging import debug_print
+
+JOURNAL_SUFFIX = '.arcfs-journal'
+UNDO_SUFFIX = '.undo'
+# Piece size when saving and restoring overwritten ranges
+_COPY_CHUNK = 1024 * 1024
+
+
+def journal_path(archive_path: str) -> str:
+    """Path of the journal kept next to an archive."""
+    return archive_path + JOURNAL_SUFFIX
+
+
+def _copy(src, dst, length: int) -> None:
+    while length > 0:
+        chunk = src.read(min(length, _COPY_CHUNK))
+        if not chunk:
+            break
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path: str) -> None:
+    # Directory fsync makes journal creation and removal durable; not available everywhere
+    try:
+        _fsync_path(os.path.dirname(os.path.abspath(path)) or '.')
+    except OSError:
+        pass
+
+
+def recover(archive_path: str) -> bool:
+    """
+    Roll back an interrupted update, if a journal exists for the archive.
+
+    Args:
+        archive_path: Path to the archive
+
+    Returns:
+        True if the archive was rolled back
+    """
+    path = journal_path(archive_path)
+    undo_path = path + UNDO_SUFFIX
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        size = int(record['size'])
+        ranges = [(int(offset), int(length)) for offset, length in record.get('ranges', ())]
+    except FileNotFoundError:
+        # An undo file without a journal is left over from a finished update
+        _remove(undo_path)
+        return False
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        # A journal that was never completely written means the archive was never touched
+        debug_print(f"[AppendJournal] Discarding unreadable journal {path}: {e}", level=1)
+        os.remove(path)
+        _remove(undo_path)
+        return False
+    if os.path.exists(archive_path) and (ranges or os.path.getsize(archive_path) > size):
+        debug_print(f"[AppendJournal] Rolling back interrupted update to {archive_path}", level=1)
+        with open(archive_path, 'r+b') as f:
+            f.truncate(size)
+            if ranges:
+                with open(undo_path, 'rb') as undo:
+                    for offset, length in ranges:
+                        f.seek(offset)
+                        _copy(undo, f, length)
+            f.flush()
+            os.fsync(f.fileno())
+    os.remove(path)
+    _remove(undo_path)
+    _fsync_dir(path)
+    return True
+
+
+class AppendJournal:
+    """
+    Journal guarding one update to an archive.
+
+    Usage:
+        with AppendJournal(path, preserve=[(offset, length), ...]):
+            ... append to path, overwriting only the preserved ranges ...
+
+    Leaving the block normally flushes the archive and removes the journal; an exception
+    restores the archive to its original contents before propagating.
+    """
+
+    def __init__(self, archive_path: str, preserve: Optional[Iterable[Tuple[int, int]]] = None):
+        """
+        Initialize the journal.
+
+        Args:
+            archive_path: Path to the archive
+            preserve: (offset, length) ranges of existing bytes the update overwrites
+        """
+        self.archive_path = archive_path
+        self.path = journal_path(archive_path)
+        self.preserve: List[Tuple[int, int]] = [(o, n) for o, n in (preserve or ()) if n > 0]
+        self.size: Optional[int] = None
+
+    def begin(self) -> int:
+        """
+        Record the archive's current length and save the ranges to be overwritten.
+
+        Returns:
+            The recorded length
+        """
+        recover(self.archive_path)
+        # The update must not reach a transaction snapshot sharing the archive's inode
+        from arcfs.core import snapshot
+        snapshot.detach(self.archive_path)
+        self.size = os.path.getsize(self.archive_path)
+        ranges = [(offset, min(length, self.size - offset)) for offset, length in self.preserve
+                  if offset < self.size]
+        if ranges:
+            # The undo data must be durable before the journal that refers to it exists
+            with open(self.archive_path, 'rb') as src, open(self.path + UNDO_SUFFIX, 'wb') as undo:
+                for offset, length in ranges:
+                    src.seek(offset)
+                    _copy(src, undo, length)
+                undo.flush()
+                os.fsync(undo.fileno())
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': self.size, 'ranges': ranges}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        _fsync_dir(self.path)
+        return self.size
+
+    def commit(self) -> None:
+        """Flush the updated archive to disk and drop the journal."""
+        _fsync_path(self.archive_path)
+        os.remove(self.path)
+        _remove(self.path + UNDO_SUFFIX)
+        _fsync_dir(self.path)
+
+    def rollback(self) -> None:
+        """Restore the archive to its recorded contents and drop the journal."""
+        recover(self.archive_path)
+
+    def __enter__(self) -> 'AppendJournal':
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
@@ -67,13 +67,6 @@ class ArcfsPhysicalIO:
         except Exception as e:
             debug_print(f"Exception in ArcfsPhysicalIO.remove: {e}", level=1, exc=e)
             raise IOError(f"Error removing file: {e}")
-        debug_print(f"[ArcfsPhysicalIO.remove] path={path}", level=2)
-        if HybridBufferedFile.is_managed(path):
-            debug_print(f"[ArcfsPhysicalIO.remove] Removing from HybridBufferedFile: {path}", level=2)
-            HybridBufferedFile.remove(path)
-        else:
-            debug_print(f"[ArcfsPhysicalIO.remove] Removing from real FS: {path}", level=2)
-            os.remove(path)
 
     @staticmethod
     def rename(src, dst):
@@ -0,0 +1,204 @@
+"""
+In-memory directory tree of an archive for the Archive File System.
+
+Archive formats store a flat list of member names. ArchiveTree turns one pass over that
+list into a tree of nodes, creating the parent directories that archives often leave
+implicit, so list_dir, walk, is_dir and get_info are answered by dictionary lookups
+instead of a scan of every name. Handlers build it on first use and keep it for as long
+as they are open, applying staged writes and deletions to it as they happen.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Approximate memory held by one node and its slot in its parent's dict, in bytes
+_NODE_SIZE = 200
+
+
+class TreeNode:
+    """
+    One file or directory in an ArchiveTree.
+
+    'member' is the handler's own record for the entry (ZipInfo, TarInfo, ...), or None
+    for a directory that only exists because entries below it do. 'staged' marks entries
+    written or created in the current session and not yet committed.
+    """
+    __slots__ = ('name', 'is_dir', 'member', 'staged', 'children')
+
+    def __init__(self, name: str, is_dir: bool, member: Any = None, staged: bool = False):
+        self.name = name
+        self.is_dir = is_dir
+        self.member = member
+        self.staged = staged
+        self.children: Optional[Dict[str, 'TreeNode']] = {} if is_dir else None
+
+    @property
+    def implicit(self) -> bool:
+        """True for a directory with no entry of its own in the archive or the session."""
+        return self.member is None and not self.staged
+
+
+def _split(path: str) -> List[str]:
+    return [p for p in path.replace('\\', '/').split('/') if p not in ('', '.')]
+
+
+class ArchiveTree:
+    """
+    Directory tree of the entries of one archive.
+
+    Usage:
+        tree = ArchiveTree()
+        for info in zip_file.infolist():
+            tree.add(info.filename, is_dir=info.is_dir(), member=info)
+        tree.list_dir('docs')
+        for root, dirs, files in tree.walk(''):
+            ...
+    """
+
+    def __init__(self):
+        self.root = TreeNode('', True)
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Number of nodes, implicit directories included."""
+        return self._count
+
+    def memory_usage(self) -> int:
+        """Approximate memory held by the tree, in bytes (excluding the member records)."""
+        return self._count * _NODE_SIZE
+
+    def add(self, path: str, is_dir: bool = False, member: Any = None, staged: bool = False) -> TreeNode:
+        """
+        Add or replace an entry, creating any missing parent directories.
+
+        Args:
+            path: Entry path within the archive (a trailing '/' is ignored)
+            is_dir: Whether the entry is a directory
+            member: Handler record for the entry
+            staged: Whether the entry is an uncommitted change
+
+        Returns:
+            The entry's node
+        """
+        node = self.root
+        parts = _split(path)
+        if not parts:
+            return node
+        for part in parts[:-1]:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = TreeNode(part, True)
+                self._count += 1
+            elif not child.is_dir:
+                # A file name reused as a directory by later entries, as ZIPs allow
+                child.is_dir = True
+                child.children = {}
+            node = child
+        name = parts[-1]
+        child = node.children.get(name)
+        if child is None:
+            child = node.children[name] = TreeNode(name, is_dir, member, staged)
+            self._count += 1
+            return child
+        # A directory that still has entries below it stays a directory
+        if is_dir and not child.is_dir:
+            child.children = {}
+        elif not is_dir and child.is_dir and not child.children:
+            child.children = None
+        child.is_dir = child.children is not None
+        child.member = member
+        child.staged = staged
+        return child
+
+    def remove(self, path: str) -> bool:
+        """
+        Drop an entry's own record. A directory with entries below it stays, as an implicit
+        directory, just as it would in the archive; empty implicit parents are pruned.
+
+        Args:
+            path: Entry path within the archive
+
+        Returns:
+            True if the entry existed
+        """
+        parts = _split(path)
+        if not parts:
+            return False
+        chain = [self.root]
+        for part in parts:
+            node = chain[-1].children.get(part) if chain[-1].is_dir else None
+            if node is None:
+                return False
+            chain.append(node)
+        node = chain[-1]
+        node.member = None
+        node.staged = False
+        while len(chain) > 1 and chain[-1].implicit and not chain[-1].children:
+            node = chain.pop()
+            del chain[-1].children[node.name]
+            self._count -= 1
+        return True
+
+    def find(self, path: str) -> Optional[TreeNode]:
+        """
+        Look up an entry.
+
+        Args:
+            path: Entry path within the archive ('' for the root)
+
+        Returns:
+            The node, or None if there is no such entry
+        """
+        node = self.root
+        for part in _split(path):
+            if not node.is_dir:
+                return None
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def is_dir(self, path: str) -> bool:
+        node = self.find(path)
+        return node is not None and node.is_dir
+
+    def list_dir(self, path: str) -> List[str]:
+        """
+        Names of the entries directly inside a directory, sorted.
+
+        Args:
+            path: Directory path within the archive ('' for the root)
+
+        Returns:
+            List of names, empty if path is not a directory
+        """
+        node = self.find(path)
+        if node is None or not node.is_dir:
+            return []
+        return sorted(node.children)
+
+    def walk(self, path: str = '') -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Top-down (root, dirs, files) tuples for the tree below a directory, like os.walk.
+        Roots are relative to the archive; removing names from 'dirs' skips them.
+
+        Args:
+            path: Directory path within the archive to start from
+        """
+        start = self.find(path)
+        if start is None or not start.is_dir:
+            return
+        stack = [('/'.join(_split(path)), start)]
+        while stack:
+            root, node = stack.pop()
+            names = sorted(node.children)
+            dirs = [n for n in names if node.children[n].is_dir]
+            files = [n for n in names if not node.children[n].is_dir]
+            yield root, dirs, files
+            for name in reversed(dirs):
+                child = node.children.get(name)
+                if child is not None and child.is_dir:
+                    stack.append((f"{root}/{name}" if root else name, child))
@@ -26,6 +26,9 @@ class ArchiveHandler(ABC):
     Concrete handlers should be as concise as possible and override only what is needed.
     Automatically registers all subclasses with HandlerManager on definition.
     """
+    # False for handlers whose reads share one file position (or decompressor), so a pooled
+    # instance must not be used by two threads at once
+    thread_safe = True
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -98,6 +101,87 @@ class ArchiveHandler(ABC):
     def copy_entry(self, src, dst):
         raise NotImplementedError(f"{type(self).__name__} does not support copy_entry.")
 
+    # --- Nested archive support ---
+    # Handlers that accept a 'fileobj' constructor argument can be opened on a member
+    # stream of another archive instead of a physical file.
+    supports_fileobj = False
+
+    def get_entry_window(self, path: str):
+        """
+        Return a zero-copy FileWindow over the raw bytes of a stored (uncompressed) entry.
+
+        Args:
+            path: Entry path within the archive
+
+        Returns:
+            FileWindow, or None if the entry is compressed or not backed by a seekable source
+        """
+        return None
+
+    # --- Directory tree ---
+    def directory_tree(self):
+        """
+        In-memory ArchiveTree of the archive's entries, for handlers that keep one.
+
+        Returns:
+            ArchiveTree, or None if the handler answers directory queries itself
+        """
+        return None
+
+    def _node_info(self, node, path: str) -> Dict[str, Any]:
+        """Entry info for a node of directory_tree(), as get_entry_info() returns it."""
+        raise NotImplementedError(f"{type(self).__name__} does not keep a directory tree.")
+
+    def scandir(self, path: str = ''):
+        """
+        Generator yielding (name, info) for each entry directly inside a directory of the
+        archive, in name order, with info in the form get_entry_info() returns.
+
+        Args:
+            path: Directory path within the archive
+        """
+        tree = self.directory_tree()
+        prefix = path.strip('/') + '/' if path.strip('/') else ''
+        if tree is None:
+            for name in self.list_dir(path):
+                try:
+                    info = self.get_entry_info(prefix + name)
+                except FileNotFoundError:
+                    info = None
+                if info:
+                    yield name, info
+            return
+        node = tree.find(path)
+        if node is None or not node.is_dir:
+            return
+        for name in sorted(node.children):
+            child = node.children.get(name)
+            if child is not None:
+                yield name, self._node_info(child, prefix + name)
+
+    def walk(self, path: str = ''):
+        """
+        Generator yielding top-down (root, dirs, files) tuples below a directory of the
+        archive, with roots relative to the archive.
+
+        Args:
+            path: Directory path within the archive to start from
+        """
+        dirs, files = [], []
+        for name, info in self.scandir(path):
+            (dirs if info.get('is_dir') else files).append(name)
+        yield path, dirs, files
+        for name in dirs:
+            yield from self.walk(f"{path}/{name}" if path else name)
+
+    # --- Resource accounting ---
+    def memory_usage(self) -> int:
+        """
+        Approximate memory held by the open handler, in bytes.
+        Used by the handler pool to bound the memory of cached handlers.
+        """
+        return 0
+
     # --- Abstract methods ---
     def __init__(self, path: str, mode: str = 'r'):
         """
@@ -121,6 +205,14 @@ class ArchiveHandler(ABC):
         """Close the archive, releasing any resources."""
         pass
         return self
+
+    def discard(self) -> None:
+        """
+        Close the archive without committing changes made through this handler.
+        Handlers that stage writes until close() commit them only while 'modified' is set.
+        """
+        self.modified = False
+        self.close()
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit context manager, closing the archive."""
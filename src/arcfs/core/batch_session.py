@@ -2,17 +2,41 @@
 Batch session handling for the Archive File System.
 Provides a way to group multiple operations on archives for better efficiency.
 
+While a session is active, the stream provider routes every write to an archive through
+one handler per archive that the session holds open. Changes accumulate in those handlers
+(staged members, deletions, new directories) and each archive is committed exactly once,
+when the session commits; rolling back discards them without touching the archives.
+
 Author: Tim Hosking
 Contact: https://github.com/Munger
 License: MIT
 """
 
-from typing import Dict, Set, Any, Optional, Union
 import os
-from collections import defaultdict
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .archive_handlers import ArchiveHandler
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.logging import debug_print
 
-from .path_resolver import PathResolver
-from .utils import is_archive_format
+
+class BatchCommitError(IOError):
+    """
+    Raised by BatchSession.commit() when one or more archives failed to commit.
+
+    Attributes:
+        errors: The exception raised for each archive that failed, keyed by archive path
+        committed: Archive paths that were committed successfully
+    """
+
+    def __init__(self, errors: Dict[str, Exception], committed: List[str]):
+        self.errors = errors
+        self.committed = committed
+        details = '; '.join(f"{path}: {error}" for path, error in errors.items())
+        super().__init__(f"Failed to commit {len(errors)} of {len(errors) + len(committed)} archives: {details}")
 
 
 class BatchSession:
@@ -20,172 +44,261 @@ class BatchSession:
     Session object for grouping operations on archives.
     Allows multiple operations on the same archive to be batched together
     for better performance, rebuilding the archive only once per session.
+
+    The session is active from creation until commit() or rollback(). It applies to every
+    operation on the owning ArchiveFS during that time, from any thread, not only to the
+    calls made through the session object.
     """
-    
+
     def __init__(self, archive_fs):
         """
-        Initialize a batch session.
-        
+        Initialize a batch session and make it the active session of archive_fs.
+
         Args:
             archive_fs: The parent ArchiveFS instance
+
+        Raises:
+            RuntimeError: If archive_fs already has an active session
         """
         self._fs = archive_fs
-        self._path_resolver = PathResolver()
-        self._modified_archives: Set[str] = set()
-    
+        self._provider = archive_fs._stream_provider
+        self._handlers: Dict[str, ArchiveHandler] = {}
+        self._paths: Dict[str, str] = {}
+        self._streams = weakref.WeakSet()
+        self._lock = RLock()
+        self._active = True
+        self._provider.begin_batch(self)
+
     def __getattr__(self, name: str) -> Any:
         """
-        Proxy attribute access to the parent ArchiveFS instance.
-        
+        Proxy attribute access to the parent ArchiveFS instance (files, dirs, config, ...).
+
         Args:
             name: Attribute name
-            
+
         Returns:
             The attribute from the parent ArchiveFS
         """
-        # Get the attribute from the parent ArchiveFS
-        attr = getattr(self._fs, name)
-        
-        # If it's a method, wrap it to track modifications
-        if callable(attr):
-            def wrapped_method(*args, **kwargs):
-                # Special case for mkdir
-                if name == 'mkdir' and args and isinstance(args[0], str):
-                    return self.mkdir(args[0], **kwargs)
-                
-                # Call the original method
-                result = attr(*args, **kwargs)
-                
-                # Track if an archive was modified
-                if name in ('write', 'append', 'remove', 'mkdir', 'rmdir'):
-                    # The first argument is typically the path
-                    if args and isinstance(args[0], str):
-                        self._track_modification(args[0])
-                
-                return result
-            
-            return wrapped_method
-        
-        # Otherwise, just return the attribute
-        return attr
-    
-    def _track_modification(self, path: str) -> None:
-        """
-        Track that an archive was modified.
-        
+        return getattr(self._fs, name)
+
+    @property
+    def active(self) -> bool:
+        """True until the session has been committed or rolled back."""
+        return self._active
+
+    # --- Handler holding (called by the stream provider) ---
+    def hold(self, archive_path: str, factory: Callable[[], ArchiveHandler]) -> ArchiveHandler:
+        """
+        Get the session's handler for an archive, creating it on first use.
+
         Args:
-            path: Path that was modified
-        """
-        # Resolve the path to get the archive components
-        path_info = self._path_resolver.resolve(path)
-        
-        # If the path has archive components, track the parent archive
-        if path_info.archive_components and path_info.physical_path:
-            self._modified_archives.add(path_info.physical_path)
-    
+            archive_path: Physical path of the archive
+            factory: Creates a handler opened for writing
+
+        Returns:
+            The handler, which stays open until the session ends
+        """
+        key = os.path.realpath(archive_path)
+        with self._lock:
+            handler = self._handlers.get(key)
+            if handler is None:
+                handler = factory()
+                self._handlers[key] = handler
+                self._paths[key] = archive_path
+            return handler
+
+    def held(self, archive_path: str) -> Optional[ArchiveHandler]:
+        """
+        Get the session's handler for an archive, if the session has written to it.
+
+        Args:
+            archive_path: Physical path of the archive
+
+        Returns:
+            The handler, or None
+        """
+        with self._lock:
+            return self._handlers.get(os.path.realpath(archive_path))
+
+    def track_stream(self, stream: Any, replaces: Any = None) -> None:
+        """
+        Remember a write stream opened through a held handler, so commit() can close
+        it if the caller has not.
+
+        Args:
+            stream: Entry stream returned by a held handler, or the wrapper handed to the caller
+            replaces: A tracked stream that 'stream' wraps; it is forgotten, so that closing
+                      the wrapper flushes its buffer before the stream underneath is closed
+        """
+        with self._lock:
+            if replaces is not None:
+                if replaces not in self._streams:
+                    return
+                self._streams.discard(replaces)
+            self._streams.add(stream)
+
+    # --- Session end ---
     def commit(self) -> None:
         """
         Commit all pending changes.
         This method is called automatically when the session is exited.
-        Ensures all modified archives are finalized (flushed and closed).
-        """
-        from .core.archive_handlers import get_handler_for_path
-        for archive_path in list(self._modified_archives):
-            if not os.path.exists(archive_path):
-                continue
-            handler_cls = get_handler_for_path(archive_path)
-            if handler_cls is not None:
+        Each held handler is closed once, which writes its archive. Independent archives
+        are committed concurrently on up to 'batch_commit_workers' threads; every archive
+        is attempted even if another fails.
+
+        Archives that committed stay committed when others fail. Run the session inside
+        FilesAPI.transaction() over the touched archives to make the commit all-or-nothing:
+        the BatchCommitError propagates out of the transaction, which restores them all.
+
+        Raises:
+            BatchCommitError: If one or more archives failed to commit
+        """
+        handlers = self._finish()
+        errors: Dict[str, Exception] = {}
+        workers = min(len(handlers), GlobalConfig.get('batch_commit_workers') or os.cpu_count() or 1)
+        if workers > 1:
+            # Rebuilds are dominated by zlib/bz2/lzma and file I/O, which release the GIL
+            with ThreadPoolExecutor(workers) as executor:
+                futures = {archive_path: executor.submit(self._commit_one, archive_path, handler)
+                           for archive_path, handler in handlers.items()}
+                for archive_path, future in futures.items():
+                    error = future.result()
+                    if error is not None:
+                        errors[archive_path] = error
+        else:
+            for archive_path, handler in handlers.items():
+                error = self._commit_one(archive_path, handler)
+                if error is not None:
+                    errors[archive_path] = error
+        if errors:
+            committed = [archive_path for archive_path in handlers if archive_path not in errors]
+            raise BatchCommitError(errors, committed)
+
+    def _commit_one(self, archive_path: str, handler: ArchiveHandler) -> Optional[Exception]:
+        """Close one held handler, returning the error instead of raising it."""
+        try:
+            handler.close()
+        except Exception as e:
+            debug_print(f"[BatchSession] Error committing {archive_path}: {e}", level=1, exc=e)
+            return e
+        finally:
+            self._provider.invalidate(archive_path)
+        return None
+
+    def rollback(self) -> None:
+        """
+        Discard all pending changes, leaving every archive as it was before the session.
+        """
+        handlers = self._finish()
+        for archive_path, handler in handlers.items():
+            try:
+                handler.discard()
+            except Exception as e:
+                debug_print(f"[BatchSession] Error discarding changes to {archive_path}: {e}", level=1, exc=e)
+            finally:
+                self._provider.invalidate(archive_path)
+
+    def _finish(self) -> Dict[str, ArchiveHandler]:
+        """End the session and hand back its handlers, keyed by archive path."""
+        with self._lock:
+            if not self._active:
+                return {}
+            self._active = False
+            self._provider.end_batch(self)
+            # Data still buffered in streams the caller left open belongs to the batch
+            for stream in list(self._streams):
                 try:
-                    with handler_cls(archive_path, 'a'):
-                        pass  # Opening and closing will flush/finalize
-                except Exception:
-                    pass  # Ignore errors to not break batch session cleanup
-        self._modified_archives.clear()
-    
+                    stream.close()
+                except Exception as e:
+                    debug_print(f"[BatchSession] Error closing stream: {e}", level=1, exc=e)
+            handlers = {self._paths[key]: handler for key, handler in self._handlers.items()}
+            self._handlers.clear()
+            self._paths.clear()
+            return handlers
+
+    def __enter__(self) -> 'BatchSession':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    # --- Convenience operations ---
     def open(self, path: str, mode: str = 'r', encoding: str = 'utf-8'):
         """
-        Open a file with tracking of modifications.
-        
+        Open a file as part of the session.
+
         Args:
             path: Path to the file
             mode: File mode
             encoding: Text encoding (for text modes)
-            
+
         Returns:
             A file object
         """
-        # If opening for writing, track the modification
-        if any(m in mode for m in ('w', 'a', 'x', '+')):
-            self._track_modification(path)
-            
-        # Delegate to the parent FS
-        return self._fs.open(path, mode, encoding)
-    
+        return self._fs.files.open(path, mode, encoding=encoding)
+
+    def read(self, path: str, binary: bool = False) -> Union[str, bytes]:
+        """
+        Read a file, seeing changes made earlier in the session.
+
+        Args:
+            path: Path to the file
+            binary: Whether to return bytes
+
+        Returns:
+            File contents
+        """
+        with self._fs.files.open(path, 'rb' if binary else 'r') as f:
+            return f.read()
+
     def write(self, path: str, data: Union[str, bytes], binary: bool = False):
         """
-        Write data to a file, tracking the modification.
-        
+        Write data to a file as part of the session.
+
         Args:
             path: Path to the file
             data: Data to write
             binary: Whether data is binary
         """
-        # Track the modification
-        self._track_modification(path)
-        
-        # Delegate to the parent FS
-        return self._fs.write(path, data, binary)
-                
+        if isinstance(data, bytes) or binary:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            with self._fs.files.open(path, 'wb') as f:
+                return f.write(data)
+        return self._fs.files.write(path, data)
+
     def append(self, path: str, data: Union[str, bytes], binary: bool = False):
         """
-        Append data to a file, tracking the modification.
-        
+        Append data to a file as part of the session.
+
         Args:
             path: Path to the file
             data: Data to append
             binary: Whether data is binary
         """
-        # Track the modification
-        self._track_modification(path)
-        
-        # Delegate to the parent FS
-        return self._fs.append(path, data, binary)
-    
+        binary = binary or isinstance(data, bytes)
+        if binary and isinstance(data, str):
+            data = data.encode('utf-8')
+        return self._fs.files.append(path, data, binary=binary)
+
+    def remove(self, path: str):
+        """
+        Remove a file as part of the session.
+
+        Args:
+            path: Path to the file
+        """
+        return self._fs.files.remove(path)
+
     def mkdir(self, path: str, create_parents: bool = False):
         """
-        Create a directory, tracking the modification.
-        
+        Create a directory as part of the session.
+
         Args:
             path: Path to create
             create_parents: If True, create parent directories if they don't exist
         """
-        # Track the modification
-        self._track_modification(path)
-        
-        # Check if this is a path inside an archive
-        if '/' in path:
-            from .core.archive_handlers import get_handler_for_path
-            
-            # Split path to find archive part
-            parts = path.split('/')
-            archive_path = parts[0]
-            
-            # If it's an archive, ensure it exists
-            if is_archive_format(archive_path):
-                if not os.path.exists(archive_path):
-                    # Create the archive first 
-                    handler_cls = get_handler_for_path(archive_path)
-                    if handler_cls:
-                        handler_cls.create_empty(archive_path)
-                
-                # Now use the handler to create the directory
-                dir_path = '/'.join(parts[1:])
-                handler_cls = get_handler_for_path(archive_path)
-                if handler_cls:
-                    with handler_cls(archive_path, 'a') as handler:
-                        handler.create_dir(dir_path)
-                    return
-                    
-        # If not an archive path or we couldn't handle it,
-        # delegate to the parent FS
-        return self._fs.mkdir(path, create_parents)
\ No newline at end of file
+        return self._fs.dirs.mkdir(path, create_parents=create_parents)
@@ -77,7 +77,7 @@ class HybridBufferedStream:
         """
         self.mode = mode
         self.encoding = encoding or 'utf-8'
-        self._max_memory_size = max_memory_size if max_memory_size is not None else ConfigAPI().get_buffer_size()
+        self._max_memory_size = max_memory_size if max_memory_size is not None else ConfigAPI().buffer_threshold
         self._dirty = False
         self._closed = False
         self._is_text = 't' in mode or 'b' not in mode
@@ -216,6 +216,13 @@ class HybridBufferedStream:
         with HybridBufferedStream._lock:
             HybridBufferedStream._open_streams.discard(self)
 
+    def size(self) -> int:
+        """Return the number of bytes held, without moving the stream position."""
+        self.flush()
+        if self._using_tempfile:
+            return os.fstat(self._buffer.fileno()).st_size
+        return len(self._buffer.getbuffer())
+
     def get_bytes(self):
         """Return all data as bytes, regardless of backend."""
         self.flush()
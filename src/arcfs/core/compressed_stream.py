@@ -0,0 +1,194 @@
+"""
+Shared stream behaviour for single-file compressed formats (GZIP, BZIP2, XZ).
+
+Reads decompress on demand from the underlying compressed file object, so memory use is
+bounded by the decompressor's buffers rather than by the uncompressed size. Writes are
+buffered (spilling to disk past the buffer threshold) and compressed when the stream is
+closed: into a temporary file that is then renamed over the target, so the target is
+only replaced once the data is complete, or, for appends, onto the end of the target
+under an AppendJournal, so an interrupted append is rolled back.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import io
+import os
+import shutil
+import threading
+from typing import Any, BinaryIO, Optional
+
+from arcfs.core import append_journal, snapshot
+from arcfs.core.buffering import HybridBufferedFile
+
+# Chunk size when feeding buffered writes to the compressor
+COPY_CHUNK = 1024 * 1024
+
+
+class CompressedFileStream:
+    """
+    File-like stream over the single member of a compressed file.
+
+    Subclasses provide _open_reader() and _write_compressed(); format_name is used in
+    error messages.
+    """
+    format_name = 'compressed'
+
+    def __init__(self, path: str, mode: str, buffer_threshold: Optional[int] = None, handler=None):
+        """
+        Initialize the stream.
+
+        Args:
+            path: Path to the compressed file
+            mode: Access mode
+            buffer_threshold: Optional in-memory buffer threshold for writes
+            handler: Parent handler (its fs is used for write buffering when available)
+        """
+        self.path = path
+        self.mode = mode
+        self.handler = handler
+        self._buffer_threshold = buffer_threshold
+        self._closed = False
+        self._write_mode = 'w' in mode or 'a' in mode
+        self._reader: Optional[BinaryIO] = None
+        self._buffer: Any = None
+        # Finish a transaction that was interrupted while it covered this file
+        snapshot.recover(path)
+        append_journal.recover(path)
+        if not self._write_mode:
+            try:
+                self._reader = self._open_reader()
+            except Exception as e:
+                raise IOError(f"Error opening {self.format_name} file: {e}")
+        elif handler is not None and getattr(handler, 'fs', None) is not None:
+            self._buffer = handler.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=None)
+        else:
+            self._buffer = HybridBufferedFile.open(None, 'w+b')
+
+    # --- Format hooks ---
+    def _open_reader(self) -> BinaryIO:
+        """Open a buffered, seekable decompressing reader over self.path."""
+        raise NotImplementedError
+
+    def _write_compressed(self, source: BinaryIO, target: str, append: bool) -> None:
+        """Compress everything readable from source into target, appending a new stream if append."""
+        raise NotImplementedError
+
+    # --- Reading ---
+    def read(self, size=-1):
+        self._check_readable()
+        return self._reader.read(-1 if size is None else size)
+
+    def read1(self, size=-1):
+        self._check_readable()
+        return self._reader.read1(-1 if size is None else size)
+
+    def readinto(self, b):
+        self._check_readable()
+        return self._reader.readinto(b)
+
+    def readline(self, size=-1):
+        self._check_readable()
+        return self._reader.readline(-1 if size is None else size)
+
+    def readlines(self, hint=-1):
+        self._check_readable()
+        return self._reader.readlines(hint)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    # --- Writing ---
+    def write(self, b):
+        self._check_open()
+        if not self._write_mode:
+            raise io.UnsupportedOperation("write")
+        return self._buffer.write(b)
+
+    def flush(self):
+        self._check_open()
+        if self._buffer is not None:
+            self._buffer.flush()
+
+    # --- Positioning ---
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._check_open()
+        target = self._reader if self._reader is not None else self._buffer
+        return target.seek(offset, whence)
+
+    def tell(self):
+        self._check_open()
+        # The reader reports the position in the uncompressed data
+        target = self._reader if self._reader is not None else self._buffer
+        return target.tell()
+
+    def readable(self):
+        return not self._write_mode
+
+    def writable(self):
+        return self._write_mode
+
+    def seekable(self):
+        return True
+
+    # --- Lifecycle ---
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        if self._closed:
+            return
+        try:
+            if self._write_mode:
+                try:
+                    self._buffer.seek(0)
+                    self._commit()
+                except Exception as e:
+                    raise IOError(f"Error writing to {self.format_name} file: {e}")
+        finally:
+            if self._buffer is not None:
+                self._buffer.close()
+            if self._reader is not None:
+                self._reader.close()
+            self._closed = True
+
+    def _commit(self) -> None:
+        if 'a' in self.mode and os.path.exists(self.path):
+            # The journal also detaches a transaction snapshot sharing the file's inode
+            with append_journal.AppendJournal(self.path):
+                self._write_compressed(self._buffer, self.path, append=True)
+            return
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._write_compressed(self._buffer, temp_path, append=False)
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, temp_path)
+            # Renaming over the target leaves any hardlinked transaction snapshot untouched
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError("I/O operation on closed file.")
+
+    def _check_readable(self) -> None:
+        self._check_open()
+        if self._reader is None:
+            raise io.UnsupportedOperation("read")
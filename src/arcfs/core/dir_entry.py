@@ -0,0 +1,120 @@
+"""
+Directory entries returned by fs.dirs.scandir() in the Archive File System.
+
+ArchiveDirEntry mirrors os.DirEntry (name, path, is_dir(), is_file(), stat()) and adds
+the size, modification time and compressed size an archive listing already holds, so a
+caller can list a directory and stat every entry without opening the archive again.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import os
+import stat as stat_module
+from typing import Any, Dict, Iterator, Optional
+
+
+class ArchiveDirEntry:
+    """
+    An entry of a physical or archive directory, with its stat data cached.
+
+    Entries of archive directories carry the info from the archive's listing; entries
+    of physical directories wrap os.DirEntry and stat on first use.
+    """
+    __slots__ = ('name', 'path', '_info', '_os_entry')
+
+    def __init__(self, name: str, path: str, info: Optional[Dict[str, Any]] = None,
+                 os_entry: Optional[os.DirEntry] = None):
+        """
+        Initialize the entry.
+
+        Args:
+            name: Entry name
+            path: Full ARCFS path of the entry
+            info: Entry info as returned by get_info() (for archive entries)
+            os_entry: os.DirEntry for entries of physical directories
+        """
+        self.name = name
+        self.path = path
+        self._info = info
+        self._os_entry = os_entry
+
+    def _get_info(self) -> Dict[str, Any]:
+        if self._info is None:
+            st = self._os_entry.stat()
+            self._info = {'size': st.st_size, 'compressed_size': st.st_size, 'modified': st.st_mtime,
+                          'is_dir': stat_module.S_ISDIR(st.st_mode), 'path': self.path}
+        return self._info
+
+    def is_dir(self) -> bool:
+        if self._info is None and self._os_entry is not None:
+            return self._os_entry.is_dir()
+        return bool(self._get_info().get('is_dir', False))
+
+    def is_file(self) -> bool:
+        return not self.is_dir()
+
+    def is_symlink(self) -> bool:
+        return self._os_entry.is_symlink() if self._os_entry is not None else False
+
+    @property
+    def size(self) -> int:
+        """Uncompressed size in bytes (0 for directories)."""
+        return self._get_info().get('size', 0) or 0
+
+    @property
+    def mtime(self) -> float:
+        """Modification time as a Unix timestamp."""
+        return self._get_info().get('modified', 0.0) or 0.0
+
+    @property
+    def compressed_size(self) -> int:
+        """Bytes the entry occupies in its archive (the size, for uncompressed formats and physical files)."""
+        info = self._get_info()
+        return info.get('compressed_size', info.get('size', 0)) or 0
+
+    def info(self) -> Dict[str, Any]:
+        """The entry's info, in the form returned by fs.files.get_info()."""
+        return dict(self._get_info(), path=self.path)
+
+    def stat(self) -> os.stat_result:
+        """An os.stat_result holding the entry's type, size and modification time."""
+        if self._os_entry is not None:
+            return self._os_entry.stat()
+        mode = (stat_module.S_IFDIR | 0o755) if self.is_dir() else (stat_module.S_IFREG | 0o644)
+        mtime = self.mtime
+        return os.stat_result((mode, 0, 0, 1, 0, 0, self.size, mtime, mtime, mtime))
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<ArchiveDirEntry {self.name!r}>"
+
+
+class ScandirIterator:
+    """
+    Lazy iterator of ArchiveDirEntry objects, usable as a context manager like the
+    iterator returned by os.scandir(). Closing it releases the archive handler early.
+    """
+
+    def __init__(self, entries: Iterator[ArchiveDirEntry]):
+        self._entries = entries
+
+    def __iter__(self) -> 'ScandirIterator':
+        return self
+
+    def __next__(self) -> ArchiveDirEntry:
+        return next(self._entries)
+
+    def close(self) -> None:
+        close = getattr(self._entries, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> 'ScandirIterator':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
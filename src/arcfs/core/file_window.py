@@ -0,0 +1,217 @@
+"""
+Offset windows over files for the Archive File System.
+A FileWindow exposes a byte range of another file as a read-only, seekable file object,
+without copying the data. Archive handlers use it to serve stored (uncompressed) members
+straight from the archive file, including members of archives nested inside other archives.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import io
+import os
+from threading import Lock
+from typing import Any, Optional
+
+
+class FileWindow(io.RawIOBase):
+    """
+    Read-only view of the byte range [offset, offset + size) of an underlying file.
+
+    The underlying file is either an OS file descriptor, read with os.pread() so windows
+    sharing a file never disturb each other's position, or any seekable file object,
+    read under a lock. A window over another window is flattened onto the same source,
+    so nesting costs nothing per read.
+    """
+
+    def __init__(self, source: Any, offset: int = 0, size: Optional[int] = None, owns_source: bool = False):
+        """
+        Initialize the window.
+
+        Args:
+            source: OS file descriptor (int), seekable file object, or another FileWindow
+            offset: Start of the window within source
+            size: Length of the window (defaults to the rest of source)
+            owns_source: Close source when the window is closed
+        """
+        super().__init__()
+        lock = None
+        if isinstance(source, FileWindow):
+            # Flatten: read directly from the parent's source
+            if size is None:
+                size = max(0, source.size - offset)
+            offset = source._offset + offset
+            size = min(size, max(0, source._offset + source.size - offset))
+            if source._fd is not None:
+                source = os.dup(source._fd)
+                owns_source = True
+            else:
+                # Windows over the same file object must serialize their seek+read pairs
+                lock = source._lock
+                source = source._fileobj
+                owns_source = False
+        self._fd = source if isinstance(source, int) else None
+        self._fileobj = None if self._fd is not None else source
+        self._lock = lock or Lock()
+        self._owns_source = owns_source
+        if size is None:
+            size = max(0, self._source_size() - offset)
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+
+    @classmethod
+    def from_path(cls, path: str, offset: int = 0, size: Optional[int] = None) -> 'FileWindow':
+        """
+        Open a window over a physical file.
+
+        Args:
+            path: Path to the file
+            offset: Start of the window
+            size: Length of the window (defaults to the rest of the file)
+
+        Returns:
+            FileWindow owning its own file descriptor
+        """
+        flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+        fd = os.open(path, flags)
+        try:
+            return cls(fd, offset, size, owns_source=True)
+        except Exception:
+            os.close(fd)
+            raise
+
+    @property
+    def size(self) -> int:
+        """Length of the window in bytes."""
+        return self._size
+
+    @property
+    def offset(self) -> int:
+        """Absolute offset of the window within its source."""
+        return self._offset
+
+    def subwindow(self, offset: int, size: Optional[int] = None) -> 'FileWindow':
+        """
+        Create an independent window over a range of this window.
+
+        Args:
+            offset: Start of the range, relative to this window
+            size: Length of the range (defaults to the rest of this window)
+
+        Returns:
+            New FileWindow sharing the same source
+        """
+        return FileWindow(self, offset, size)
+
+    def read_at(self, position: int, size: int) -> bytes:
+        """
+        Read up to size bytes at position without moving the stream position.
+
+        Args:
+            position: Offset relative to the window start
+            size: Number of bytes to read
+
+        Returns:
+            Bytes read (shorter at the end of the window)
+        """
+        self._check_closed()
+        size = max(0, min(size, self._size - position))
+        if size == 0:
+            return b''
+        return self._pread(self._offset + position, size)
+
+    # --- io.RawIOBase interface ---
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return False
+
+    def readinto(self, b) -> int:
+        self._check_closed()
+        data = self.read_at(self._pos, len(b))
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        return n
+
+    def read(self, size: int = -1) -> bytes:
+        self._check_closed()
+        if size is None or size < 0:
+            size = self._size - self._pos
+        data = self.read_at(self._pos, size)
+        self._pos += len(data)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_closed()
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        self._check_closed()
+        return self._pos
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._owns_source:
+                if self._fd is not None:
+                    os.close(self._fd)
+                elif self._fileobj is not None:
+                    self._fileobj.close()
+        finally:
+            self._fd = None
+            self._fileobj = None
+            super().close()
+
+    # --- Internal helpers ---
+    def _check_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+    def _source_size(self) -> int:
+        if self._fd is not None:
+            return os.fstat(self._fd).st_size
+        with self._lock:
+            pos = self._fileobj.tell()
+            end = self._fileobj.seek(0, io.SEEK_END)
+            self._fileobj.seek(pos)
+            return end
+
+    def _pread(self, position: int, size: int) -> bytes:
+        if self._fd is not None and hasattr(os, 'pread'):
+            chunks = []
+            while size > 0:
+                chunk = os.pread(self._fd, size, position)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                position += len(chunk)
+                size -= len(chunk)
+            return b''.join(chunks)
+        with self._lock:
+            if self._fd is not None:
+                os.lseek(self._fd, position, os.SEEK_SET)
+                return os.read(self._fd, size)
+            self._fileobj.seek(position)
+            return self._fileobj.read(size)
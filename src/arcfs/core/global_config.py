@@ -11,6 +11,33 @@ class GlobalConfig:
     _defaults = {
         "buffer_threshold": None,  # Will be dynamically computed if None
         "debug_level": 0,
+        "handler_pool_max_open": 32,  # Archive handlers kept open by StreamProvider
+        "handler_pool_max_memory": 256 * 1024 ** 2,  # Approximate bytes held by pooled handlers
+        "path_cache_size": 4096,  # Resolved paths memoized per PathResolver (0 disables)
+        "stat_cache_size": 65536,  # Archive entry lookups remembered by exists/is_file/is_dir/get_info (0 disables)
+        "stat_cache_ttl": 60.0,  # Seconds a cached archive entry lookup stays valid (None = until the archive changes)
+        "gzip_index_spacing": 32 * 1024 ** 2,  # Uncompressed bytes between gzip seek checkpoints
+        "gzip_index_persist": False,  # Save gzip seek indexes next to the archive as <archive>.gzidx
+        "gzip_compress_level": 6,  # Deflate level for gzip writes
+        "gzip_compress_workers": None,  # Threads for parallel gzip compression (None = CPU count)
+        "gzip_compress_block_size": 1024 ** 2,  # Uncompressed bytes per parallel compression block
+        "zip_inplace_append": True,  # Commit ZIP changes by appending instead of rebuilding the archive
+        "zip_append_max_waste": 0.5,  # Fraction of a ZIP held by superseded data that triggers a rebuild
+        "tar_inplace_update": True,  # Commit changes to uncompressed TARs in place instead of rebuilding
+        "tar_append_max_waste": 0.5,  # Fraction of a TAR held by deleted or replaced members that triggers a rebuild
+        "tar_gz_append": False,  # Commit .tar.gz changes as extra gzip members instead of recompressing
+        "tar_gz_max_segments": 64,  # Gzip members a .tar.gz may grow to before appends compact it
+        "tar_listing_index": False,  # Save member listings of TAR archives next to them as <archive>.arcidx
+        "batch_commit_workers": None,  # Threads committing a batch session's archives (None = CPU count)
+        "async_max_workers": None,  # AsyncArchiveFS executor threads (None = CPU count + 4, at most 32)
+        "async_archive_concurrency": 1,  # AsyncArchiveFS operations running at once on one archive
+        "extract_workers": None,  # Threads used by fs.archives.extract_all (None = CPU count)
+        "compress_workers": None,  # Threads used by fs.archives.compress_dir (None = CPU count)
+        "compress_level": None,  # Deflate level for fs.archives.compress_dir ZIPs (None = zlib default)
+        "compress_max_memory": 256 * 1024 ** 2,  # Bytes compress_dir may read ahead of the archive writer
+        "walk_workers": None,  # Threads scanning directories and archives for fs.dirs.walk (None = CPU count + 4, at most 32)
+        "walk_max_open_archives": 8,  # Archives fs.dirs.walk lists at once
+        "walk_max_memory": 64 * 1024 ** 2,  # Bytes of listings fs.dirs.walk may scan ahead of the caller
         # Add more defaults here as needed
         # e.g. "foo": 42, "bar": "baz"
     }
@@ -0,0 +1,544 @@
+"""
+Seek checkpoint index for gzip streams in the Archive File System.
+
+A zran-style index: while a gzip stream is decompressed, the decompressor state is
+checkpointed every 'gzip_index_spacing' bytes of output, so a later seek resumes
+from the nearest checkpoint instead of decompressing from byte 0.
+
+Two kinds of checkpoint exist:
+    * In-memory checkpoints hold a copy of the zlib decompressor and are valid for the
+      lifetime of the reader (and of any handler that keeps it open).
+    * Persistable checkpoints are points where deflate can be restarted from the file
+      alone: the start of a gzip member, or a byte-aligned sync-flush point together
+      with the preceding 32 KiB of output (the deflate window). These can be saved next
+      to the archive and reused by later processes.
+
+Python's zlib cannot restart inflate at an arbitrary bit offset (zlib's inflatePrime is
+not exposed), so streams written without sync flushes or multiple members only get
+in-memory checkpoints beyond the start of the file.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import base64
+import bisect
+import gzip
+import io
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+from arcfs.core.file_window import FileWindow
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.logging import debug_print
+
+# Size of the deflate history window
+WINDOW_SIZE = 32 * 1024
+# Marker left by a zlib Z_SYNC_FLUSH (an empty stored block), after which deflate restarts byte-aligned
+SYNC_MARKER = b'\x00\x00\xff\xff'
+_GZIP_MAGIC = b'\x1f\x8b'
+_READ_CHUNK = 64 * 1024
+_MAX_OUTPUT = 1024 * 1024
+_SIDECAR_SUFFIX = '.gzidx'
+_BadGzipFile = getattr(gzip, 'BadGzipFile', OSError)
+
+
+class GzipCheckpoint:
+    """A point in a gzip stream where decompression can resume."""
+    MEMBER = 'member'  # Start of a gzip member (restart with header parsing)
+    SYNC = 'sync'      # Byte-aligned deflate block boundary (restart raw inflate with window)
+    STATE = 'state'    # Copied decompressor state (in memory only)
+
+    __slots__ = ('out_offset', 'in_offset', 'kind', 'window', 'state')
+
+    def __init__(self, out_offset: int, in_offset: int, kind: str, window: bytes = b'', state: Any = None):
+        self.out_offset = out_offset
+        self.in_offset = in_offset
+        self.kind = kind
+        self.window = window
+        self.state = state
+
+    @property
+    def persistable(self) -> bool:
+        return self.kind != GzipCheckpoint.STATE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'out': self.out_offset,
+            'in': self.in_offset,
+            'kind': self.kind,
+            'window': base64.b64encode(self.window).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GzipCheckpoint':
+        return cls(int(data['out']), int(data['in']), data['kind'], base64.b64decode(data.get('window', '')))
+
+
+class GzipIndex:
+    """
+    Ordered set of checkpoints for one gzip stream.
+
+    An index can be saved to '<archive>.gzidx' and is only loaded back while the archive's
+    size and modification time still match the values recorded when it was built.
+    """
+    VERSION = 1
+
+    def __init__(self, spacing: Optional[int] = None, archive_size: Optional[int] = None,
+                 archive_mtime_ns: Optional[int] = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            spacing: Uncompressed bytes between checkpoints (defaults to GlobalConfig 'gzip_index_spacing')
+            archive_size: Size of the compressed file the index describes
+            archive_mtime_ns: Modification time of the compressed file
+        """
+        self.spacing = int(spacing or GlobalConfig.get('gzip_index_spacing'))
+        self.archive_size = archive_size
+        self.archive_mtime_ns = archive_mtime_ns
+        self.size: Optional[int] = None  # Uncompressed size, once the end of the stream has been seen
+        self.checkpoints: List[GzipCheckpoint] = []
+        self._offsets: List[int] = []
+        self.dirty = False
+
+    @classmethod
+    def for_file(cls, path: str, spacing: Optional[int] = None) -> 'GzipIndex':
+        """Create an empty index bound to the current size and mtime of path."""
+        st = os.stat(path)
+        return cls(spacing, st.st_size, st.st_mtime_ns)
+
+    def add(self, checkpoint: GzipCheckpoint) -> None:
+        """
+        Add a checkpoint. An existing checkpoint at the same output offset is only
+        replaced by a persistable one.
+
+        Args:
+            checkpoint: Checkpoint to add
+        """
+        i = bisect.bisect_left(self._offsets, checkpoint.out_offset)
+        if i < len(self._offsets) and self._offsets[i] == checkpoint.out_offset:
+            if checkpoint.persistable and not self.checkpoints[i].persistable:
+                self.checkpoints[i] = checkpoint
+                self.dirty = True
+            return
+        self._offsets.insert(i, checkpoint.out_offset)
+        self.checkpoints.insert(i, checkpoint)
+        if checkpoint.persistable:
+            self.dirty = True
+
+    def nearest(self, offset: int) -> Optional[GzipCheckpoint]:
+        """
+        Find the last checkpoint at or before an uncompressed offset.
+
+        Args:
+            offset: Uncompressed offset
+
+        Returns:
+            GzipCheckpoint, or None if there is none before offset
+        """
+        i = bisect.bisect_right(self._offsets, offset)
+        return self.checkpoints[i - 1] if i else None
+
+    def last_offset(self, persistable: bool = False) -> int:
+        """Output offset of the last (persistable) checkpoint, or -1."""
+        for checkpoint in reversed(self.checkpoints):
+            if checkpoint.persistable or not persistable:
+                return checkpoint.out_offset
+        return -1
+
+    def truncate(self, out_offset: int) -> None:
+        """
+        Drop the checkpoints at or after an uncompressed offset, and the recorded size.
+        Used when the end of the stream is cut off and rewritten.
+
+        Args:
+            out_offset: Uncompressed offset of the first byte being discarded
+        """
+        i = bisect.bisect_left(self._offsets, out_offset)
+        del self._offsets[i:]
+        del self.checkpoints[i:]
+        self.size = None
+        self.dirty = True
+
+    def rebind(self, archive_path: str) -> None:
+        """
+        Record the current size and modification time of a file the index still describes
+        after it has been changed, e.g. by appending gzip members.
+
+        Args:
+            archive_path: Path to the compressed file
+        """
+        st = os.stat(archive_path)
+        self.archive_size = st.st_size
+        self.archive_mtime_ns = st.st_mtime_ns
+        self.dirty = True
+
+    def memory_usage(self) -> int:
+        """Approximate memory held by the checkpoints, in bytes."""
+        # A copied zlib inflate state carries its own 32 KiB window
+        return sum(len(c.window) + (WINDOW_SIZE + 8192 if c.state is not None else 0) + 64
+                   for c in self.checkpoints)
+
+    # --- Persistence ---
+    @staticmethod
+    def sidecar_path(archive_path: str) -> str:
+        """Path of the index file kept next to an archive."""
+        return archive_path + _SIDECAR_SUFFIX
+
+    def matches(self, archive_path: str) -> bool:
+        """
+        Check that the index still describes the file at archive_path.
+
+        Args:
+            archive_path: Path to the compressed file
+
+        Returns:
+            True if size and modification time are unchanged
+        """
+        try:
+            st = os.stat(archive_path)
+        except OSError:
+            return False
+        return st.st_size == self.archive_size and st.st_mtime_ns == self.archive_mtime_ns
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.VERSION,
+            'spacing': self.spacing,
+            'archive_size': self.archive_size,
+            'archive_mtime_ns': self.archive_mtime_ns,
+            'size': self.size,
+            'checkpoints': [c.to_dict() for c in self.checkpoints if c.persistable],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GzipIndex':
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Unsupported gzip index version: {data.get('version')}")
+        index = cls(data.get('spacing'), data.get('archive_size'), data.get('archive_mtime_ns'))
+        index.size = data.get('size')
+        for item in data.get('checkpoints', []):
+            index.add(GzipCheckpoint.from_dict(item))
+        index.dirty = False
+        return index
+
+    def save(self, archive_path: str, index_path: Optional[str] = None) -> str:
+        """
+        Write the persistable checkpoints next to the archive.
+
+        Args:
+            archive_path: Path to the compressed file the index describes
+            index_path: Destination (defaults to sidecar_path(archive_path))
+
+        Returns:
+            Path of the written index file
+        """
+        index_path = index_path or self.sidecar_path(archive_path)
+        payload = gzip.compress(json.dumps(self.to_dict()).encode('utf-8'), mtime=0)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, index_path)
+        self.dirty = False
+        return index_path
+
+    @classmethod
+    def load(cls, archive_path: str, index_path: Optional[str] = None) -> Optional['GzipIndex']:
+        """
+        Load a saved index if it exists and still matches the archive.
+
+        Args:
+            archive_path: Path to the compressed file
+            index_path: Index location (defaults to sidecar_path(archive_path))
+
+        Returns:
+            GzipIndex, or None if missing, unreadable or stale
+        """
+        index_path = index_path or cls.sidecar_path(archive_path)
+        try:
+            with open(index_path, 'rb') as f:
+                index = cls.from_dict(json.loads(gzip.decompress(f.read()).decode('utf-8')))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            debug_print(f"[GzipIndex] Ignoring unreadable index {index_path}: {e}", level=1)
+            return None
+        if not index.matches(archive_path):
+            debug_print(f"[GzipIndex] Ignoring stale index {index_path}", level=2)
+            return None
+        return index
+
+    @classmethod
+    def build(cls, archive_path: str, spacing: Optional[int] = None, save: bool = False) -> 'GzipIndex':
+        """
+        Build a complete index with one sequential pass over a gzip file.
+
+        Args:
+            archive_path: Path to the compressed file
+            spacing: Uncompressed bytes between checkpoints
+            save: Also write the index next to the archive
+
+        Returns:
+            The built GzipIndex
+        """
+        index = cls.for_file(archive_path, spacing)
+        with IndexedGzipReader(archive_path, index=index, persist=False) as reader:
+            reader.seek(0, io.SEEK_END)
+        if save:
+            index.save(archive_path)
+        return index
+
+
+class IndexedGzipReader(io.RawIOBase):
+    """
+    Seekable, read-only decompressing view of a gzip stream (single or multi-member).
+
+    Checkpoints are added to the index during the first sequential pass; seeks, including
+    backward ones, restart decompression from the nearest checkpoint before the target.
+    """
+
+    def __init__(self, source: Any, index: Optional[GzipIndex] = None, persist: Optional[bool] = None):
+        """
+        Initialize the reader.
+
+        Args:
+            source: Path to a gzip file, or a seekable binary file object holding one
+            index: Index to use and extend (loaded from the sidecar or created if omitted)
+            persist: Save the index next to the file once the stream has been read to the end
+                     (defaults to GlobalConfig 'gzip_index_persist'; only applies to paths)
+        """
+        super().__init__()
+        self._path = source if isinstance(source, str) else None
+        if self._path is not None:
+            self._raw = FileWindow.from_path(self._path)
+        else:
+            self._raw = FileWindow(source)
+        if persist is None:
+            persist = bool(GlobalConfig.get('gzip_index_persist'))
+        self._persist = persist and self._path is not None
+        if index is None and self._path is not None:
+            index = GzipIndex.load(self._path)
+            if index is None:
+                index = GzipIndex.for_file(self._path)
+        self.index = index if index is not None else GzipIndex()
+        self._pos = 0
+        self._reset(None)
+
+    # --- io.RawIOBase interface ---
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def read(self, size: int = -1) -> bytes:
+        self._check_closed()
+        self._position_at(self._pos)
+        if size is None or size < 0:
+            while self._fill():
+                pass
+            size = len(self._buf)
+        else:
+            while len(self._buf) < size and self._fill():
+                pass
+        data = bytes(self._buf[:size])
+        del self._buf[:size]
+        self._pos += len(data)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_closed()
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._total_size() + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        self._check_closed()
+        return self._pos
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._raw.close()
+        finally:
+            self._decompressor = None
+            super().close()
+
+    # --- Positioning ---
+    def _check_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+    def _total_size(self) -> int:
+        if self.index.size is None:
+            # Continue from the furthest point known and decompress to the end
+            target = max(self._out_pos, self.index.last_offset())
+            self._position_at(target)
+            while self._fill():
+                del self._buf[:]
+        return self.index.size
+
+    def _position_at(self, pos: int) -> None:
+        """Make the buffer start exactly at pos (or leave it empty at end of stream)."""
+        buf_start = self._out_pos - len(self._buf)
+        if buf_start <= pos <= self._out_pos:
+            del self._buf[:pos - buf_start]
+            return
+        checkpoint = self.index.nearest(pos)
+        if pos < buf_start or (checkpoint is not None and checkpoint.out_offset > self._out_pos):
+            self._reset(checkpoint)
+        # Decompress and discard up to pos
+        del self._buf[:]
+        while self._out_pos < pos:
+            if not self._fill():
+                del self._buf[:]
+                return
+            excess = self._out_pos - pos
+            if excess <= 0:
+                del self._buf[:]
+            else:
+                del self._buf[:len(self._buf) - excess]
+
+    def _reset(self, checkpoint: Optional[GzipCheckpoint]) -> None:
+        """Restart decompression at a checkpoint (or at the start of the stream)."""
+        self._buf = bytearray()
+        self._eof = False
+        self._raw_deflate = False
+        if checkpoint is None or checkpoint.kind == GzipCheckpoint.MEMBER:
+            self._decompressor = None
+            self._in_pos = checkpoint.in_offset if checkpoint else 0
+            self._out_pos = checkpoint.out_offset if checkpoint else 0
+            self._window = bytearray()
+            self._window_known = True
+        elif checkpoint.kind == GzipCheckpoint.SYNC:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=checkpoint.window)
+            self._raw_deflate = True
+            self._in_pos = checkpoint.in_offset
+            self._out_pos = checkpoint.out_offset
+            self._window = bytearray(checkpoint.window)
+            self._window_known = True
+        else:
+            self._decompressor = checkpoint.state.copy()
+            self._raw_deflate = checkpoint.window == b'raw'
+            self._in_pos = checkpoint.in_offset
+            self._out_pos = checkpoint.out_offset
+            self._window = bytearray()
+            self._window_known = False
+        self._next_state = self._out_pos + self.index.spacing
+        self._next_sync = max(self._out_pos, self.index.last_offset(persistable=True)) + self.index.spacing
+
+    # --- Decompression ---
+    def _fill(self) -> bool:
+        """Decompress the next piece of output into the buffer. Returns False at end of stream."""
+        if self._eof:
+            return False
+        if self._decompressor is None and not self._start_member():
+            return False
+        data = self._raw.read_at(self._in_pos, _READ_CHUNK)
+        if not data:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        sync_at = -1
+        if self._window_known and self._out_pos >= self._next_sync:
+            sync_at = data.find(SYNC_MARKER)
+            if sync_at >= 0:
+                data = data[:sync_at + len(SYNC_MARKER)]
+        decompressor = self._decompressor
+        out = decompressor.decompress(data, _MAX_OUTPUT)
+        consumed = len(data) - len(decompressor.unconsumed_tail) - len(decompressor.unused_data)
+        self._in_pos += consumed
+        self._emit(out)
+        if decompressor.eof:
+            self._end_member()
+        elif sync_at >= 0 and consumed == len(data):
+            self._try_sync_checkpoint()
+        if self._out_pos >= self._next_state and self._decompressor is not None:
+            self.index.add(GzipCheckpoint(self._out_pos, self._in_pos, GzipCheckpoint.STATE,
+                                          b'raw' if self._raw_deflate else b'', self._decompressor.copy()))
+            self._next_state = self._out_pos + self.index.spacing
+        return True
+
+    def _start_member(self) -> bool:
+        magic = self._raw.read_at(self._in_pos, 2)
+        if magic != _GZIP_MAGIC:
+            if self._in_pos == 0 and magic:
+                raise _BadGzipFile(f"Not a gzipped file ({magic!r})")
+            # End of data (possibly followed by zero padding)
+            self._finish()
+            return False
+        self.index.add(GzipCheckpoint(self._out_pos, self._in_pos, GzipCheckpoint.MEMBER))
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._raw_deflate = False
+        self._window = bytearray()
+        self._window_known = True
+        return True
+
+    def _end_member(self) -> None:
+        if self._raw_deflate:
+            # Resumed as raw deflate: skip the CRC32 and ISIZE trailer ourselves
+            self._in_pos += 8
+        self._decompressor = None
+        self._raw_deflate = False
+
+    def _finish(self) -> None:
+        self._eof = True
+        if self.index.size is None:
+            self.index.size = self._out_pos
+            self.index.dirty = True
+        if self._persist and self.index.dirty:
+            try:
+                self.index.save(self._path)
+            except OSError as e:
+                debug_print(f"[IndexedGzipReader] Could not save index for {self._path}: {e}", level=1)
+
+    def _emit(self, out: bytes) -> None:
+        if not out:
+            return
+        self._buf += out
+        self._out_pos += len(out)
+        if len(out) >= WINDOW_SIZE:
+            self._window = bytearray(out[-WINDOW_SIZE:])
+            self._window_known = True
+        else:
+            self._window += out
+            if len(self._window) > WINDOW_SIZE:
+                del self._window[:-WINDOW_SIZE]
+                self._window_known = True
+
+    def _try_sync_checkpoint(self) -> None:
+        """Record a persistable checkpoint if the stream really restarts byte-aligned here."""
+        probe = self._raw.read_at(self._in_pos, 16 * 1024)
+        if not probe:
+            return
+        window = bytes(self._window)
+        try:
+            trial = zlib.decompressobj(-zlib.MAX_WBITS, zdict=window) if window else zlib.decompressobj(-zlib.MAX_WBITS)
+            expected = self._decompressor.copy().decompress(probe, 4096)
+            actual = trial.decompress(probe, 4096)
+        except zlib.error:
+            return
+        if expected and expected == actual:
+            self.index.add(GzipCheckpoint(self._out_pos, self._in_pos, GzipCheckpoint.SYNC, window))
+            self._next_sync = self._out_pos + self.index.spacing
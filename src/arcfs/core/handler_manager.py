@@ -7,7 +7,7 @@ Contact: https://github.com/Munger
 License: MIT
 """
 
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, List
 
 class HandlerManager:
     """
@@ -23,6 +23,32 @@ class HandlerManager:
         HandlerManager.create_archive('foo.tar')
     """
     _registry: Dict[str, Tuple[type, Optional[object], Optional[dict]]] = {}
+    # Bumped on every (de)registration so extension matchers and path caches can detect staleness
+    _generation = 0
+    _matcher = None
+    _matcher_generation = -1
+
+    @classmethod
+    def get_generation(cls) -> int:
+        """
+        Return the registry generation, which changes whenever a handler is registered or deregistered.
+        """
+        return cls._generation
+
+    @classmethod
+    def get_matcher(cls):
+        """
+        Return the compiled extension matcher for the registered handlers.
+        The matcher is rebuilt lazily after the registry changes.
+        """
+        matcher = cls._matcher
+        if matcher is None or cls._matcher_generation != cls._generation:
+            from arcfs.core.utils import SuffixMatcher
+            generation = cls._generation
+            matcher = SuffixMatcher(cls._registry.keys())
+            cls._matcher = matcher
+            cls._matcher_generation = generation
+        return matcher
 
     @classmethod
     def get_handler_for_path(cls, path: str):
@@ -31,11 +57,11 @@ class HandlerManager:
         Returns the handler class or None.
         """
         import os
-        basename = os.path.basename(path)
-        for ext in sorted(cls._registry.keys(), key=len, reverse=True):
-            if basename.lower().endswith(ext):
-                return cls._registry[ext][0]
-        return None
+        ext = cls.get_matcher().match(os.path.basename(path))
+        if not ext:
+            return None
+        entry = cls._registry.get(ext)
+        return entry[0] if entry else None
 
     @classmethod
     def register_handler(cls, ext: str, handler_cls: type, config_iface: Optional[object] = None, config_schema: Optional[dict] = None):
@@ -48,13 +74,15 @@ class HandlerManager:
             config_schema: Dict describing config schema (optional)
         """
         cls._registry[ext.lower()] = (handler_cls, config_iface, config_schema)
+        cls._generation += 1
 
     @classmethod
     def deregister_handler(cls, ext: str):
         """
         Remove a handler and its config from the registry.
         """
-        cls._registry.pop(ext.lower(), None)
+        if cls._registry.pop(ext.lower(), None) is not None:
+            cls._generation += 1
 
     @classmethod
     def get_handler(cls, ext: str):
@@ -73,42 +101,13 @@ class HandlerManager:
         entry = cls._registry.get(ext.lower())
         return entry[1] if entry else None
 
-class HandlerConfigProxy:
-    """
-    Proxy for handler-specific configuration.
-    Provides attribute and dict-style access to handler config fields.
-    """
-    def __init__(self, config_obj):
-        self._config_obj = config_obj
-
-    def __getattr__(self, key):
-        return getattr(self._config_obj, key)
-
-    def __setattr__(self, key, value):
-        if key == '_config_obj':
-            super().__setattr__(key, value)
-        else:
-            setattr(self._config_obj, key, value)
-
-    def __getitem__(self, key):
-        return getattr(self._config_obj, key)
-
-    def __setitem__(self, key, value):
-        setattr(self._config_obj, key, value)
-
-    def __iter__(self):
-        return iter(dir(self._config_obj))
-
-    def __len__(self):
-        return len(dir(self._config_obj))
-
     @classmethod
     def get_config(cls, ext: str):
         """
         Get the config interface for a given extension.
         Always returns a HandlerConfigProxy, which provides both attribute and dict-style access.
         """
-        entry = HandlerManager._registry.get(ext.lower())
+        entry = cls._registry.get(ext.lower())
         config = entry[1] if entry else None
         if config is None:
             return None
@@ -160,3 +159,40 @@ class HandlerConfigProxy:
                 handler_cls.create_empty(path)
         else:
             raise NotImplementedError(f"Archive creation for '{path}' is not supported.")
+
+    @classmethod
+    def get_handler_names(cls) -> List[str]:
+        """
+        Return the registered extensions without their leading dot (e.g. 'zip', 'tar.gz').
+        """
+        return [ext.lstrip('.') for ext in cls._registry.keys()]
+
+
+class HandlerConfigProxy:
+    """
+    Proxy for handler-specific configuration.
+    Provides attribute and dict-style access to handler config fields.
+    """
+    def __init__(self, config_obj):
+        self._config_obj = config_obj
+
+    def __getattr__(self, key):
+        return getattr(self._config_obj, key)
+
+    def __setattr__(self, key, value):
+        if key == '_config_obj':
+            super().__setattr__(key, value)
+        else:
+            setattr(self._config_obj, key, value)
+
+    def __getitem__(self, key):
+        return getattr(self._config_obj, key)
+
+    def __setitem__(self, key, value):
+        setattr(self._config_obj, key, value)
+
+    def __iter__(self):
+        return iter(dir(self._config_obj))
+
+    def __len__(self):
+        return len(dir(self._config_obj))
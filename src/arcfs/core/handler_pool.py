@@ -0,0 +1,325 @@
+"""
+Handler pool for the Archive File System.
+Keeps recently used archive handlers open so repeated reads of the same archive
+do not re-parse its directory (ZIP central directory, TAR member headers) on every call.
+
+Handlers are keyed by the physical path and its stat fingerprint (device, inode,
+mtime, size), plus the member chain for archives nested inside it, so a handler is
+never reused once the archive has changed on disk.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import os
+import weakref
+from collections import OrderedDict
+from threading import RLock, get_ident
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.logging import debug_print
+
+
+def stat_key(path: str) -> Tuple[str, int, int, int, int]:
+    """
+    Build the pool key for a physical archive.
+
+    Args:
+        path: Path to the archive on disk
+
+    Returns:
+        Tuple of (real path, st_dev, st_ino, st_mtime_ns, st_size)
+
+    Raises:
+        FileNotFoundError: If the archive does not exist
+    """
+    real_path = os.path.realpath(path)
+    st = os.stat(real_path)
+    return (real_path, st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _PoolEntry:
+    """A pooled handler together with its bookkeeping."""
+    __slots__ = ('key', 'path', 'handler', 'leases', 'streams', 'memory', 'owner')
+
+    def __init__(self, key: Hashable, path: str, handler: Any):
+        self.key = key
+        self.path = path
+        self.handler = handler
+        self.leases = 0
+        self.streams = weakref.WeakSet()
+        self.memory = 0
+        # Thread using a handler that is not thread-safe, while it is busy
+        self.owner: Optional[int] = None
+
+    def is_busy(self) -> bool:
+        """True while the handler is leased or one of its streams is still open."""
+        if self.leases:
+            return True
+        for stream in list(self.streams):
+            if not getattr(stream, 'closed', True):
+                return True
+        return False
+
+    def usable_by(self, thread: int) -> bool:
+        """True if the given thread may lease the handler now."""
+        if getattr(self.handler, 'thread_safe', True):
+            return True
+        return self.owner == thread or not self.is_busy()
+
+
+class HandlerPool:
+    """
+    LRU pool of open, read-only archive handlers.
+
+    A handler is leased with acquire() and returned with release(); it stays open in the
+    pool afterwards. Streams opened from a pooled handler can be registered with
+    track_stream() so the handler is not evicted while they are still being read.
+    A handler whose class sets thread_safe = False is only shared within one thread
+    while it is busy; another thread gets a handler of its own for the same archive.
+    Idle handlers are evicted in least-recently-used order once either the
+    'handler_pool_max_open' or 'handler_pool_max_memory' limit is exceeded.
+    """
+
+    def __init__(self, max_open: Optional[int] = None, max_memory: Optional[int] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            max_open: Maximum number of pooled handlers (defaults to GlobalConfig 'handler_pool_max_open')
+            max_memory: Approximate memory budget in bytes (defaults to GlobalConfig 'handler_pool_max_memory')
+        """
+        self._max_open = max_open
+        self._max_memory = max_memory
+        self._entries: "OrderedDict[int, _PoolEntry]" = OrderedDict()
+        self._by_key: Dict[Hashable, List[_PoolEntry]] = {}
+        self._by_path: Dict[str, Hashable] = {}
+        self._by_handler: Dict[int, _PoolEntry] = {}
+        self._retired: List[_PoolEntry] = []
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_open(self) -> int:
+        if self._max_open is not None:
+            return self._max_open
+        return int(GlobalConfig.get('handler_pool_max_open'))
+
+    @property
+    def max_memory(self) -> int:
+        if self._max_memory is not None:
+            return self._max_memory
+        return int(GlobalConfig.get('handler_pool_max_memory'))
+
+    def acquire(self, path: str, factory: Callable[[], Any], member: Tuple[str, ...] = ()) -> Any:
+        """
+        Lease a handler for the archive at path, creating it with factory() on a miss.
+
+        Args:
+            path: Physical path of the archive (used for invalidation)
+            factory: Zero-argument callable returning a new, open handler
+            member: Entry path chain for archives nested inside the physical archive
+
+        Returns:
+            The leased handler. Must be handed back with release().
+        """
+        fingerprint = stat_key(path)
+        key = (fingerprint, tuple(member))
+        thread = get_ident()
+        with self._lock:
+            self._reap_retired()
+            entry = self._find(key, thread)
+            if entry is not None:
+                self._lease(entry, thread)
+                self.hits += 1
+                return entry.handler
+            # A different fingerprint for the same path means the archive changed on disk
+            stale = self._by_path.get(path)
+            if stale is not None and stale != fingerprint:
+                debug_print(f"[HandlerPool] Archive changed on disk, dropping stale handlers: {path}", level=2)
+                for stale_entry in [e for e in self._entries.values() if e.path == path]:
+                    self._retire(stale_entry)
+            self.misses += 1
+        handler = factory()
+        with self._lock:
+            entry = self._find(key, thread)
+            if entry is not None:
+                # Another thread opened the same archive concurrently; keep the first one
+                self._close_handler(handler)
+                self._lease(entry, thread)
+                return entry.handler
+            entry = _PoolEntry(key, path, handler)
+            self._lease(entry, thread)
+            entry.memory = self._estimate_memory(handler)
+            self._entries[id(handler)] = entry
+            self._by_key.setdefault(key, []).append(entry)
+            self._by_path[path] = fingerprint
+            self._by_handler[id(handler)] = entry
+            self._evict()
+            return handler
+
+    def release(self, handler: Any) -> None:
+        """
+        Return a leased handler to the pool.
+
+        Args:
+            handler: Handler previously returned by acquire()
+        """
+        with self._lock:
+            entry = self._by_handler.get(id(handler))
+            if entry is None:
+                return
+            entry.leases = max(0, entry.leases - 1)
+            entry.memory = self._estimate_memory(handler)
+            if id(handler) not in self._entries:
+                self._reap_retired()
+            else:
+                self._evict()
+
+    def track_stream(self, handler: Any, stream: Any) -> None:
+        """
+        Keep the handler alive for as long as stream stays open.
+
+        Args:
+            handler: Pooled handler the stream was opened from
+            stream: File-like object exposing a 'closed' attribute
+        """
+        with self._lock:
+            entry = self._by_handler.get(id(handler))
+            if entry is None:
+                return
+            try:
+                entry.streams.add(stream)
+            except TypeError:
+                # Objects without weakref support cannot pin the handler
+                debug_print(f"[HandlerPool] Cannot track stream of type {type(stream).__name__}", level=2)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """
+        Drop pooled handlers for a physical path, or every handler if path is None.
+        Busy handlers are closed once their leases and streams are released.
+
+        Args:
+            path: Physical archive path to invalidate
+        """
+        with self._lock:
+            if path is None:
+                for entry in list(self._entries.values()):
+                    self._retire(entry)
+            else:
+                for entry in list(self._entries.values()):
+                    if entry.path == path:
+                        self._retire(entry)
+            self._reap_retired()
+
+    def close_all(self) -> None:
+        """Close every pooled handler, including busy ones."""
+        with self._lock:
+            entries = list(self._entries.values()) + self._retired
+            self._entries.clear()
+            self._by_key.clear()
+            self._by_path.clear()
+            self._by_handler.clear()
+            self._retired = []
+        for entry in entries:
+            self._close_handler(entry.handler)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return pool counters.
+
+        Returns:
+            Dictionary with open handler count, memory estimate, hits and misses
+        """
+        with self._lock:
+            return {
+                'open': len(self._entries),
+                'retired': len(self._retired),
+                'memory': sum(e.memory for e in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Internal helpers (caller holds the lock) ---
+    def _find(self, key: Hashable, thread: int) -> Optional[_PoolEntry]:
+        for entry in self._by_key.get(key, ()):
+            if entry.usable_by(thread):
+                return entry
+        return None
+
+    def _lease(self, entry: _PoolEntry, thread: int) -> None:
+        if id(entry.handler) in self._entries:
+            self._entries.move_to_end(id(entry.handler))
+        entry.leases += 1
+        entry.owner = thread
+
+    def _remove(self, entry: _PoolEntry) -> None:
+        self._entries.pop(id(entry.handler), None)
+        siblings = self._by_key.get(entry.key)
+        if siblings is not None:
+            if entry in siblings:
+                siblings.remove(entry)
+            if not siblings:
+                del self._by_key[entry.key]
+        self._forget_path(entry.path)
+
+    def _retire(self, entry: Optional[_PoolEntry]) -> None:
+        if entry is None:
+            return
+        self._remove(entry)
+        self._retired.append(entry)
+
+    def _forget_path(self, path: str) -> None:
+        if not any(e.path == path for e in self._entries.values()):
+            self._by_path.pop(path, None)
+
+    def _reap_retired(self) -> None:
+        still_busy = []
+        for entry in self._retired:
+            if entry.is_busy():
+                still_busy.append(entry)
+                continue
+            self._by_handler.pop(id(entry.handler), None)
+            self._close_handler(entry.handler)
+        self._retired = still_busy
+
+    def _evict(self) -> None:
+        max_open = self.max_open
+        max_memory = self.max_memory
+        total_memory = sum(e.memory for e in self._entries.values())
+        for key in list(self._entries.keys()):
+            if len(self._entries) <= max_open and total_memory <= max_memory:
+                break
+            entry = self._entries[key]
+            if entry.is_busy():
+                continue
+            debug_print(f"[HandlerPool] Evicting handler for {entry.path}", level=2)
+            self._remove(entry)
+            self._by_handler.pop(id(entry.handler), None)
+            total_memory -= entry.memory
+            self._close_handler(entry.handler)
+        self._reap_retired()
+
+    @staticmethod
+    def _estimate_memory(handler: Any) -> int:
+        usage = getattr(handler, 'memory_usage', None)
+        if usage is None:
+            return 0
+        try:
+            return int(usage())
+        except Exception as e:
+            debug_print(f"[HandlerPool] memory_usage failed for {type(handler).__name__}: {e}", level=2)
+            return 0
+
+    @staticmethod
+    def _close_handler(handler: Any) -> None:
+        try:
+            handler.close()
+        except Exception as e:
+            debug_print(f"[HandlerPool] Exception closing handler: {e}", level=1, exc=e)
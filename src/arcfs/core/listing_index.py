@@ -0,0 +1,151 @@
+"""
+Persistent member listing for tar-family archives in the Archive File System.
+
+Listing a compressed TAR means decompressing the whole stream, because member headers
+are spread through it. A ListingIndex records every member's name, type, size,
+modification time, mode and header/data offsets (plus any persistable gzip seek
+checkpoints) in '<archive>.arcidx', so later listings, stats and existence checks are
+answered without decompressing anything.
+
+A saved listing is only used while the archive's fingerprint (size, modification time,
+inode and a hash of its first bytes) still matches the one recorded with it.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import gzip
+import json
+import os
+import tarfile
+from typing import Any, Dict, List, Optional
+
+from arcfs.core.gzip_index import GzipIndex
+from arcfs.core.logging import debug_print
+from arcfs.core.utils import file_fingerprint
+
+_SIDECAR_SUFFIX = '.arcidx'
+
+
+class ListingIndex:
+    """
+    Saved member listing of one archive.
+    """
+    VERSION = 1
+
+    def __init__(self, fingerprint: Dict[str, Any], members: List[tarfile.TarInfo],
+                 gzip_index: Optional[GzipIndex] = None):
+        """
+        Initialize the listing.
+
+        Args:
+            fingerprint: file_fingerprint() of the archive the listing describes
+            members: Members in archive order, with offset and offset_data set
+            gzip_index: Persistable seek checkpoints of a .tar.gz, if any
+        """
+        self.fingerprint = fingerprint
+        self.members = members
+        self.gzip_index = gzip_index
+
+    @classmethod
+    def for_file(cls, path: str, members: List[tarfile.TarInfo],
+                 gzip_index: Optional[GzipIndex] = None) -> 'ListingIndex':
+        """Create a listing bound to the current fingerprint of path."""
+        return cls(file_fingerprint(path), members, gzip_index)
+
+    # --- Persistence ---
+    @staticmethod
+    def sidecar_path(archive_path: str) -> str:
+        """Path of the listing file kept next to an archive."""
+        return archive_path + _SIDECAR_SUFFIX
+
+    def matches(self, archive_path: str) -> bool:
+        """
+        Check that the listing still describes the file at archive_path.
+
+        Args:
+            archive_path: Path to the archive
+
+        Returns:
+            True if the archive's fingerprint is unchanged
+        """
+        try:
+            return file_fingerprint(archive_path) == self.fingerprint
+        except OSError:
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        gzip_index = None
+        if self.gzip_index is not None:
+            gzip_index = self.gzip_index.to_dict()
+        return {
+            'version': self.VERSION,
+            'fingerprint': self.fingerprint,
+            'members': [[m.name, m.type.decode('ascii'), m.size, m.mtime, m.mode,
+                         m.offset, m.offset_data, m.linkname] for m in self.members],
+            'gzip': gzip_index,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ListingIndex':
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Unsupported listing index version: {data.get('version')}")
+        members = []
+        for name, kind, size, mtime, mode, offset, offset_data, linkname in data['members']:
+            member = tarfile.TarInfo(name)
+            member.type = kind.encode('ascii')
+            member.size = size
+            member.mtime = mtime
+            member.mode = mode
+            member.offset = offset
+            member.offset_data = offset_data
+            member.linkname = linkname
+            members.append(member)
+        gzip_index = GzipIndex.from_dict(data['gzip']) if data.get('gzip') else None
+        return cls(data['fingerprint'], members, gzip_index)
+
+    def save(self, archive_path: str, index_path: Optional[str] = None) -> str:
+        """
+        Write the listing next to the archive.
+
+        Args:
+            archive_path: Path to the archive the listing describes
+            index_path: Destination (defaults to sidecar_path(archive_path))
+
+        Returns:
+            Path of the written listing file
+        """
+        index_path = index_path or self.sidecar_path(archive_path)
+        payload = gzip.compress(json.dumps(self.to_dict()).encode('utf-8'), mtime=0)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, index_path)
+        return index_path
+
+    @classmethod
+    def load(cls, archive_path: str, index_path: Optional[str] = None) -> Optional['ListingIndex']:
+        """
+        Load a saved listing if it exists and still matches the archive.
+
+        Args:
+            archive_path: Path to the archive
+            index_path: Listing location (defaults to sidecar_path(archive_path))
+
+        Returns:
+            ListingIndex, or None if missing, unreadable or stale
+        """
+        index_path = index_path or cls.sidecar_path(archive_path)
+        try:
+            with open(index_path, 'rb') as f:
+                index = cls.from_dict(json.loads(gzip.decompress(f.read()).decode('utf-8')))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            debug_print(f"[ListingIndex] Ignoring unreadable listing {index_path}: {e}", level=1)
+            return None
+        if not index.matches(archive_path):
+            debug_print(f"[ListingIndex] Ignoring stale listing {index_path}", level=2)
+            return None
+        return index
@@ -0,0 +1,394 @@
+"""
+Parallel archive creation for the Archive File System.
+
+A directory is scanned with os.scandir in sorted order. For ZIP archives a feeder thread
+reads each file in blocks, computes the CRC, and hands the blocks to a pool of threads
+that deflate them (zlib releases the GIL) as raw deflate primed with the previous block's
+tail, the way ParallelGzipWriter does, so every member is a single valid deflate stream.
+One writer thread takes the compressed blocks in order, writes each member's local
+header, data and sizes, and adds it to the central directory. Bytes read but not yet
+written are capped by a memory budget, so a large tree never sits in memory at once.
+
+Tar archives are one stream, so the tar data is produced in order by a single thread and
+only the compression is split: .tar.gz goes through ParallelGzipWriter, while .tar.bz2
+and .tar.xz are cut into chunks compressed in parallel as independent streams, which
+their readers decode as one concatenated stream.
+
+The archive is written to a temporary file next to its target and renamed into place.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import bz2
+import io
+import lzma
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterator, Optional, Tuple
+
+from arcfs.core.append_journal import _remove
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.gzip_index import WINDOW_SIZE
+from arcfs.core.logging import debug_print
+from arcfs.core.parallel_deflate import ParallelGzipWriter, _deflate_block
+from arcfs.core.progress import ProgressTracker, TransferProgress
+
+# Uncompressed bytes per ZIP compression job
+_BLOCK = 1024 * 1024
+# Uncompressed bytes per independently compressed .tar.bz2 / .tar.xz stream
+_STREAM_CHUNK = 8 * 1024 * 1024
+
+_TAR_COMPRESSION = {
+    '.tar': '', '.tar.gz': 'gz', '.tgz': 'gz', '.tar.bz2': 'bz2', '.tbz2': 'bz2',
+    '.tar.xz': 'xz', '.txz': 'xz',
+}
+
+
+def _workers(workers: Optional[int]) -> int:
+    if workers is None:
+        workers = GlobalConfig.get('compress_workers') or os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def archive_kind(archive_path: str) -> Optional[str]:
+    """'zip', 'tar', 'tar.gz', 'tar.bz2' or 'tar.xz' for a path this module can write, else None."""
+    name = os.path.basename(archive_path).lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    for ext, compression in _TAR_COMPRESSION.items():
+        if name.endswith(ext):
+            return 'tar.' + compression if compression else 'tar'
+    return None
+
+
+def scan_tree(source_dir: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Walk a directory tree with os.scandir, in sorted order.
+
+    Symbolic links are reported as links and never followed, so a link to a parent
+    directory cannot make the walk loop.
+
+    Args:
+        source_dir: Directory to walk
+
+    Yields:
+        (archive name, filesystem path, kind) with kind 'dir', 'file', 'link' or 'other'
+    """
+    def listing(directory: str, prefix: str):
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        return iter(entries), prefix
+
+    # Depth first, so each directory is followed by its contents
+    stack = [listing(source_dir, '')]
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        name = prefix + entry.name
+        if entry.is_symlink():
+            yield name, entry.path, 'link'
+        elif entry.is_dir():
+            yield name, entry.path, 'dir'
+            stack.append(listing(entry.path, name + '/'))
+        elif entry.is_file():
+            yield name, entry.path, 'file'
+        else:
+            yield name, entry.path, 'other'
+
+
+class _Cancelled(Exception):
+    """Raised in the feeder once the writer has failed."""
+
+
+class _MemoryBudget:
+    """Counts bytes held between the feeder and the writer, blocking the feeder at the limit."""
+
+    def __init__(self, limit: int):
+        self._limit = max(1, limit)
+        self._used = 0
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    def acquire(self, n: int) -> None:
+        with self._cond:
+            # A block larger than the whole budget still goes through, alone
+            while self._used and self._used + n > self._limit and not self._cancelled:
+                self._cond.wait()
+            if self._cancelled:
+                raise _Cancelled()
+            self._used += n
+
+    def release(self, n: int) -> None:
+        with self._cond:
+            self._used -= n
+            self._cond.notify_all()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+
+def _temp_path(archive_path: str) -> str:
+    return f"{archive_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _finish(temp_path: str, archive_path: str) -> None:
+    # Renaming over the archive leaves any hardlinked transaction snapshot untouched
+    os.replace(temp_path, archive_path)
+
+
+def pack_zip(source_dir: str, archive_path: str, workers: Optional[int] = None,
+             progress: Optional[Callable[[TransferProgress], None]] = None,
+             level: Optional[int] = None, max_memory: Optional[int] = None) -> TransferProgress:
+    """
+    Create a ZIP archive from a directory, deflating blocks on a thread pool.
+
+    Args:
+        source_dir: Directory to archive
+        archive_path: Path of the ZIP archive to create (replaced if it exists)
+        workers: Compression threads (defaults to GlobalConfig 'compress_workers', or the CPU count)
+        progress: Optional callback receiving TransferProgress updates
+        level: Deflate level (defaults to GlobalConfig 'compress_level')
+        max_memory: Bytes read ahead of the writer (defaults to GlobalConfig 'compress_max_memory')
+
+    Returns:
+        The final TransferProgress
+    """
+    if level is None:
+        level = GlobalConfig.get('compress_level')
+    level = zlib.Z_DEFAULT_COMPRESSION if level is None else int(level)
+    budget = _MemoryBudget(max_memory or GlobalConfig.get('compress_max_memory'))
+    items: 'queue.Queue[Any]' = queue.Queue()
+    tracker = ProgressTracker(progress)
+    executor = ThreadPoolExecutor(_workers(workers))
+
+    def feed() -> None:
+        try:
+            for name, path, kind in scan_tree(source_dir):
+                if kind == 'link' and os.path.isfile(path):
+                    kind = 'file'
+                if kind == 'dir':
+                    items.put(('dir', zipfile.ZipInfo.from_file(path, name)))
+                elif kind == 'file':
+                    _feed_file(name, path)
+                else:
+                    debug_print(f"[pack_zip] Skipping {path}: not a regular file or directory", level=1)
+            items.put(None)
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            items.put(('error', e))
+
+    def _feed_file(name: str, path: str) -> None:
+        with open(path, 'rb') as f:
+            zinfo = zipfile.ZipInfo.from_file(path, name)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            items.put(('begin', zinfo))
+            crc = 0
+            size = 0
+            dictionary = b''
+            data = f.read(_BLOCK)
+            while True:
+                # Read one block ahead, so the final block can end the deflate stream
+                nxt = f.read(_BLOCK) if len(data) == _BLOCK else b''
+                last = not nxt
+                budget.acquire(len(data))
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                items.put(('block', executor.submit(_deflate_block, data, dictionary, level, last), len(data)))
+                if last:
+                    break
+                dictionary = (dictionary + data)[-WINDOW_SIZE:]
+                data = nxt
+            items.put(('end', crc, size))
+
+    temp_path = _temp_path(archive_path)
+    feeder = threading.Thread(target=feed, name='arcfs-pack-feeder', daemon=True)
+    try:
+        with zipfile.ZipFile(temp_path, 'w', allowZip64=True) as zf:
+            feeder.start()
+            _write_zip(zf, items, budget, tracker)
+        _finish(temp_path, archive_path)
+    except BaseException:
+        budget.cancel()
+        _remove(temp_path)
+        raise
+    finally:
+        feeder.join()
+        executor.shutdown(wait=True)
+    return tracker.finish()
+
+
+def _write_zip(zf: zipfile.ZipFile, items: 'queue.Queue[Any]', budget: _MemoryBudget,
+               tracker: ProgressTracker) -> None:
+    """Write members to zf in the order the feeder queued them."""
+    fp = zf.fp
+    zinfo = None
+    zip64 = False
+    compress_size = 0
+    for item in iter(items.get, None):
+        kind = item[0]
+        if kind == 'error':
+            raise item[1]
+        if kind == 'dir':
+            zf.writestr(item[1], b'')
+            tracker.add(files=1)
+        elif kind == 'begin':
+            zinfo = item[1]
+            # Allow for deflate growing incompressible data, as zipfile does
+            zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+            zinfo.header_offset = zf.start_dir
+            zinfo.flag_bits = 0
+            zinfo.CRC = zinfo.compress_size = 0
+            fp.seek(zf.start_dir)
+            fp.write(zinfo.FileHeader(zip64))
+            compress_size = 0
+        elif kind == 'block':
+            data = item[1].result()
+            fp.write(data)
+            compress_size += len(data)
+            budget.release(item[2])
+            tracker.add(nbytes=item[2])
+        else:
+            # The file may have changed size since it was stat'ed; record what was read
+            zinfo.CRC, zinfo.file_size = item[1], item[2]
+            zinfo.compress_size = compress_size
+            end = fp.tell()
+            fp.seek(zinfo.header_offset)
+            fp.write(zinfo.FileHeader(zip64))
+            fp.seek(end)
+            zf.start_dir = end
+            zf.filelist.append(zinfo)
+            zf.NameToInfo[zinfo.filename] = zinfo
+            zf._didModify = True
+            tracker.add(files=1)
+
+
+class ParallelStreamWriter(io.RawIOBase):
+    """
+    Write-only file object compressing fixed-size chunks of its input as independent
+    streams on a thread pool and writing them in order. Used for bzip2 and xz, whose
+    readers accept concatenated streams; at most two chunks per worker are in flight.
+    """
+
+    def __init__(self, fileobj: Any, compress: Callable[[bytes], bytes], workers: int,
+                 chunk_size: int = _STREAM_CHUNK):
+        """
+        Initialize the writer.
+
+        Args:
+            fileobj: Binary file object receiving the compressed streams
+            compress: Compresses one chunk into one complete stream
+            workers: Compression threads
+            chunk_size: Uncompressed bytes per stream
+        """
+        super().__init__()
+        self._fileobj = fileobj
+        self._compress = compress
+        self._workers = max(1, workers)
+        self._chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(self._workers)
+        self._pending: Deque[Any] = deque()
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        data = memoryview(b).cast('B')
+        self._buf += data
+        while len(self._buf) >= self._chunk_size:
+            chunk = bytes(self._buf[:self._chunk_size])
+            del self._buf[:self._chunk_size]
+            self._submit(chunk)
+        return len(data)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buf or not self._pending:
+                # An empty input still needs one valid stream
+                self._submit(bytes(self._buf))
+                self._buf = bytearray()
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+            self._fileobj.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+            super().close()
+
+    def _submit(self, chunk: bytes) -> None:
+        self._pending.append(self._executor.submit(self._compress, chunk))
+        while len(self._pending) > self._workers * 2:
+            self._fileobj.write(self._pending.popleft().result())
+
+
+def pack_tar(source_dir: str, archive_path: str, workers: Optional[int] = None,
+             progress: Optional[Callable[[TransferProgress], None]] = None,
+             level: Optional[int] = None) -> TransferProgress:
+    """
+    Create a tar archive (plain, .tar.gz, .tar.bz2 or .tar.xz) from a directory, with the
+    compression split across a thread pool.
+
+    Args:
+        source_dir: Directory to archive
+        archive_path: Path of the archive to create (replaced if it exists)
+        workers: Compression threads (defaults to GlobalConfig 'compress_workers', or the CPU count)
+        progress: Optional callback receiving TransferProgress updates
+        level: Compression level (defaults to each format's own default)
+
+    Returns:
+        The final TransferProgress
+    """
+    count = _workers(workers)
+    compression = (archive_kind(archive_path) or 'tar')[4:]
+    tracker = ProgressTracker(progress)
+    temp_path = _temp_path(archive_path)
+    try:
+        with open(temp_path, 'wb') as raw:
+            if compression == 'gz':
+                out = ParallelGzipWriter(raw, level=level, workers=count)
+            elif compression == 'bz2':
+                out = ParallelStreamWriter(raw, lambda chunk: bz2.compress(chunk, 9 if level is None else level), count,
+                                           chunk_size=_STREAM_CHUNK)
+            elif compression == 'xz':
+                out = ParallelStreamWriter(raw, lambda chunk: lzma.compress(chunk, preset=level), count,
+                                           chunk_size=_STREAM_CHUNK)
+            else:
+                out = raw
+            try:
+                with tarfile.open(fileobj=out, mode='w|') as tf:
+                    for name, path, kind in scan_tree(source_dir):
+                        info = tf.gettarinfo(path, name)
+                        if info is None:
+                            debug_print(f"[pack_tar] Skipping {path}: unsupported file type", level=1)
+                            continue
+                        if info.isreg():
+                            with open(path, 'rb') as f:
+                                tf.addfile(info, f)
+                        else:
+                            tf.addfile(info)
+                        tracker.add(files=1, nbytes=info.size if info.isreg() else 0)
+            finally:
+                if out is not raw:
+                    out.close()
+        _finish(temp_path, archive_path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    return tracker.finish()
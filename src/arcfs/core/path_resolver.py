@@ -7,26 +7,44 @@ Contact: https://github.com/Munger
 License: MIT
 """
 
-from typing import List, Optional, NamedTuple
+from typing import Optional, NamedTuple, Tuple
 import os
+from collections import OrderedDict
 from pathlib import Path
+from threading import Lock
 
 from .utils import is_archive_format
+from .global_config import GlobalConfig
+from .handler_manager import HandlerManager
+
+
+class ArchiveLayer(NamedTuple):
+    """One level of a (possibly nested) archive path."""
+    archive: str  # Physical path for the outermost layer, entry path within the enclosing archive otherwise
+    entry: str    # Entry path within this archive
 
 
 class PathInfo(NamedTuple):
     """Information about a resolved path with archive components."""
     original_path: str
     physical_path: str
-    archive_components: List[str]
-    
+    archive_components: Tuple[str, ...]
+    layers: Tuple[ArchiveLayer, ...] = ()
+
+    @property
+    def is_nested(self) -> bool:
+        """True if the path points inside an archive that is itself stored in an archive."""
+        return len(self.layers) > 1
+
     def get_entry_path(self) -> str:
         """
-        Get the entry path within the archive.
+        Get the entry path within the innermost archive.
         
         Returns:
             Path string relative to the archive root
         """
+        if len(self.layers) > 1:
+            return self.layers[-1].entry
         if not self.archive_components:
             return ""
         return '/'.join(self.archive_components)
@@ -37,8 +55,37 @@ class PathResolver:
     Resolves paths containing archive components.
     Parses paths like 'archive.tar.gz/dir/file.txt' to identify
     the physical path and virtual components within archives.
+
+    Resolved paths are memoized in a bounded LRU cache ('path_cache_size' in GlobalConfig).
+    The cache is dropped whenever a handler is registered or deregistered, since that
+    changes which components are recognised as archives.
     """
-    
+
+    def __init__(self, cache_size: Optional[int] = None):
+        """
+        Initialize the path resolver.
+
+        Args:
+            cache_size: Maximum number of memoized paths (defaults to GlobalConfig 'path_cache_size')
+        """
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[str, PathInfo]" = OrderedDict()
+        self._cache_generation = HandlerManager.get_generation()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_size(self) -> int:
+        if self._cache_size is not None:
+            return self._cache_size
+        return int(GlobalConfig.get('path_cache_size') or 0)
+
+    def clear_cache(self) -> None:
+        """Discard all memoized paths."""
+        with self._lock:
+            self._cache.clear()
+
     def resolve(self, path: str) -> PathInfo:
         """
         Resolve a path containing archive components.
@@ -51,7 +98,32 @@ class PathResolver:
         """
         if not path:
             raise ValueError("Path cannot be empty")
-        
+
+        generation = HandlerManager.get_generation()
+        with self._lock:
+            if generation != self._cache_generation:
+                self._cache.clear()
+                self._cache_generation = generation
+            path_info = self._cache.get(path)
+            if path_info is not None:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return path_info
+            self.misses += 1
+
+        path_info = self._resolve(path)
+
+        cache_size = self.cache_size
+        if cache_size > 0:
+            with self._lock:
+                if generation == self._cache_generation:
+                    self._cache[path] = path_info
+                    while len(self._cache) > cache_size:
+                        self._cache.popitem(last=False)
+        return path_info
+
+    def _resolve(self, path: str) -> PathInfo:
+        """Resolve a path without consulting the cache."""
         # Normalize path separators
         path = path.replace('\\', '/')
         
@@ -66,28 +138,16 @@ class PathResolver:
         if path.startswith('/'):
             physical_path = "/"
         
-        # Build up the path until we find an archive
-        current_path = ""
+        # Find the first component with a recognized archive extension
         found_archive = False
         
         for i, component in enumerate(components):
-            if not component:  # Skip empty components
-                continue
-            
-            # Update the current path
-            if current_path:
-                current_path = f"{current_path}/{component}"
-            else:
-                current_path = component
-            
-            # Only consider a component as an archive if:
-            # 1. It has a recognized archive extension
-            # 2. We haven't already found an archive
-            if not found_archive and is_archive_format(component):
+            if component and is_archive_format(component):
                 # We found the start of archive components
                 archive_start_index = i
-                physical_path = current_path
+                physical_path = '/'.join(c for c in components[:i + 1] if c)
                 found_archive = True
+                break
         
         # If we didn't find an archive, the physical path is the entire path
         if not found_archive:
@@ -101,13 +161,55 @@ class PathResolver:
             physical_path = '/' + physical_path
 
         # Extract archive components
-        archive_components = components[archive_start_index + 1:] if archive_start_index < len(components) else []
+        archive_components = tuple(components[archive_start_index + 1:]) if archive_start_index < len(components) else ()
 
         return PathInfo(
             original_path=path,
             physical_path=physical_path,
-            archive_components=archive_components
+            archive_components=archive_components,
+            layers=self._split_layers(physical_path, archive_components) if found_archive else ()
         )
+
+    @staticmethod
+    def _split_layers(physical_path: str, archive_components: Tuple[str, ...]) -> Tuple[ArchiveLayer, ...]:
+        """
+        Split the components below the outermost archive into nested archive layers.
+        An archive-named component starts a new layer only when further components follow it,
+        so 'outer.tar/inner.zip' still names the inner.zip entry itself.
+        """
+        layers = []
+        archive = physical_path
+        start = 0
+        last = len(archive_components) - 1
+        while last >= 0 and not archive_components[last]:
+            last -= 1
+        for i in range(last):
+            component = archive_components[i]
+            if component and is_archive_format(component):
+                entry = '/'.join(archive_components[start:i + 1])
+                layers.append(ArchiveLayer(archive, entry))
+                archive = entry
+                start = i + 1
+        layers.append(ArchiveLayer(archive, '/'.join(archive_components[start:])))
+        return tuple(layers)
+
+    def as_archive_root(self, path_info: PathInfo) -> Optional[PathInfo]:
+        """
+        Treat a path naming an archive stored inside another archive as that archive's root.
+
+        Args:
+            path_info: Path whose innermost entry is itself an archive (e.g. 'outer.tar/inner.zip')
+
+        Returns:
+            PathInfo with an extra layer for the inner archive, or None if the entry is not an archive
+        """
+        entry = path_info.get_entry_path().rstrip('/')
+        if not path_info.layers or not entry or not is_archive_format(entry.rsplit('/', 1)[-1]):
+            return None
+        return path_info._replace(layers=path_info.layers[:-1] + (
+            ArchiveLayer(path_info.layers[-1].archive, entry),
+            ArchiveLayer(entry, ''),
+        ))
        
     def get_parent_archive(self, path_info: PathInfo) -> Optional[PathInfo]:
         """
@@ -133,7 +235,7 @@ class PathResolver:
         return PathInfo(
             original_path=path_info.physical_path,
             physical_path=physical_path,
-            archive_components=[]
+            archive_components=()
         )
         
     def join(self, base: str, *paths: str) -> str:
@@ -0,0 +1,64 @@
+"""
+Progress reporting for whole-archive operations in the Archive File System.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+# Seconds between progress callbacks (the final one is always delivered)
+PROGRESS_INTERVAL = 0.1
+
+
+class TransferProgress(NamedTuple):
+    """Progress of an extraction or compression, passed to the progress callback."""
+    files_done: int
+    files_total: Optional[int]  # None while the total is not known yet
+    bytes_done: int
+    bytes_total: Optional[int]
+    elapsed: float
+    throughput: float  # Uncompressed bytes processed per second
+
+
+class ProgressTracker:
+    """Thread-safe progress counters that rate-limit the callback."""
+
+    def __init__(self, callback: Optional[Callable[[TransferProgress], None]],
+                 files_total: Optional[int] = None, bytes_total: Optional[int] = None):
+        self.callback = callback
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.files_done = 0
+        self.bytes_done = 0
+        self.start = time.monotonic()
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, files: int = 0, nbytes: int = 0) -> None:
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += nbytes
+            now = time.monotonic()
+            if self.callback is None or now - self._last < PROGRESS_INTERVAL:
+                return
+            self._last = now
+            report = self._report(now)
+        self.callback(report)
+
+    def finish(self) -> TransferProgress:
+        with self._lock:
+            self.files_total = self.files_done
+            self.bytes_total = self.bytes_done
+            report = self._report(time.monotonic())
+        if self.callback is not None:
+            self.callback(report)
+        return report
+
+    def _report(self, now: float) -> TransferProgress:
+        elapsed = now - self.start
+        return TransferProgress(self.files_done, self.files_total, self.bytes_done, self.bytes_total,
+                                elapsed, self.bytes_done / elapsed if elapsed > 0 else 0.0)
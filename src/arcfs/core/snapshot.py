@@ -0,0 +1,263 @@
+"""
+Copy-on-write archive snapshots for transactions in the Archive File System.
+
+A transaction snapshots every archive it may modify as '<archive>.arcfs-snapshot' before
+its body runs. The snapshot is a reflink clone (FICLONE) where the filesystem supports
+it, so it shares the archive's data blocks and costs O(1). Otherwise it is a hardlink to
+the archive; writers that would modify a hardlinked archive in place call detach() first,
+which copies the archive to a new file and renames it over the old name, leaving the
+snapshot holding the original bytes. Writers that rebuild an archive and rename the new
+file into place need no copy at all. Only where neither link type is available is the
+snapshot a full copy.
+
+The transaction journal, '<first archive>.arcfs-txn-journal', lists every archive and the
+process running the transaction. Each archive also gets a pointer file, '<archive>.arcfs-txn', naming the
+journal. The pointers are written before the journal, and the journal is removed to
+commit, so:
+
+- a pointer whose journal exists, written by a process that is no longer running (or by
+  this process, outside a transaction it still has open), means the transaction did not
+  finish, and recover() renames every snapshot listed in the journal back over its archive;
+- a pointer whose journal is gone means the transaction committed (or never began), and
+  recover() only removes the leftover snapshot and pointer.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import json
+import os
+import shutil
+import sys
+from typing import Dict, List, Optional, Set
+
+from arcfs.core.append_journal import _fsync_dir, _remove
+from arcfs.core.logging import debug_print
+
+SNAPSHOT_SUFFIX = '.arcfs-snapshot'
+POINTER_SUFFIX = '.arcfs-txn'
+JOURNAL_SUFFIX = '.arcfs-txn-journal'
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+# Journals of the transactions open in this process
+_active: Set[str] = set()
+
+
+def snapshot_path(archive_path: str) -> str:
+    """Path of the snapshot kept next to an archive during a transaction."""
+    return archive_path + SNAPSHOT_SUFFIX
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Clone src to dst sharing its data blocks; False if the filesystem cannot."""
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+    except OSError:
+        _remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _write_json(path: str, record: Dict) -> None:
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _fsync_dir(path)
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        # Journal files are replaced atomically, so this one was never completely written
+        debug_print(f"[Snapshot] Ignoring unreadable file {path}: {e}", level=1)
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name != 'posix':
+        # Without psutil there is no safe probe; never roll back another process's work
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def take(archive_path: str) -> str:
+    """
+    Snapshot an archive as a reflink, a hardlink or, failing both, a copy.
+
+    Args:
+        archive_path: Path to the archive
+
+    Returns:
+        Path of the snapshot
+    """
+    path = snapshot_path(archive_path)
+    _remove(path)
+    if _reflink(archive_path, path):
+        debug_print(f"[Snapshot] Reflinked {archive_path}", level=2)
+        return path
+    try:
+        os.link(archive_path, path)
+        debug_print(f"[Snapshot] Hardlinked {archive_path}", level=2)
+        return path
+    except OSError:
+        pass
+    debug_print(f"[Snapshot] Copying {archive_path}: no reflink or hardlink support", level=1)
+    shutil.copy2(archive_path, path)
+    return path
+
+
+def detach(archive_path: str, copy: bool = True) -> None:
+    """
+    Give an archive that shares its inode with a snapshot a file of its own before it is
+    written. Does nothing when the archive has no hardlinked snapshot.
+
+    Args:
+        archive_path: Path to the archive about to be written
+        copy: Keep the current contents (for in-place updates); False when the archive is
+            about to be overwritten from scratch and only needs to be unlinked
+    """
+    path = snapshot_path(archive_path)
+    try:
+        if not os.path.samefile(archive_path, path):
+            return
+    except OSError:
+        return
+    if not copy:
+        os.remove(archive_path)
+        return
+    debug_print(f"[Snapshot] Copying {archive_path} before writing it in place", level=2)
+    temp_path = f"{archive_path}.{os.getpid()}.detach"
+    try:
+        shutil.copy2(archive_path, temp_path)
+        os.replace(temp_path, archive_path)
+    finally:
+        _remove(temp_path)
+
+
+def recover(archive_path: str) -> bool:
+    """
+    Finish a transaction that was interrupted while it covered the archive.
+
+    Args:
+        archive_path: Path to the archive
+
+    Returns:
+        True if the archive was rolled back
+    """
+    pointer = _read_json(archive_path + POINTER_SUFFIX)
+    if pointer is None:
+        if not os.path.exists(archive_path + POINTER_SUFFIX):
+            return False
+        _remove(snapshot_path(archive_path))
+        _remove(archive_path + POINTER_SUFFIX)
+        return False
+    journal_file = pointer.get('journal', '')
+    if journal_file in _active:
+        return False
+    journal = _read_json(journal_file)
+    if journal is not None and journal.get('pid') != os.getpid() and _pid_alive(journal.get('pid', 0)):
+        # Still running in another process
+        return False
+    if journal is None:
+        # Committed, or interrupted before it began: the archive is current
+        _remove(snapshot_path(archive_path))
+        _remove(archive_path + POINTER_SUFFIX)
+        return False
+    debug_print(f"[Snapshot] Rolling back interrupted transaction {pointer['journal']}", level=1)
+    TransactionJournal(journal['archives'], pointer['journal']).rollback()
+    return True
+
+
+class TransactionJournal:
+    """
+    Snapshots and journal guarding one transaction over a set of archives.
+
+    Usage:
+        journal = TransactionJournal(archive_paths)
+        journal.begin()
+        try:
+            ... modify the archives ...
+        except Exception:
+            journal.rollback()
+            raise
+        journal.commit()
+    """
+
+    def __init__(self, archive_paths: List[str], path: Optional[str] = None):
+        """
+        Initialize the journal.
+
+        Args:
+            archive_paths: Physical paths of existing archives the transaction may modify
+            path: Journal path (defaults to one next to the first archive)
+        """
+        self.archive_paths = list(dict.fromkeys(os.path.abspath(p) for p in archive_paths))
+        if path is None and self.archive_paths:
+            path = self.archive_paths[0] + JOURNAL_SUFFIX
+        self.path = path
+
+    def begin(self) -> None:
+        """Snapshot every archive and record the transaction on disk."""
+        if not self.archive_paths:
+            return
+        for archive_path in self.archive_paths:
+            recover(archive_path)
+        for archive_path in self.archive_paths:
+            take(archive_path)
+            # A pointer without its journal means "nothing to undo", so it can come first
+            _write_json(archive_path + POINTER_SUFFIX, {'journal': self.path})
+        _write_json(self.path, {'archives': self.archive_paths, 'pid': os.getpid()})
+        _active.add(self.path)
+
+    def commit(self) -> None:
+        """Keep the changes: dropping the journal is the commit point."""
+        if not self.archive_paths:
+            return
+        _active.discard(self.path)
+        os.remove(self.path)
+        _fsync_dir(self.path)
+        self._cleanup()
+
+    def rollback(self) -> None:
+        """Rename every snapshot back over its archive, then drop the journal."""
+        if not self.archive_paths:
+            return
+        _active.discard(self.path)
+        for archive_path in self.archive_paths:
+            path = snapshot_path(archive_path)
+            # Renames already done by an earlier, interrupted rollback have no snapshot left
+            if os.path.exists(path):
+                os.replace(path, archive_path)
+                _fsync_dir(archive_path)
+        _remove(self.path)
+        _fsync_dir(self.path)
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        for archive_path in self.archive_paths:
+            _remove(snapshot_path(archive_path))
+            _remove(archive_path + POINTER_SUFFIX)
@@ -0,0 +1,194 @@
+"""
+Metadata cache for archive entries in the Archive File System.
+
+fs.files.exists(), is_file(), is_dir() and get_info() on a path inside an archive would
+otherwise lease a handler and look the entry up on every call. StatCache remembers the
+answer, including "no such entry", keyed by the archive's path and the entry's path
+within it. Each cached answer also records the archive's stat fingerprint (device,
+inode, mtime, size), so an archive changed on disk is never answered from the cache;
+writes made through ArchiveFS drop the archive's entries explicitly, and entries expire
+after a time-to-live as a guard against filesystems with coarse modification times.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.logging import debug_print
+
+# Returned by lookup() when the cache holds no valid answer
+MISS = object()
+
+
+def fingerprint(path: str) -> Tuple[int, int, int, int]:
+    """
+    Stat fingerprint of a physical archive.
+
+    Args:
+        path: Path to the archive on disk
+
+    Returns:
+        Tuple of (st_dev, st_ino, st_mtime_ns, st_size)
+
+    Raises:
+        FileNotFoundError: If the archive does not exist
+    """
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _normalize(entry: str) -> str:
+    return '/'.join(p for p in entry.replace('\\', '/').split('/') if p not in ('', '.'))
+
+
+class StatCache:
+    """
+    Bounded LRU cache of entry metadata for archives, with negative entries.
+
+    A cached value is the entry's info dictionary, or None for an entry known not to exist.
+    Entries are dropped once 'stat_cache_size' is exceeded (least recently used first),
+    once they are older than 'stat_cache_ttl' seconds, or when invalidate() is called for
+    their archive.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached entries (defaults to GlobalConfig 'stat_cache_size')
+            ttl: Seconds an entry stays valid (defaults to GlobalConfig 'stat_cache_ttl')
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self._by_path: Dict[str, Set[Hashable]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return int(GlobalConfig.get('stat_cache_size') or 0)
+
+    @property
+    def ttl(self) -> Optional[float]:
+        if self._ttl is not None:
+            return self._ttl
+        return GlobalConfig.get('stat_cache_ttl')
+
+    @staticmethod
+    def make_key(archive_path: str, members: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Build the cache key for an entry.
+
+        Args:
+            archive_path: Physical path of the outermost archive
+            members: Entry path in each archive layer, outermost first
+
+        Returns:
+            Hashable key
+        """
+        return (os.path.abspath(archive_path), tuple(_normalize(m) for m in members))
+
+    def lookup(self, key: Tuple[str, Tuple[str, ...]], stamp: Tuple[int, ...]) -> Any:
+        """
+        Look up an entry.
+
+        Args:
+            key: Key from make_key()
+            stamp: Current fingerprint() of the archive
+
+        Returns:
+            The cached info (None for a missing entry), or MISS
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                cached_stamp, info, expires = cached
+                if cached_stamp == stamp and time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    if info is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return info
+                self._drop(key)
+            self.misses += 1
+            return MISS
+
+    def store(self, key: Tuple[str, Tuple[str, ...]], stamp: Tuple[int, ...], info: Optional[Dict[str, Any]]) -> None:
+        """
+        Remember an entry's info, or None if it does not exist.
+
+        Args:
+            key: Key from make_key()
+            stamp: Fingerprint of the archive the info was read from
+            info: Entry info, or None
+        """
+        max_entries = self.max_entries
+        if max_entries <= 0:
+            return
+        ttl = self.ttl
+        expires = time.monotonic() + ttl if ttl is not None else float('inf')
+        with self._lock:
+            self._entries[key] = (stamp, info, expires)
+            self._entries.move_to_end(key)
+            self._by_path.setdefault(key[0], set()).add(key)
+            while len(self._entries) > max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, archive_path: Optional[str] = None) -> None:
+        """
+        Drop the cached entries of an archive, or every entry if archive_path is None.
+
+        Args:
+            archive_path: Physical archive path
+        """
+        with self._lock:
+            if archive_path is None:
+                self._entries.clear()
+                self._by_path.clear()
+                return
+            keys = self._by_path.pop(os.path.abspath(archive_path), ())
+            if keys:
+                debug_print(f"[StatCache] Dropping {len(keys)} cached entries of {archive_path}", level=2)
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return cache counters.
+
+        Returns:
+            Dictionary with the entry count, hits, negative hits and misses
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Internal helpers (caller holds the lock) ---
+    def _drop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[key[0]]
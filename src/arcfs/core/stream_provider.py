@@ -15,35 +15,159 @@ from contextlib import contextmanager
 from .path_resolver import PathInfo
 from .utils import is_archive_format
 from .archive_handlers import get_handler_for_path, ArchiveHandler
+from .handler_pool import HandlerPool
+from .stat_cache import MISS, StatCache, fingerprint
+from . import snapshot
+from arcfs.core.logging import debug_print
 from arcfs.api.config_api import ConfigAPI
 from arcfs.api.dirs_api import DirsAPI
 
 
+def is_read_only_mode(mode: str) -> bool:
+    """Return True if mode never modifies the target."""
+    return not any(m in mode for m in ('w', 'a', 'x', '+'))
+
+
+class CommitOnCloseStream:
+    """
+    Wrapper for entry streams opened in a write mode.
+    The owning handler is closed (and therefore commits its changes to the archive)
+    only when the stream itself is closed, not when the handler context exits.
+    """
+
+    def __init__(self, stream: Any, handler: ArchiveHandler, on_close=None):
+        self._stream = stream
+        self._handler = handler
+        self._on_close = on_close
+        self._committed = False
+
+    def close(self) -> None:
+        if self._committed:
+            return
+        self._committed = True
+        try:
+            # Make the data visible to the handler before it commits
+            try:
+                self._stream.flush()
+            except (AttributeError, ValueError):
+                pass
+            self._handler.close()
+        finally:
+            try:
+                self._stream.close()
+            finally:
+                if self._on_close is not None:
+                    self._on_close()
+
+    @property
+    def closed(self) -> bool:
+        return self._committed
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class StreamProvider:
     """
     Provides appropriate streams for different types of paths.
     Handles the creation of file objects for regular files, archive entries, and compressed files.
+    Read-only archive handlers are kept in a HandlerPool and reused across calls.
+    While a BatchSession is active, write handlers are held by the session instead of being
+    committed each time, and reads of archives the session has written to go through them.
     """
-    
-    def __init__(self):
-        """Initialize the stream provider."""
-        self._opened_archives: Dict[str, ArchiveHandler] = {}
-    
+
+    def __init__(self, archive_fs=None):
+        """
+        Initialize the stream provider.
+
+        Args:
+            archive_fs: Owning ArchiveFS instance, passed to handlers as their 'fs'
+        """
+        self._archive_fs = archive_fs
+        self._pool = HandlerPool()
+        self._stat_cache = StatCache()
+        self._batch = None
+
+    @property
+    def fs(self):
+        """ArchiveFS instance handed to archive handlers (created on demand when standalone)."""
+        if self._archive_fs is None:
+            from arcfs.arcfs import ArchiveFS
+            self._archive_fs = ArchiveFS()
+        return self._archive_fs
+
+    @property
+    def pool(self) -> HandlerPool:
+        """The handler pool backing read-only archive access."""
+        return self._pool
+
+    @property
+    def stat_cache(self) -> StatCache:
+        """The entry metadata cache used by exists(), is_file(), is_dir() and get_info()."""
+        return self._stat_cache
+
+    def begin_batch(self, session) -> None:
+        """
+        Route archive writes through a batch session until end_batch().
+
+        Args:
+            session: The BatchSession to activate
+
+        Raises:
+            RuntimeError: If another session is already active
+        """
+        if self._batch is not None and self._batch is not session:
+            raise RuntimeError("A batch session is already active on this ArchiveFS")
+        self._batch = session
+
+    def end_batch(self, session) -> None:
+        """
+        Stop routing archive writes through a batch session.
+
+        Args:
+            session: The BatchSession ending
+        """
+        if self._batch is session:
+            self._batch = None
+
+    def in_batch(self, archive_path: str) -> bool:
+        """
+        Check whether the active batch session holds a handler for an archive.
+        Such an archive may not exist on disk until the session commits.
+
+        Args:
+            archive_path: Physical path of the archive
+
+        Returns:
+            True if the archive has uncommitted changes in the active session
+        """
+        batch = self._batch
+        return batch is not None and batch.held(archive_path) is not None
+
     def get_stream(self, path_info: PathInfo, mode: str, encoding: str = 'utf-8') -> Union[BinaryIO, TextIO]:
         """
         Get an appropriate stream for the given path info and mode.
-        
+
         Args:
             path_info: Resolved path information
             mode: File mode ('r', 'w', 'a', 'rb', 'wb', etc.)
             encoding: Text encoding to use (for text modes)
-            
+
         Returns:
             A file-like object appropriate for the path type
         """
         # Determine if we're dealing with text or binary mode
         is_binary = 'b' in mode
-        
+
         # If there are no archive components, it's a regular file
         if not path_info.archive_components:
             physical_path = path_info.physical_path
@@ -53,69 +177,281 @@ class StreamProvider:
                     DirsAPI().mkdir(parent_dir, create_parents=True)
             handler_cls = get_handler_for_path(physical_path)
             if handler_cls and os.path.exists(physical_path) and not is_archive_format(physical_path):
-                with handler_cls(physical_path, mode) as handler:
+                with self._new_handler(handler_cls, physical_path, mode) as handler:
                     binary_stream = handler.open_entry("", mode)
                     return binary_stream if is_binary else io.TextIOWrapper(binary_stream, encoding=encoding)
+            if not is_read_only_mode(mode):
+                # Writing through the path would also change a transaction's hardlinked snapshot
+                snapshot.detach(physical_path, copy='a' in mode or '+' in mode)
             if is_binary:
                 return open(physical_path, mode)
             return open(physical_path, mode, encoding=encoding)
-        
+
         # We're dealing with an archive entry
         try:
-            with self.get_archive_handler(path_info, mode) as handler:
-                entry_path = path_info.get_entry_path()
-                handler_mode = mode
-                if not is_binary:
-                    mode_map = {'r': 'rb', 'w': 'wb', 'a': 'ab'}
-                    handler_mode = next((v for k, v in mode_map.items() if k in mode), None)
-                    if handler_mode is None:
-                        debug_print(f"Unsupported mode: {mode}", level=1)
-                        raise ValueError(f"Unsupported mode: {mode}")
-                binary_stream = handler.open_entry(entry_path, handler_mode)
-                return binary_stream if is_binary else io.TextIOWrapper(binary_stream, encoding=encoding)
+            handler_mode = mode
+            if not is_binary:
+                mode_map = {'r': 'rb', 'w': 'wb', 'a': 'ab'}
+                handler_mode = next((v for k, v in mode_map.items() if k in mode), None)
+                if handler_mode is None:
+                    debug_print(f"Unsupported mode: {mode}", level=1)
+                    raise ValueError(f"Unsupported mode: {mode}")
+            binary_stream = self.open_entry(path_info, handler_mode)
+            if is_binary:
+                return binary_stream
+            text_stream = io.TextIOWrapper(binary_stream, encoding=encoding)
+            batch = self._batch
+            if batch is not None and not is_read_only_mode(handler_mode):
+                # The session must close what the caller holds, or text still buffered is lost
+                batch.track_stream(text_stream, replaces=binary_stream)
+            return text_stream
+        except NotImplementedError:
+            raise
         except Exception as e:
             debug_print(f"Exception in StreamProvider.get_stream: {e}", level=1)
             raise IOError(f"Error accessing archive entry: {e}")
-    
+
+    def open_entry(self, path_info: PathInfo, mode: str = 'r') -> BinaryIO:
+        """
+        Open an archive entry and return its stream.
+
+        Read-only streams come from a pooled handler and remain valid after this call returns.
+        Stored entries are served as zero-copy windows over the archive file where the handler supports it.
+        Write streams own a dedicated handler that commits when the stream is closed.
+
+        Args:
+            path_info: Resolved path of the entry
+            mode: Entry access mode
+
+        Returns:
+            File-like object for the entry
+        """
+        entry_path = path_info.get_entry_path()
+        batch = self._batch
+        if batch is not None and not path_info.is_nested:
+            # Inside a batch the session's handler sees the changes staged so far
+            handler = batch.held(path_info.physical_path)
+            if handler is not None or not is_read_only_mode(mode):
+                if handler is None:
+                    handler = batch.hold(path_info.physical_path, lambda: self._open_handler(path_info, mode))
+                stream = handler.open_entry(entry_path, mode)
+                if not is_read_only_mode(mode):
+                    batch.track_stream(stream)
+                return stream
+        if is_read_only_mode(mode):
+            with self.get_archive_handler(path_info, mode) as handler:
+                stream = handler.get_entry_window(entry_path) if path_info.is_nested else None
+                if stream is None:
+                    stream = handler.open_entry(entry_path, mode)
+                self._pool.track_stream(handler, stream)
+                return stream
+        archive_path = path_info.physical_path
+        handler = self._open_handler(path_info, mode)
+        try:
+            stream = handler.open_entry(entry_path, mode)
+        except Exception:
+            handler.close()
+            self.invalidate(archive_path)
+            raise
+        return CommitOnCloseStream(stream, handler, on_close=lambda: self.invalidate(archive_path))
+
+    def entry_info(self, path_info: PathInfo) -> Optional[Dict[str, Any]]:
+        """
+        Get the info of an entry inside an archive, through the stat cache.
+
+        Answers, negative ones included, are served from the cache while the archive's
+        fingerprint is unchanged. Archives with uncommitted changes in the active batch
+        session are always looked up, since their staged entries are not on disk yet.
+
+        Args:
+            path_info: Resolved path of the entry
+
+        Returns:
+            A copy of the entry info, or None if there is no such entry
+
+        Raises:
+            FileNotFoundError: If the archive does not exist
+        """
+        archive_path = path_info.physical_path
+        entry_path = path_info.get_entry_path()
+        if self.in_batch(archive_path):
+            with self.get_archive_handler(path_info, 'r') as handler:
+                return handler.get_entry_info(entry_path)
+        stamp = fingerprint(archive_path)
+        key = self._stat_cache.make_key(archive_path, tuple(layer.entry for layer in path_info.layers) or (entry_path,))
+        info = self._stat_cache.lookup(key, stamp)
+        if info is MISS:
+            with self.get_archive_handler(path_info, 'r') as handler:
+                info = handler.get_entry_info(entry_path) or None
+            self._stat_cache.store(key, stamp, info)
+        # Callers may modify the returned dictionary
+        return dict(info) if info is not None else None
+
+    def track_stream(self, handler: ArchiveHandler, stream: Any) -> None:
+        """
+        Keep a pooled handler open while a stream opened from it is in use.
+
+        Args:
+            handler: Handler obtained from get_archive_handler()
+            stream: Stream returned by the handler
+        """
+        self._pool.track_stream(handler, stream)
+
+    def invalidate(self, archive_path: Optional[str] = None) -> None:
+        """
+        Drop pooled handlers and cached metadata for an archive (or all archives) after a change.
+
+        Args:
+            archive_path: Physical archive path, or None for every archive
+        """
+        self._pool.invalidate(archive_path)
+        self._stat_cache.invalidate(archive_path)
+
+    def close(self) -> None:
+        """Close every pooled handler."""
+        self._pool.close_all()
+
     @contextmanager
     def get_archive_handler(self, path_info: PathInfo, mode: str = 'r') -> ArchiveHandler:
         """
         Get a handler for an archive.
-        
+
+        Read-only handlers are leased from the handler pool and stay open after the
+        context exits; handlers for write modes are created fresh and closed (committed) on exit.
+
         Args:
             path_info: Path information for the archive
             mode: Access mode for the archive
-            
+
         Returns:
             An archive handler appropriate for the archive type
-            
+
         Raises:
             ValueError: If no handler is available for the archive type
             FileNotFoundError: If the archive doesn't exist in read mode
         """
-        # Get the physical path to the archive
         archive_path = path_info.physical_path
-        
+        if path_info.is_nested:
+            if not is_read_only_mode(mode):
+                raise NotImplementedError(f"Writing to archives nested inside other archives is not supported: {path_info.original_path}")
+            handlers = self._acquire_chain(path_info)
+            try:
+                yield handlers[-1]
+            finally:
+                for handler in reversed(handlers):
+                    self._pool.release(handler)
+            return
+        batch = self._batch
+        if batch is not None:
+            handler = batch.held(archive_path)
+            if handler is None and not is_read_only_mode(mode):
+                handler = batch.hold(archive_path, lambda: self._open_handler(path_info, mode))
+            if handler is not None:
+                # Committed when the session ends
+                yield handler
+                return
+        if is_read_only_mode(mode) and os.path.exists(archive_path):
+            handler_cls = self._handler_cls(archive_path)
+            handler = self._pool.acquire(archive_path, lambda: self._instantiate(handler_cls, archive_path, 'r'))
+            try:
+                yield handler
+            finally:
+                self._pool.release(handler)
+            return
+
+        handler = self._open_handler(path_info, mode)
+        try:
+            yield handler
+        finally:
+            try:
+                handler.close()
+            finally:
+                self.invalidate(archive_path)
+
+    def _acquire_chain(self, path_info: PathInfo) -> list:
+        """
+        Lease the handlers for every layer of a nested archive path, outermost first.
+
+        Each inner archive is opened directly on its member stream in the enclosing archive:
+        a zero-copy window when the member is stored, the handler's entry stream otherwise.
+        Inner handlers are pooled under the outer archive's key plus their entry path, so they
+        are reused until the physical archive changes.
+        """
+        archive_path = path_info.physical_path
+        if not os.path.exists(archive_path):
+            raise FileNotFoundError(f"Archive does not exist: {archive_path}")
+        handler_cls = self._handler_cls(archive_path)
+        handlers = [self._pool.acquire(archive_path, lambda: self._instantiate(handler_cls, archive_path, 'r'))]
+        member = ()
+        try:
+            for outer_layer, layer in zip(path_info.layers, path_info.layers[1:]):
+                member = member + (layer.archive,)
+                outer = handlers[-1]
+                handlers.append(self._pool.acquire(
+                    archive_path,
+                    lambda: self._open_nested(outer, outer_layer.entry, layer.archive),
+                    member=member))
+        except Exception:
+            for handler in reversed(handlers):
+                self._pool.release(handler)
+            raise
+        return handlers
+
+    def _open_nested(self, outer: ArchiveHandler, entry: str, name: str) -> ArchiveHandler:
+        """Open the archive stored as entry in outer, without extracting it."""
+        handler_cls = self._handler_cls(name)
+        if not handler_cls.supports_fileobj:
+            raise NotImplementedError(f"{handler_cls.__name__} cannot open archives nested inside other archives: {name}")
+        if not outer.entry_exists(entry):
+            raise FileNotFoundError(f"Nested archive not found: {entry}")
+        stream = outer.get_entry_window(entry)
+        if stream is None:
+            stream = outer.open_entry(entry, 'rb')
+        try:
+            handler = handler_cls(name, 'r', fs=self.fs, fileobj=stream)
+        except Exception:
+            stream.close()
+            raise
+        # The inner handler reads through the outer one, which must stay open as long as it does
+        self._pool.track_stream(outer, stream)
+        return handler
+
+    def _open_handler(self, path_info: PathInfo, mode: str) -> ArchiveHandler:
+        """Create a dedicated (unpooled) handler, creating the archive's parent directory if needed."""
+        archive_path = path_info.physical_path
+        if path_info.is_nested:
+            raise NotImplementedError(f"Writing to archives nested inside other archives is not supported: {path_info.original_path}")
+
         # Determine the appropriate mode based on the existence of the archive
-        handler_mode = mode
         if not os.path.exists(archive_path) and path_info.archive_components:
-            if 'r' in mode and not any(m in mode for m in ('w', 'a', 'x', '+')):
+            if is_read_only_mode(mode):
                 raise FileNotFoundError(f"Archive does not exist: {archive_path}")
-            handler_mode = handler_mode.replace('r', 'w') if 'r' in handler_mode and not any(m in handler_mode for m in ('w', 'a', 'x', '+')) else handler_mode
             parent_dir = os.path.dirname(archive_path)
             if parent_dir:
                 DirsAPI().mkdir(parent_dir, create_parents=True)
-        
+        handler_mode = 'r' if is_read_only_mode(mode) else 'a'
+
+        # Pooled handlers must not see the archive change underneath them
+        if handler_mode != 'r':
+            self.invalidate(archive_path)
+        return self._instantiate(self._handler_cls(archive_path), archive_path, handler_mode)
+
+    @contextmanager
+    def _new_handler(self, handler_cls: type, path: str, mode: str):
+        handler = self._instantiate(handler_cls, path, mode)
+        try:
+            yield handler
+        finally:
+            handler.close()
+
+    @staticmethod
+    def _handler_cls(archive_path: str) -> type:
         # Get the appropriate handler class for the archive
         handler_cls = get_handler_for_path(archive_path)
         if not handler_cls:
-            from arcfs.core.logging import debug_print
             debug_print(f"No handler available for archive: {archive_path}", level=1)
             raise ValueError(f"No handler available for archive: {archive_path}")
-        
-        # Create and yield the handler
-        handler = handler_cls(archive_path, handler_mode)
-        try:
-            yield handler
-        finally:
-            handler.close()
\ No newline at end of file
+        return handler_cls
+
+    def _instantiate(self, handler_cls: type, archive_path: str, mode: str) -> ArchiveHandler:
+        return handler_cls(archive_path, mode, fs=self.fs)
@@ -9,8 +9,11 @@ Contact: https://github.com/Munger
 License: MIT
 """
 
+import hashlib
 import os
-from typing import Dict, List, Set
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from arcfs.core.handler_manager import HandlerManager
 
 # Archive format extensions
 _ARCHIVE_FORMATS: Set[str] = {
@@ -46,6 +49,70 @@ _MIME_TYPES: Dict[str, str] = {
 }
 
 
+class SuffixMatcher:
+    """
+    Precompiled case-insensitive suffix matcher for archive extensions.
+    Suffixes are bucketed by length, so a lookup costs one dict probe per distinct
+    extension length (longest first) instead of one endswith() per extension.
+    """
+
+    def __init__(self, suffixes: Iterable[str]):
+        """
+        Compile the matcher.
+
+        Args:
+            suffixes: Extensions to match (with leading dot)
+        """
+        buckets: Dict[int, Set[str]] = {}
+        for suffix in suffixes:
+            suffix = suffix.lower()
+            if suffix:
+                buckets.setdefault(len(suffix), set()).add(suffix)
+        self._buckets = [(length, frozenset(buckets[length])) for length in sorted(buckets, reverse=True)]
+        self.suffixes = frozenset(s for _, bucket in self._buckets for s in bucket)
+
+    def match(self, name: str) -> str:
+        """
+        Return the longest matching suffix of name, or an empty string.
+
+        Args:
+            name: Path or filename to check
+
+        Returns:
+            Matching extension (lowercase, with leading dot) or empty string
+        """
+        if not name:
+            return ""
+        lower_name = name.lower()
+        name_len = len(lower_name)
+        for length, bucket in self._buckets:
+            if length <= name_len and lower_name[-length:] in bucket:
+                return lower_name[-length:]
+        return ""
+
+
+_archive_matcher: Optional[SuffixMatcher] = None
+_archive_matcher_generation = -1
+
+
+def get_archive_matcher() -> SuffixMatcher:
+    """
+    Get the matcher for all archive extensions: the built-in formats plus every registered handler.
+    Rebuilt automatically when a handler registers or deregisters.
+
+    Returns:
+        Compiled SuffixMatcher
+    """
+    global _archive_matcher, _archive_matcher_generation
+    generation = HandlerManager.get_generation()
+    matcher = _archive_matcher
+    if matcher is None or _archive_matcher_generation != generation:
+        matcher = SuffixMatcher(_ARCHIVE_FORMATS | set(HandlerManager.get_supported_formats()))
+        _archive_matcher = matcher
+        _archive_matcher_generation = generation
+    return matcher
+
+
 def is_archive_format(path: str) -> bool:
     """
     Determine if a path represents an archive format.
@@ -56,19 +123,7 @@ def is_archive_format(path: str) -> bool:
     Returns:
         True if the path has an archive extension
     """
-    # If path is empty, it's not an archive
-    if not path:
-        return False
-        
-    # Get the lowercase path for case-insensitive comparison
-    lower_path = path.lower()
-    
-    # Check for compound extensions first (like .tar.gz)
-    for ext in sorted(_ARCHIVE_FORMATS, key=len, reverse=True):
-        if lower_path.endswith(ext):
-            return True
-            
-    return False
+    return bool(get_archive_matcher().match(path))
 
 
 def get_archive_format(path: str) -> str:
@@ -81,19 +136,7 @@ def get_archive_format(path: str) -> str:
     Returns:
         Archive extension (including leading dot) or empty string if not an archive
     """
-    # If path is empty, it's not an archive
-    if not path:
-        return ""
-        
-    # Get the lowercase path for case-insensitive comparison
-    lower_path = path.lower()
-    
-    # Check for compound extensions first (like .tar.gz)
-    for ext in sorted(_ARCHIVE_FORMATS, key=len, reverse=True):
-        if lower_path.endswith(ext):
-            return ext
-            
-    return ""
+    return get_archive_matcher().match(path)
 
 
 def get_mime_type(path: str) -> str:
@@ -200,4 +243,74 @@ def is_same_filesystem(path1: str, path2: str) -> bool:
         from arcfs.core.logging import debug_print
         debug_print(f"Exception in is_same_filesystem: {e}", level=1, exc=e)
         # If either path doesn't exist, assume different filesystems
-        return False
\ No newline at end of file
+        return False
+
+def file_fingerprint(path: str, head_size: int = 64 * 1024) -> Dict[str, Any]:
+    """
+    Identify the current contents of a file cheaply, for validating cached metadata.
+
+    Combines size, modification time and inode with a hash of the first head_size bytes,
+    which catches files replaced by a same-sized copy with a preserved modification time.
+
+    Args:
+        path: Path to the file
+        head_size: Number of leading bytes to hash
+
+    Returns:
+        Dictionary with 'size', 'mtime_ns', 'inode' and 'head' keys
+    """
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        head = hashlib.sha1(f.read(head_size)).hexdigest()
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'inode': st.st_ino, 'head': head}
+
+
+def copy_range(src_fd: int, dst_fd: int, offset: int, count: int, dst_offset: int) -> None:
+    """
+    Copy a byte range between two file descriptors without passing it through Python.
+
+    Uses os.copy_file_range where available (which can share extents on filesystems that
+    support it), then os.sendfile, and falls back to a plain read/write loop.
+
+    Args:
+        src_fd: Source file descriptor
+        dst_fd: Destination file descriptor
+        offset: Start of the range in the source
+        count: Number of bytes to copy
+        dst_offset: Position in the destination to copy to
+    """
+    end = offset + count
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < end:
+                copied = os.copy_file_range(src_fd, dst_fd, end - offset, offset, dst_offset)
+                if copied == 0:
+                    break
+                offset += copied
+                dst_offset += copied
+        except OSError:
+            # Cross-device copies and some filesystems are not supported; try the next method
+            pass
+    if offset < end and hasattr(os, 'sendfile'):
+        try:
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            while offset < end:
+                sent = os.sendfile(dst_fd, src_fd, offset, end - offset)
+                if sent == 0:
+                    break
+                offset += sent
+                dst_offset += sent
+        except OSError:
+            pass
+    if offset < end:
+        os.lseek(src_fd, offset, os.SEEK_SET)
+        os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+    while offset < end:
+        chunk = os.read(src_fd, min(end - offset, 1024 * 1024))
+        if not chunk:
+            raise EOFError(f"Unexpected end of file copying range at offset {offset}")
+        view = memoryview(chunk)
+        while view:
+            written = os.write(dst_fd, view)
+            view = view[written:]
+        offset += len(chunk)
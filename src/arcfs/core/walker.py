@@ -0,0 +1,220 @@
+"""
+Parallel directory walking for the Archive File System.
+
+fs.dirs.walk() over a physical directory reports every ZIP and TAR archive it meets as a
+directory and walks its contents too. Listing an archive means parsing a central
+directory or decompressing a whole tar stream, and on a network filesystem even listing
+a directory waits on the server, so the walker does this work on a pool of threads:
+directories are scanned and archives listed ahead of the caller, in the order the caller
+will reach them, while every step is still yielded in one deterministic order (top-down,
+names sorted). The number of archives open at once and the memory held by listings
+scanned ahead of the caller are both bounded.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.logging import debug_print
+from arcfs.core.packing import archive_kind
+
+# Approximate memory held by one scanned name, in bytes
+_NAME_SIZE = 100
+# Scans queued ahead of the caller per worker thread
+_LOOKAHEAD = 4
+
+WalkStep = Tuple[str, List[str], List[str]]
+
+
+def _workers(workers: Optional[int]) -> int:
+    if workers is None:
+        workers = GlobalConfig.get('walk_workers') or min(32, (os.cpu_count() or 1) + 4)
+    return max(1, int(workers))
+
+
+def _scan_dir(path: str) -> Tuple[List[str], List[str], List[Tuple[str, bool]]]:
+    """
+    List one physical directory.
+
+    Returns:
+        (dirs, files, descend): sorted names, with archives among the dirs, and the
+        (name, is_archive) children to walk into, in order. Symlinked directories are
+        listed but not walked into, as os.walk does by default.
+    """
+    dirs, files, descend = [], [], []
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            dirs.append(entry.name)
+            if not entry.is_symlink():
+                descend.append((entry.name, False))
+        elif archive_kind(entry.name) is not None and entry.is_file():
+            dirs.append(entry.name)
+            descend.append((entry.name, True))
+        else:
+            files.append(entry.name)
+    return dirs, files, descend
+
+
+class _Task:
+    """A directory or archive the walk will reach, with its scan once submitted."""
+    __slots__ = ('path', 'archive', 'future', 'size')
+
+    def __init__(self, path: str, archive: bool):
+        self.path = path
+        self.archive = archive
+        self.future: Optional[Future] = None
+        self.size = 0
+
+
+class _TreeWalker:
+    """State of one walk: the pending tasks, the worker pool and the memory held ahead."""
+
+    def __init__(self, open_archive: Callable[[str], ContextManager[Any]], workers: int,
+                 max_open_archives: int, max_memory: int,
+                 onerror: Optional[Callable[[Exception], None]]):
+        self._open_archive = open_archive
+        self._workers = workers
+        self._archive_slots = threading.BoundedSemaphore(max(1, max_open_archives))
+        self._max_memory = max_memory
+        self._onerror = onerror
+        self._lock = threading.Lock()
+        self._held = 0
+        self._outstanding = 0
+
+    def _list_archive(self, path: str) -> Dict[str, Tuple[List[str], List[str]]]:
+        """Every directory of an archive, keyed by its path within the archive."""
+        with self._archive_slots, self._open_archive(path) as handler:
+            tree = handler.directory_tree()
+            steps = tree.walk('') if tree is not None else handler.walk('')
+            return {root: (dirs, files) for root, dirs, files in steps}
+
+    def _run(self, task: _Task) -> Any:
+        result = self._list_archive(task.path) if task.archive else _scan_dir(task.path)
+        if task.archive:
+            names = sum(len(dirs) + len(files) + 1 for dirs, files in result.values())
+        else:
+            names = len(result[0]) + len(result[1])
+        task.size = names * _NAME_SIZE
+        with self._lock:
+            self._held += task.size
+        return result
+
+    def _submit_ahead(self, executor: ThreadPoolExecutor, stack: List[_Task]) -> None:
+        """Queue scans for the tasks the caller reaches next, within the lookahead and memory limits."""
+        window = self._workers * _LOOKAHEAD
+        for task in reversed(stack):
+            with self._lock:
+                if self._outstanding >= window or self._held >= self._max_memory:
+                    return
+            if task.future is None:
+                task.future = executor.submit(self._run, task)
+                with self._lock:
+                    self._outstanding += 1
+
+    def _result(self, task: _Task) -> Any:
+        if task.future is None:
+            # Nothing was queued for it (the memory limit was reached), so scan it here
+            return self._run(task)
+        try:
+            return task.future.result()
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+
+    def _release(self, task: _Task) -> None:
+        with self._lock:
+            self._held -= task.size
+        task.size = 0
+
+    def _failed(self, task: _Task, error: Exception) -> None:
+        if self._onerror is not None:
+            self._onerror(error)
+        else:
+            debug_print(f"[walk] Skipping {task.path}: {error}", level=1)
+
+    def walk(self, top: str) -> Iterator[WalkStep]:
+        stack = [_Task(top, False)]
+        executor = ThreadPoolExecutor(self._workers)
+        try:
+            while stack:
+                self._submit_ahead(executor, stack)
+                task = stack.pop()
+                try:
+                    result = self._result(task)
+                except Exception as e:
+                    # Unreadable directories are skipped as os.walk skips them; so are broken archives
+                    if not task.archive and not isinstance(e, OSError):
+                        raise
+                    self._failed(task, e)
+                    continue
+                try:
+                    if task.archive:
+                        yield from _walk_listing(task.path, result)
+                        continue
+                    dirs, files, descend = result
+                    yield task.path, dirs, files
+                finally:
+                    self._release(task)
+                # Names the caller removed from dirs are not walked into
+                keep = set(dirs)
+                stack.extend(_Task(os.path.join(task.path, name), is_archive)
+                             for name, is_archive in reversed(descend) if name in keep)
+        finally:
+            # Scans the caller will never reach are dropped (cancel_futures needs Python 3.9)
+            for task in stack:
+                if task.future is not None:
+                    task.future.cancel()
+            executor.shutdown(wait=True)
+
+
+def _walk_listing(root: str, listing: Dict[str, Tuple[List[str], List[str]]]) -> Iterator[WalkStep]:
+    """Yield an archive's directories top-down; removing names from 'dirs' skips them."""
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        dirs, files = listing.get(rel, ([], []))
+        yield (os.path.join(root, rel) if rel else root), dirs, files
+        stack.extend(f"{rel}/{name}" if rel else name for name in reversed(dirs))
+
+
+def walk_tree(top: str, open_archive: Callable[[str], ContextManager[Any]],
+              workers: Optional[int] = None, max_open_archives: Optional[int] = None,
+              max_memory: Optional[int] = None,
+              onerror: Optional[Callable[[Exception], None]] = None) -> Iterator[WalkStep]:
+    """
+    Walk a physical directory tree top-down, walking into ZIP and TAR archives as directories.
+
+    Directory scans and archive listings run on a thread pool ahead of the caller; the
+    steps are yielded in order, each directory before its contents and names sorted.
+    Removing names from 'dirs' skips them, as with os.walk.
+
+    Args:
+        top: Physical directory to walk
+        open_archive: Callable returning a context manager that yields a read handler for an archive path
+        workers: Scanning threads (defaults to GlobalConfig 'walk_workers')
+        max_open_archives: Archives listed at once (defaults to GlobalConfig 'walk_max_open_archives')
+        max_memory: Bytes of listings held ahead of the caller (defaults to GlobalConfig 'walk_max_memory')
+        onerror: Called with the exception when a directory or archive cannot be read;
+                 by default it is logged and skipped
+
+    Returns:
+        Generator yielding (root, dirs, files) tuples
+    """
+    if max_open_archives is None:
+        max_open_archives = GlobalConfig.get('walk_max_open_archives') or 1
+    if max_memory is None:
+        max_memory = GlobalConfig.get('walk_max_memory')
+    walker = _TreeWalker(open_archive, _workers(workers), int(max_open_archives), int(max_memory), onerror)
+    return walker.walk(top)
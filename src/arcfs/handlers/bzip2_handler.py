@@ -8,91 +8,30 @@ License: MIT
 """
 
 import bz2
-from os import SEEK_SET
+import shutil
 
 from typing import Dict, List, Optional, BinaryIO, Any, Set
 
-from arcfs.api.config_api import ConfigAPI
-from arcfs.core.base_handler import ArchiveHandler, Any
+from arcfs.core.base_handler import ArchiveHandler, ArchiveEntry
+from arcfs.core.compressed_stream import COPY_CHUNK, CompressedFileStream
+from arcfs.core.utils import get_base_name
 
-class Bzip2Stream:
+
+class Bzip2Stream(CompressedFileStream):
     """
     Stream wrapper for BZIP2 files.
     Provides a file-like interface for reading and writing BZIP2 compressed files.
-    All file operations are performed via the ARCFS file API and are agnostic to how files are buffered or stored.
+    Reads decompress chunk by chunk from the file; writes are compressed on close.
     """
-    def __init__(self, path: str, mode: str, buffer_threshold: Optional[int] = None, handler=None):
-        self.path = path
-        self.mode = mode
-        self.handler = handler
-        # Use config or config API for buffer threshold
-        if buffer_threshold is not None:
-            self._buffer_threshold = buffer_threshold
-        else:
-            try:
-                self._buffer_threshold = getattr(ConfigAPI, 'get_buffer_threshold', lambda: 64*1024)()
-            except Exception:
-                self._buffer_threshold = 64 * 1024
-        self._closed = False
-        self._write_mode = 'w' in mode or 'a' in mode
-        if not self._write_mode:
-            try:
-                bz2_mode = mode if 'b' in mode else mode + 'b'
-                with bz2.open(path, bz2_mode) as f:
-                    data = f.read()
-                # Use handler.fs.files for buffer management
-                self._buffer = self.handler.fs.files.open(path=None, mode='r+b', buffering=-1, encoding=None)
-                self._buffer.write(data)
-                self._buffer.seek(0)
-            except Exception as e:
-                raise IOError(f"Error opening BZIP2 file: {e}")
-        else:
-            # Use handler.fs.files for buffer management
-            self._buffer = self.handler.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=None)
-
-    def write(self, b):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.write(b)
-
-    def read(self, size=-1):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.read(size)
-
-    def seek(self, offset, whence=SEEK_SET):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.seek(offset, whence)
-
-    def tell(self):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.tell()
-
-    @property
-    def closed(self):
-        return self._closed
-
-    def close(self):
-        if self._closed:
-            return
-        if self._write_mode:
-            # Write buffer to file
-            try:
-                with self.fs.files.open(path=self.path, mode='wb', buffering=-1, encoding=None) as f:
-                    f.write(self._buffer.read())
-            except Exception as e:
-                raise IOError(f"Error writing to BZIP2 file: {e}")
-        self._buffer.close()
-        self._closed = True
+    format_name = 'BZIP2'
 
-    # Context manager support
-    def __enter__(self):
-        return self
+    def _open_reader(self) -> BinaryIO:
+        return bz2.open(self.path, 'rb')
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+    def _write_compressed(self, source: BinaryIO, target: str, append: bool) -> None:
+        # Appending adds a new BZIP2 stream, which readers concatenate
+        with bz2.open(target, 'ab' if append else 'wb') as f:
+            shutil.copyfileobj(source, f, COPY_CHUNK)
 
 
 class Bzip2Config:
@@ -118,20 +57,11 @@ class Bzip2Config:
 
 
 class Bzip2Handler(ArchiveHandler):
-    config = Bzip2Config
-
-    def __init__(self, path: str, mode: str = 'r', fs=None):
-        if fs is None:
-            raise ValueError("Bzip2Handler requires an ArchiveFS instance via the 'fs' argument.")
-        self.fs = fs
-        self.path = path
-        self.mode = mode
-        self.base_name = get_base_name(self.fs.dirs.basename(path))
-        self._open()
     """
     Handler for BZIP2 compressed files, treating them as single-file archives.
     """
-    
+    config = Bzip2Config
+
     def __init__(self, path: str, mode: str = 'r', fs=None):
         """
         Initialize the BZIP2 handler.
@@ -146,9 +76,42 @@ class Bzip2Handler(ArchiveHandler):
         self.fs = fs
         self.path = path
         self.mode = mode
-        self.base_name = get_base_name(self.fs.dirs.basename(path))
+        self.base_name = get_base_name(path)
         self._open()
-    
+
+    # --- Entry interface for ArchiveHandler ---
+    def list_entries(self) -> List[ArchiveEntry]:
+        return [ArchiveEntry(path=m['path'], size=m['size'], modified=m['modified'], is_dir=False)
+                for m in self.list_files()]
+
+    def open_entry(self, path: str, mode: str = 'r') -> BinaryIO:
+        return self.open_file(path, mode)
+
+    def get_entry_info(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.get_file_info(path)
+
+    def entry_exists(self, path: str) -> bool:
+        return self.file_exists(path)
+
+    def remove_entry(self, path: str) -> None:
+        return self.remove_file(path)
+
+    # --- Legacy stream interface ---
+    def stream_exists(self, arc_path: str) -> bool:
+        return self.file_exists(arc_path)
+
+    def get_stream_info(self, arc_path: str):
+        return self.get_file_info(arc_path)
+
+    def list_streams(self):
+        return self.list_files()
+
+    def open_stream(self, arc_path: str, mode: str = 'r'):
+        return self.open_file(arc_path, mode)
+
+    def remove_stream(self, arc_path: str):
+        return self.remove_file(arc_path)
+
     def _open(self) -> None:
         """Open the BZIP2 file."""
         # For BZIP2 files, we don't need to keep the file open
@@ -160,12 +123,12 @@ class Bzip2Handler(ArchiveHandler):
         # Nothing to do for BZIP2 files
         pass
     
-    def list_streams(self) -> List[Any]:
+    def list_files(self) -> List[Dict[str, Any]]:
         """
         List all streams in the BZIP2.
         
         Returns:
-            List of Any objects
+            List of dictionaries with stream information
         """
         # BZIP2 files only have one stream
         if not self.fs.files.exists(self.path):
@@ -176,12 +139,12 @@ class Bzip2Handler(ArchiveHandler):
             stat = self.fs.files.stat(self.path)
             
             # Create stream object for the single file
-            stream = Any(
-                path=self.base_name,
-                size=stat.st_size,  # Compressed size, not original size
-                modified=stat.st_mtime,
-                is_dir=False
-            )
+            stream = {
+                'path': self.base_name,
+                'size': stat.st_size,  # Compressed size, not original size
+                'modified': stat.st_mtime,
+                'is_dir': False
+            }
             
             return [stream]
         except Exception as e:
@@ -206,7 +169,7 @@ class Bzip2Handler(ArchiveHandler):
             return [self.base_name]
         return []
     
-    def open_stream(self, path: str, mode: str = 'r') -> BinaryIO:
+    def open_file(self, path: str, mode: str = 'r') -> BinaryIO:
         """
         Open an stream for reading or writing.
         
@@ -222,9 +185,9 @@ class Bzip2Handler(ArchiveHandler):
             raise FileNotFoundError(f"Stream not found in BZIP2: {path}")
             
         # Open the BZIP2 file
-        return Bzip2Stream(self.path, mode, handler=self, fs=self.fs)
+        return Bzip2Stream(self.path, mode, handler=self)
     
-    def get_stream_info(self, path: str) -> Optional[Dict[str, Any]]:
+    def get_file_info(self, path: str) -> Optional[Dict[str, Any]]:
         """
         Get information about an stream.
         
@@ -265,7 +228,7 @@ class Bzip2Handler(ArchiveHandler):
         except Exception as e:
             raise IOError(f"Error getting BZIP2 stream info: {e}")
     
-    def stream_exists(self, path: str) -> bool:
+    def file_exists(self, path: str) -> bool:
         """
         Check if an stream exists in the BZIP2.
         
@@ -292,7 +255,7 @@ class Bzip2Handler(ArchiveHandler):
         # BZIP2 files don't support directories
         raise NotImplementedError("BZIP2 files do not support directories")
     
-    def remove_stream(self, path: str) -> None:
+    def remove_file(self, path: str) -> None:
         """
         Remove an stream from the BZIP2.
         
@@ -337,12 +300,6 @@ class Bzip2Handler(ArchiveHandler):
             Set of supported extensions (with leading dot)
         """
         return {'.bz2'}
-        if self._buffer_size is not None:
-            return self._buffer_size
-        try:
-            return getattr(ConfigAPI, 'get_buffer_threshold', lambda: 64*1024)()
-        except Exception:
-            return 64 * 1024
 
     def __getitem__(self, key):
         return getattr(self, key)
@@ -9,100 +9,37 @@ License: MIT
 
 import io
 import gzip
-import tempfile
+import shutil
 
 from typing import Dict, List, Optional, BinaryIO, Any, Set
 
-from arcfs.api.config_api import ConfigAPI
-from arcfs.core.base_handler import ArchiveHandler
+from arcfs.core.base_handler import ArchiveHandler, ArchiveEntry
+from arcfs.core.compressed_stream import COPY_CHUNK, CompressedFileStream
+from arcfs.core.gzip_index import IndexedGzipReader
+from arcfs.core.parallel_deflate import ParallelGzipWriter
+from arcfs.core.utils import get_base_name
 
-class GzipStream:
+
+class GzipStream(CompressedFileStream):
     """
     Stream wrapper for GZIP files.
     Provides a file-like interface for reading and writing GZIP compressed files.
-    All file operations are performed via the ARCFS file API and are agnostic to how files are buffered or stored.
+    Reads decompress on demand through a seek checkpoint index; writes are compressed in parallel on close.
     """
-    def __init__(self, path: str, mode: str, buffer_threshold: Optional[int] = None):
-        """
-        Initialize the GZIP stream.
-
-        Args:
-            path: Path to the GZIP file
-            mode: Access mode
-            buffer_threshold: Optional in-memory buffer threshold (overrides global default)
-        """
-        self.path = path
-        self.mode = mode
-        # Use config or config API for buffer threshold
-        if buffer_threshold is not None:
-            self._buffer_threshold = buffer_threshold
-        else:
-            try:
-                self._buffer_threshold = getattr(ConfigAPI, 'get_buffer_threshold', lambda: 64*1024)()
-            except Exception:
-                self._buffer_threshold = 64 * 1024
-        self._closed = False
-        self._write_mode = 'w' in mode or 'a' in mode
-        if not self._write_mode:
-            try:
-                gzip_mode = mode if 'b' in mode else mode + 'b'
-                with gzip.open(path, gzip_mode) as f:
-                    data = f.read()
-                # Use a temporary file for buffer operations, as per ARCFS handler rules
-                self._buffer = self.handler.fs.files.open(path=None, mode='r+b', buffering=-1, encoding=None)
-                self._buffer.write(data)
-                self._buffer.seek(0)
-            except Exception as e:
-                raise IOError(f"Exception in GzipHandler: Error opening GZIP file: {e}")
-        else:
-            # Use a hybrid buffer for writing
-            self._buffer = self.handler.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=None)
-
-    def write(self, b):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.write(b)
-
-    def read(self, size=-1):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        self._buffer.seek(0)
-        return self._buffer.read(size)
-
-    def seek(self, offset, whence=io.SEEK_SET):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.seek(offset, whence)
-
-    def tell(self):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.tell()
-
-    @property
-    def closed(self):
-        return self._closed
-
-    def close(self):
-        if self._closed:
-            return
-        if self._write_mode:
-            # Write member_stream to file
-            try:
-                self._buffer.seek(0)
-                with gzip.open(self.path, 'wb') as f:
-                    f.write(self._buffer.read())
-            except Exception as e:
-                raise IOError(f"Exception in GzipHandler: Error writing to GZIP file: {e}")
-        self._buffer.close()
-        self._closed = True
+    format_name = 'GZIP'
 
-    # Context manager support
-    def __enter__(self):
-        return self
+    def _open_reader(self) -> BinaryIO:
+        # Seeks resume from the nearest index checkpoint instead of byte 0
+        return io.BufferedReader(IndexedGzipReader(self.path))
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+    def _write_compressed(self, source: BinaryIO, target: str, append: bool) -> None:
+        # Appending adds a new gzip member, which readers concatenate
+        with open(target, 'ab' if append else 'wb') as raw, ParallelGzipWriter(
+                raw,
+                level=GzipConfig.get('gzip_compress_level'),
+                workers=GzipConfig.get('gzip_compress_workers'),
+                block_size=GzipConfig.get('gzip_compress_block_size')) as f:
+            shutil.copyfileobj(source, f, COPY_CHUNK)
 
 
 class GzipConfig:
@@ -128,9 +65,46 @@ class GzipConfig:
 
 
 class GzipHandler(ArchiveHandler):
+    """
+    Handler for GZIP compressed files, treating them as single-file archives.
+    """
     config = GzipConfig
 
-    # --- Required abstract methods for ArchiveHandler ---
+    def __init__(self, path: str, mode: str = 'r', fs=None):
+        """
+        Initialize the GZIP handler.
+
+        Args:
+            path: Path to the GZIP file
+            mode: Access mode
+            fs: ArchiveFS instance (required)
+        """
+        if fs is None:
+            raise ValueError("GzipHandler requires an ArchiveFS instance via the 'fs' argument.")
+        self.fs = fs
+        self.path = path
+        self.mode = mode
+        self.base_name = get_base_name(path)
+        self._open()
+
+    # --- Entry interface for ArchiveHandler ---
+    def list_entries(self) -> List[ArchiveEntry]:
+        return [ArchiveEntry(path=m['path'], size=m['size'], modified=m['modified'], is_dir=False)
+                for m in self.list_files()]
+
+    def open_entry(self, path: str, mode: str = 'r') -> BinaryIO:
+        return self.open_file(path, mode)
+
+    def get_entry_info(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.get_file_info(path)
+
+    def entry_exists(self, path: str) -> bool:
+        return self.file_exists(path)
+
+    def remove_entry(self, path: str) -> None:
+        return self.remove_file(path)
+
+    # --- Legacy stream interface ---
     def stream_exists(self, arc_path: str) -> bool:
         return self.file_exists(arc_path)
 
@@ -146,31 +120,6 @@ class GzipHandler(ArchiveHandler):
     def remove_stream(self, arc_path: str):
         return self.remove_file(arc_path)
 
-    def __init__(self, path: str, mode: str = 'r', fs=None):
-        if fs is None:
-            raise ValueError("GzipHandler requires an ArchiveFS instance via the 'fs' argument.")
-        self.fs = fs
-        self.path = path
-        self.mode = mode
-        self.base_name = self.fs.dirs.basename(path)
-        self._open()
-    """
-    Handler for GZIP compressed files, treating them as single-file archives.
-    """
-    
-    def __init__(self, path: str, mode: str = 'r'):
-        """
-        Initialize the GZIP handler.
-        
-        Args:
-            path: Path to the GZIP file
-            mode: Access mode
-        """
-        self.path = path
-        self.mode = mode
-        self.base_name = self.fs.dirs.basename(path)
-        self._open()
-    
     def _open(self) -> None:
         """Open the GZIP file."""
         # For GZIP files, we don't need to keep the file open
@@ -244,7 +193,7 @@ class GzipHandler(ArchiveHandler):
             raise FileNotFoundError(f"File not found in GZIP: {path}")
             
         # Open the GZIP file
-        return GzipStream(self.path, mode)
+        return GzipStream(self.path, mode, handler=self)
     
     def get_file_info(self, path: str) -> Optional[Dict[str, Any]]:
         """
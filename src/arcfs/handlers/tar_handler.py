@@ -8,12 +8,14 @@ License: MIT
 """
 
 import io
+import os
+import shutil
 import tarfile
 import tempfile
 
 import time
 import platform
-from typing import Dict, List, Optional, BinaryIO, Any, Set
+from typing import Dict, List, Optional, BinaryIO, Any, Set, Tuple
 from datetime import datetime
 
 
@@ -44,8 +46,159 @@ def get_tar_compression(ext: str) -> str:
     return ''
 
 from arcfs.api.config_api import ConfigAPI
-from arcfs.core.base_handler import ArchiveHandler
+from arcfs.core import append_journal, snapshot
+from arcfs.core.archive_tree import ArchiveTree
+from arcfs.core.base_handler import ArchiveHandler, ArchiveEntry
+from arcfs.core.file_window import FileWindow
+from arcfs.core.gzip_index import GzipCheckpoint, GzipIndex, IndexedGzipReader
+from arcfs.core.listing_index import ListingIndex
 from arcfs.core.logging import debug_print
+from arcfs.core.parallel_deflate import ParallelGzipWriter
+
+# Read-ahead over the decompressed stream of a .tar.gz
+_GZIP_READ_BUFFER = 256 * 1024
+# Name of the entry that blanks out a member deleted in place from an uncompressed TAR
+_TOMBSTONE_NAME = '.arcfs-deleted'
+# Largest zero-filled tail after the end-of-archive marker an in-place update will replace
+_MAX_TAIL = 1024 * 1024
+# Leading bytes of compressed streams, which tarfile's 'r' mode opens transparently
+_COMPRESSED_MAGIC = (b'\x1f\x8b', b'BZh', b'\xfd7zXZ\x00')
+# Chunk size when copying staged data into the archive
+_COPY_CHUNK = 1024 * 1024
+# Gzip member holding only the end-of-archive blocks of a segmented .tar.gz. It is kept as a
+# fixed byte string so it can be recognised (and cut off) at the end of the file.
+_EOF_SEGMENT = bytes.fromhex('1f8b08000000000002ff63601805a360148c5400002eafb5ef00040000')
+_EOF_SIZE = 2 * tarfile.BLOCKSIZE
+
+
+def _staged_size(buffer: Any) -> int:
+    """Size of a staged member buffer, from the buffer itself rather than by reading it."""
+    if hasattr(buffer, 'size'):
+        return buffer.size()
+    return buffer.seek(0, io.SEEK_END)
+
+
+def _members_end(members: List[tarfile.TarInfo]) -> int:
+    """Offset just past the last member's data, where the end-of-archive blocks start."""
+    if not members:
+        return 0
+    last = max(members, key=lambda m: m.offset)
+    data = -(-last.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE if last.isreg() else 0
+    return last.offset_data + data
+
+
+def _add_member(out_tar: tarfile.TarFile, info: tarfile.TarInfo, fileobj: Any = None, base: int = 0) -> None:
+    """
+    Add a member to out_tar and record where it landed in the tar stream, as a scan would.
+
+    Args:
+        out_tar: TarFile being written
+        info: Member header
+        fileobj: Member data, if any
+        base: Offset of out_tar's first byte within the whole tar stream
+    """
+    start = out_tar.offset
+    out_tar.addfile(info, fileobj)
+    added = out_tar.members[-1]
+    data = -(-added.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE if fileobj is not None else 0
+    added.offset = base + start
+    added.offset_data = base + out_tar.offset - data
+
+
+def _extend_gzip_index(index: GzipIndex, segment_start: int, eof_offset: int,
+                       appended: int, new_eof_offset: int) -> None:
+    """
+    Update a .tar.gz seek index after a segment was appended in place of its end member.
+
+    Args:
+        index: Index of the archive before the append
+        segment_start: Uncompressed offset where the end-of-archive blocks started
+        eof_offset: Compressed offset of the old end member, where the new segment starts
+        appended: Uncompressed length of the new segment
+        new_eof_offset: Compressed offset of the new end member
+    """
+    index.truncate(segment_start)
+    index.add(GzipCheckpoint(segment_start, eof_offset, GzipCheckpoint.MEMBER))
+    index.add(GzipCheckpoint(segment_start + appended, new_eof_offset, GzipCheckpoint.MEMBER))
+    index.size = segment_start + appended + _EOF_SIZE
+
+
+def _tombstone_header(extent: int) -> bytes:
+    """Header that turns a member's whole extent (headers and data) into one inert entry."""
+    info = tarfile.TarInfo(_TOMBSTONE_NAME)
+    info.size = extent - tarfile.BLOCKSIZE
+    info.mtime = int(time.time())
+    info.mode = 0o600
+    return info.tobuf(tarfile.GNU_FORMAT)
+
+
+def _touch_header(header: bytes, mtime: int) -> bytes:
+    """Set the modification time in a raw ustar header block and recompute its checksum."""
+    block = bytearray(header)
+    block[136:148] = b'%011o\0' % mtime
+    block[148:156] = b' ' * 8
+    block[148:156] = b'%06o\0 ' % sum(block)
+    return bytes(block)
+
+
+class _SegmentWriter(tarfile.TarFile):
+    """
+    TarFile that writes members only. close() leaves out the end-of-archive blocks, which a
+    segmented .tar.gz keeps in a gzip member of their own so later segments go before them.
+    Only for use with an external fileobj.
+    """
+
+    def close(self):
+        self.closed = True
+
+
+class _StagedView(io.RawIOBase):
+    """
+    Stream over a staged member's buffer, as returned by open_member().
+    Closing it leaves the buffer open: the handler still reads it when it commits.
+    """
+
+    def __init__(self, buffer: Any):
+        super().__init__()
+        self._buffer = buffer
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def _check(self):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+    def read(self, size: int = -1):
+        self._check()
+        return self._buffer.read(size)
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def write(self, b):
+        self._check()
+        return self._buffer.write(b)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        self._check()
+        return self._buffer.seek(offset, whence)
+
+    def tell(self):
+        self._check()
+        return self._buffer.tell()
+
+    def flush(self):
+        if not self.closed:
+            self._buffer.flush()
 
 
 class TarStream:
@@ -141,6 +294,9 @@ class TarConfig:
 
 class TarHandler(ArchiveHandler):
     config = TarConfig
+    supports_fileobj = True
+    # Member streams share the tarfile and its (possibly compressed) reader
+    thread_safe = False
 
     # Implement required abstract methods with correct names/signatures
     def entry_exists(self, path: str) -> bool:
@@ -158,23 +314,22 @@ class TarHandler(ArchiveHandler):
     def list_entries(self) -> list:
         # Return a list of ArchiveEntry for all members in the archive
         entries = []
-        if self.tar_file:
-            for member in self.tar_file.getmembers():
-                entries.append(
-                    ArchiveEntry(
-                        path=member.name,
-                        size=member.size,
-                        modified=member.mtime,
-                        is_dir=member.isdir()
-                    )
+        for member in self._live_members():
+            entries.append(
+                ArchiveEntry(
+                    path=member.name,
+                    size=member.size,
+                    modified=member.mtime,
+                    is_dir=member.isdir()
                 )
+            )
         # Add staged files not yet in tar_file
         for arc_path, buf in self.staged_files.items():
             if arc_path not in self.deleted_files:
                 entries.append(
                     ArchiveEntry(
                         path=arc_path,
-                        size=buf.getbuffer().nbytes if hasattr(buf, 'getbuffer') else 0,
+                        size=_staged_size(buf),
                         modified=int(time.time()),
                         is_dir=False
                     )
@@ -185,6 +340,18 @@ class TarHandler(ArchiveHandler):
 
 
 
+    def memory_usage(self) -> int:
+        """Approximate memory held by the loaded member headers, in bytes."""
+        if self._tar_file is None and self._listing is None:
+            return 0
+        members = self._listing.members if self._listing is not None else self._tar_file.members
+        usage = len(members) * 512
+        if self._tree is not None:
+            usage += self._tree.memory_usage()
+        if self._gzip_reader is not None:
+            usage += self._gzip_reader.index.memory_usage()
+        return usage
+
     # --- Required abstract methods for ArchiveHandler ---
     def stream_exists(self, arc_path: str) -> bool:
         return self.member_exists(arc_path)
@@ -194,7 +361,7 @@ class TarHandler(ArchiveHandler):
         if not self.member_exists(arc_path):
             return None
         try:
-            member = self.tar_file.getmember(arc_path)
+            member = self._find_member(arc_path)
             return {
                 'size': member.size,
                 'modified': member.mtime,
@@ -217,7 +384,7 @@ class TarHandler(ArchiveHandler):
     """
     Robust TAR handler for ARCFS. All writes go to a temp dir, and the archive is only rebuilt on commit/close.
     """
-    def __init__(self, path: str, mode: str = 'r', fs=None):
+    def __init__(self, path: str, mode: str = 'r', fs=None, fileobj=None):
         """
         Initialize the TAR handler.
 
@@ -225,17 +392,33 @@ class TarHandler(ArchiveHandler):
             path: Path to the TAR file
             mode: Access mode
             fs: ArchiveFS instance (required)
+            fileobj: Optional seekable stream holding the TAR (read mode only); closed with the handler
         """
         if fs is None:
             raise ValueError("TarHandler requires an ArchiveFS instance via the 'fs' argument.")
+        if fileobj is not None and mode != 'r':
+            raise ValueError("TarHandler can only read TAR archives opened from a stream.")
         self.fs = fs
         self.path = path
         self.mode = mode
+        self.fileobj = fileobj
+        self._source = None
+        self._gzip_reader: Optional[IndexedGzipReader] = None
+        self._members: Optional[Dict[str, tarfile.TarInfo]] = None
+        self._data_index: Optional[Dict[str, Tuple[int, int]]] = None
+        self._listing: Optional[ListingIndex] = None
+        self._tree: Optional[ArchiveTree] = None
+        self._mtime: Optional[float] = None
         self.tar_file = None
         self.temp_dir = self.fs.dirs.mkdtemp()
         self.staged_files: Dict[str, str] = {}   # archive_path -> temp_path
         self.deleted_files: Set[str] = set()
         self.modified = False
+        self._compact = False
+        if fileobj is None:
+            # Roll back an in-place update or transaction that was interrupted before it completed
+            snapshot.recover(path)
+            append_journal.recover(path)
         self._open_archive()
 
     # --- Required abstract methods for ArchiveHandler ---
@@ -249,28 +432,148 @@ class TarHandler(ArchiveHandler):
         self.modified = True
 
     def member_exists(self, arc_path: str) -> bool:
-        if arc_path in self.deleted_files:
-            return False
-        if arc_path in self.staged_files and self.fs.files.exists(self.staged_files[arc_path]):
-            return True
-        if self.tar_file:
-            try:
-                self.tar_file.getmember(arc_path)
-                return True
-            except KeyError:
-                return False
-        return False
+        return self.directory_tree().find(arc_path) is not None
+
+    def directory_tree(self) -> ArchiveTree:
+        """
+        Directory tree of the archive with this session's staged writes and deletions
+        applied, built from one pass over the member listing on first use.
+        """
+        if self._tree is None:
+            tree = ArchiveTree()
+            for member in self._live_members():
+                tree.add(member.name, is_dir=member.isdir(), member=member)
+            for arc_path in self.deleted_files:
+                tree.remove(arc_path)
+            for arc_path in self.staged_files:
+                tree.add(arc_path, staged=True)
+            self._tree = tree
+        return self._tree
+
+    # --- Member index ---
+    def _build_index(self) -> None:
+        """
+        Scan the member headers once and index them by name.
+        For regular, non-sparse members the data offset and size are kept separately,
+        so reads from an uncompressed TAR can go straight to the archive file.
+        """
+        members: Dict[str, tarfile.TarInfo] = {}
+        data_index: Dict[str, Tuple[int, int]] = {}
+        for member in self._live_members():
+            # Later members win, as with tarfile.getmember()
+            members[member.name] = member
+            if member.isreg() and not member.issparse():
+                data_index[member.name] = (member.offset_data, member.size)
+            else:
+                data_index.pop(member.name, None)
+        self._members = members
+        self._data_index = data_index
+
+    def _live_members(self) -> List[tarfile.TarInfo]:
+        """
+        Members of the archive, without the tombstones left by in-place deletions.
+        Served from the saved listing when there is one; otherwise the first call scans
+        the archive and, with 'tar_listing_index' enabled, saves the listing for next time.
+        """
+        if self._listing is not None:
+            return self._listing.members
+        if not self.tar_file:
+            return []
+        members = [m for m in self.tar_file.getmembers() if m.name != _TOMBSTONE_NAME]
+        gzip_index = self._gzip_reader.index if self._gzip_reader is not None else None
+        self._listing = self._save_listing(members, gzip_index)
+        return members
+
+    def _save_listing(self, members: List[tarfile.TarInfo],
+                      gzip_index: Optional[GzipIndex] = None) -> Optional[ListingIndex]:
+        """
+        Save the member listing next to the archive, if 'tar_listing_index' is enabled.
+
+        Args:
+            members: Members of the archive as it now is on disk
+            gzip_index: Seek checkpoints of a .tar.gz to save along with the listing
+
+        Returns:
+            The saved ListingIndex, or None if none was saved
+        """
+        if not TarConfig.get('tar_listing_index') or self.fileobj is not None:
+            return None
+        try:
+            listing = ListingIndex.for_file(self.path, members, gzip_index)
+            listing.save(self.path)
+            return listing
+        except OSError as e:
+            # The listing only saves work later; an unwritable directory is not an error
+            debug_print(f"[TarHandler] Could not save listing for {self.path}: {e}", level=1)
+            return None
+
+    def _find_member(self, arc_path: str) -> Optional[tarfile.TarInfo]:
+        if self._members is None:
+            self._build_index()
+        return self._members.get(arc_path.rstrip('/'))
+
+    def get_member_offset(self, arc_path: str) -> Optional[Tuple[int, int]]:
+        """
+        Get the location of a regular member's data within the TAR stream.
+
+        Args:
+            arc_path: Member path within the TAR
+
+        Returns:
+            Tuple of (offset_data, size), or None for directories, links, sparse or missing members
+        """
+        if self._data_index is None:
+            self._build_index()
+        return self._data_index.get(arc_path.rstrip('/'))
 
     def get_member_info(self, arc_path: str):
-        if not self.member_exists(arc_path):
+        node = self.directory_tree().find(arc_path)
+        if node is None:
             raise FileNotFoundError(f"Member not found in TAR: {arc_path}")
-        # Return a minimal info dict for compatibility
-        return {'name': arc_path}
+        return self._node_info(node, arc_path)
+
+    def _node_info(self, node, arc_path: str) -> Dict[str, Any]:
+        if node.staged:
+            # Staged and not yet committed
+            return {'name': arc_path, 'path': arc_path, 'size': _staged_size(self.staged_files[arc_path]),
+                    'modified': int(time.time()), 'is_dir': False}
+        if node.member is None:
+            # A directory implied by the members below it
+            if self._mtime is None:
+                self._mtime = os.path.getmtime(self.path) if self.fileobj is None and os.path.exists(self.path) else time.time()
+            return {'name': arc_path, 'path': arc_path, 'size': 0, 'modified': self._mtime, 'is_dir': True}
+        return {'name': arc_path, 'path': arc_path, 'size': node.member.size, 'modified': node.member.mtime,
+                'is_dir': node.is_dir}
 
     def list_streams(self, dir_path: str = "") -> list:
         return self.list_dir(dir_path)
 
+    @property
+    def tar_file(self) -> Optional[tarfile.TarFile]:
+        """The archive opened for reading; deferred to first use when the members come from a saved listing."""
+        if self._tar_deferred:
+            self._tar_deferred = False
+            self._open_tar()
+        return self._tar_file
+
+    @tar_file.setter
+    def tar_file(self, value: Optional[tarfile.TarFile]) -> None:
+        self._tar_deferred = False
+        self._tar_file = value
+
     def _open_archive(self):
+        self._listing = None
+        self._tree = None
+        if self.fileobj is None and TarConfig.get('tar_listing_index') and self.fs.files.exists(self.path):
+            self._listing = ListingIndex.load(self.path)
+        if self._listing is not None:
+            # Listing and stat are answered from the saved listing; the archive is only opened to read data
+            self.tar_file = None
+            self._tar_deferred = True
+            return
+        self._open_tar()
+
+    def _open_tar(self):
         # Open the archive for reading (never writing directly)
         compression = ''
         ext = get_archive_format(self.path)
@@ -280,38 +583,88 @@ class TarHandler(ArchiveHandler):
             compression = ':bz2'
         elif ext.endswith('.xz') or ext.endswith('.txz'):
             compression = ':xz'
-        if self.fs.files.exists(self.path):
+        if compression == ':gz' and (self.fileobj is not None or self.fs.files.exists(self.path)):
+            # Decompress through a checkpoint index, so member reads after the header scan
+            # resume near their data instead of inflating the archive from the start
+            gzip_index = self._listing.gzip_index if self._listing is not None else None
+            self._gzip_reader = IndexedGzipReader(self.fileobj if self.fileobj is not None else self.path,
+                                                  index=gzip_index)
+            buffered = io.BufferedReader(self._gzip_reader, _GZIP_READ_BUFFER)
+            self.tar_file = tarfile.open(fileobj=buffered, mode='r:')
+        elif self.fileobj is not None:
+            self.tar_file = tarfile.open(fileobj=self.fileobj, mode='r' + compression)
+        elif self.fs.files.exists(self.path):
             self.tar_file = tarfile.open(self.path, 'r' + compression)
         else:
             self.tar_file = None
 
+    def get_entry_window(self, arc_path: str):
+        """
+        Return a zero-copy window over a member of an uncompressed TAR.
+
+        Args:
+            arc_path: Member path within the TAR
+
+        Returns:
+            FileWindow over the member data, or None if it cannot be served in place
+        """
+        if get_tar_compression(get_archive_format(self.path)):
+            return None
+        if self._listing is None and not self.tar_file:
+            return None
+        if arc_path in self.staged_files or arc_path in self.deleted_files:
+            return None
+        location = self.get_member_offset(arc_path)
+        if location is None:
+            return None
+        if self._source is None:
+            if self.fileobj is None:
+                self._source = FileWindow.from_path(self.path)
+            elif isinstance(self.fileobj, FileWindow):
+                self._source = self.fileobj.subwindow(0)
+            else:
+                return None
+        offset_data, size = location
+        return self._source.subwindow(offset_data, size)
+
     def open_member(self, arc_path: str, mode: str = 'r', encoding: str = 'utf-8') -> BinaryIO:
         """
         Open an member for reading or writing. Writes/overwrites always go to a temp file.
         """
         if 'w' in mode or 'a' in mode:
             self.modified = True  # Mark archive as modified when opening for write/append
+            self.deleted_files.discard(arc_path)
             # For append, copy existing content if exists
             buffer = self.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=None)
             if 'a' in mode and self.tar_file:
-                try:
-                    member = self.tar_file.getmember(arc_path)
+                member = self._find_member(arc_path)
+                if member is not None and not member.isdir():
                     with self.tar_file.extractfile(member) as src:
-                        buffer.write(src.read())
+                        shutil.copyfileobj(src, buffer, _COPY_CHUNK)
                         buffer.seek(0, io.SEEK_END)
-                except KeyError:
-                    pass
             self.staged_files[arc_path] = buffer
+            if self._tree is not None:
+                self._tree.add(arc_path, staged=True)
 
-            return buffer
+            return _StagedView(buffer)
         buffer = self.staged_files.get(arc_path)
         if buffer is not None:
             buffer.seek(0)
-            return buffer
-        if not self.tar_file:
+            return _StagedView(buffer)
+        if self._listing is None and not self.tar_file:
             raise FileNotFoundError(f"Archive not found: {self.path}")
+        if arc_path in self.deleted_files:
+            raise FileNotFoundError(f"Member not found in TAR: {arc_path}")
+        # Uncompressed TAR: serve the member in place with pread(), no copy
+        window = self.get_entry_window(arc_path)
+        if window is not None:
+            if 'b' in mode:
+                return window
+            return io.TextIOWrapper(io.BufferedReader(window), encoding=encoding)
         try:
-            member = self.tar_file.getmember(arc_path)
+            member = self._find_member(arc_path)
+            if member is None:
+                raise KeyError(arc_path)
             fileobj = self.tar_file.extractfile(member) if not member.isdir() else None
             if fileobj is None:
                 raise FileNotFoundError(f"Member not found in TAR: {arc_path}")
@@ -329,13 +682,16 @@ class TarHandler(ArchiveHandler):
             raise FileNotFoundError(f"Member not found in TAR: {arc_path}")
 
     def write(self, arc_path: str, data: Any, encoding: str = 'utf-8'):
-        mode = 'wb' if isinstance(data, bytes) else 'w'
-        with self.open_member(arc_path, mode, encoding=encoding) as f:
-            f.write(data)
+        if not isinstance(data, bytes):
+            data = data.encode(encoding)
+        # The staged buffer stays open until the handler commits it
+        self.open_member(arc_path, 'wb').write(data)
 
     def remove_member(self, arc_path: str):
         self.deleted_files.add(arc_path)
         self.modified = True
+        if self._tree is not None:
+            self._tree.remove(arc_path)
         if arc_path in self.staged_files:
             try:
                 buf = self.staged_files[arc_path]
@@ -346,78 +702,287 @@ class TarHandler(ArchiveHandler):
             del self.staged_files[arc_path]
 
     def list_dir(self, dir_path: str) -> List[str]:
-        dir_path = dir_path.rstrip('/')
-        streams = set()
-        if self.tar_file:
-            for member in self.tar_file.getmembers():
-                if member.name == dir_path:
-                    continue
-                if not member.name.startswith(dir_path + '/'):
-                    continue
-                rel = member.name[len(dir_path) + 1:]
-                if '/' in rel:
-                    streams.add(rel.split('/', 1)[0])
-                else:
-                    streams.add(rel)
-        for staged in self.staged_files:
-            if staged == dir_path or not staged.startswith(dir_path + '/'):
-                continue
-            rel = staged[len(dir_path) + 1:]
-            if '/' in rel:
-                streams.add(rel.split('/', 1)[0])
-            else:
-                streams.add(rel)
-        for deleted in self.deleted_files:
-            if deleted == dir_path or not deleted.startswith(dir_path + '/'):
-                continue
-            rel = deleted[len(dir_path) + 1:]
-            if '/' in rel:
-                streams.discard(rel.split('/', 1)[0])
-            else:
-                streams.discard(rel)
-        return sorted(streams)
+        return self.directory_tree().list_dir(dir_path)
 
     def close(self):
-        if self.tar_file:
-            self.tar_file.close()
+        try:
+            # Commit while the source archive is still open: unchanged members are read from it
+            if self.modified:
+                self._commit()
+        finally:
+            if self._tar_file is not None:
+                self._tar_file.close()
             self.tar_file = None
-        if self.modified:
-            self._commit()
-        if self.fs.dirs.exists(self.temp_dir):
-            self.fs.dirs.rmdir(self.temp_dir, recursive=True)
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+            if self._gzip_reader is not None:
+                self._gzip_reader.close()
+                self._gzip_reader = None
+            if self.fileobj is not None:
+                self.fileobj.close()
+                self.fileobj = None
+            if self.fs.dirs.exists(self.temp_dir):
+                self.fs.dirs.rmdir(self.temp_dir, recursive=True)
+            self.modified = False
+
+    def compact(self) -> None:
+        """
+        Rebuild the whole archive on close, reclaiming space held by members deleted in place.
+        """
+        self._compact = True
+        self.modified = True
 
     def _commit(self):
+        """
+        Write the staged changes to the archive.
+
+        Uncompressed TARs are updated in place where possible; otherwise the archive is rebuilt.
+        """
+        if not (self._update_in_place() or self._append_segment()):
+            self._rebuild()
+
+    def _update_in_place(self) -> bool:
+        """
+        Commit staged changes to an uncompressed TAR without rewriting it.
+
+        New members are written over the end-of-archive blocks, and a member replaced by
+        data of the same size is overwritten where it lies. Deleted or resized members are
+        blanked out by a tombstone header spanning their headers and data, which ArcFS skips
+        and other tar tools extract as '.arcfs-deleted'. The cost is O(changed data) rather
+        than O(archive). An AppendJournal saves the original length and every range that is
+        overwritten first, so an interrupted update is rolled back the next time the archive
+        is opened. Space held by tombstones is reclaimed by compact(), which also runs
+        automatically when it exceeds 'tar_append_max_waste' of the archive.
+
+        Returns:
+            True if the changes were applied, False if a full rebuild is needed instead
+        """
+        if self._compact or not TarConfig.get('tar_inplace_update'):
+            return False
+        if self.fileobj is not None or not self.tar_file or get_tar_compression(get_archive_format(self.path)):
+            return False
+        if not os.path.isfile(self.path):
+            return False
+        members = self.tar_file.getmembers()
+        # After a full scan the offset points at the end-of-archive marker
+        end = self.tar_file.offset
+        file_size = os.path.getsize(self.path)
+        if file_size - end > _MAX_TAIL:
+            return False
+        with open(self.path, 'rb') as f:
+            if f.read(6).startswith(_COMPRESSED_MAGIC):
+                return False
+            f.seek(end)
+            if f.read().strip(b'\0'):
+                # Something other than end-of-archive padding follows the last member
+                return False
+
+        # Members are contiguous, so each one extends to the start of the next
+        extents = {}
+        by_name: Dict[str, List[tarfile.TarInfo]] = {}
+        for i, member in enumerate(members):
+            extents[member] = (members[i + 1].offset if i + 1 < len(members) else end) - member.offset
+            if member.name != _TOMBSTONE_NAME:
+                by_name.setdefault(member.name, []).append(member)
+        overwrites: List[Tuple[tarfile.TarInfo, Any]] = []
+        tombstones: List[tarfile.TarInfo] = []
+        appends: List[Tuple[str, Any, int]] = []
+        for arc_path in self.deleted_files:
+            if arc_path not in self.staged_files:
+                tombstones.extend(by_name.get(arc_path.rstrip('/'), ()))
+        for arc_path, buffer in self.staged_files.items():
+            arc_name = arc_path.replace('\\', '/')
+            size = _staged_size(buffer)
+            existing = by_name.get(arc_name, [])
+            latest = existing[-1] if existing else None
+            if latest is not None and latest.isreg() and not latest.issparse() and latest.size == size:
+                overwrites.append((latest, buffer))
+            else:
+                tombstones.extend(existing)
+                appends.append((arc_name, buffer, size))
+
+        dead = sum(extents[m] for m in members if m.name == _TOMBSTONE_NAME) + sum(extents[m] for m in tombstones)
+        new_bytes = sum(size for _, _, size in appends)
+        if dead > TarConfig.get('tar_append_max_waste') * (file_size + new_bytes):
+            debug_print(f"[TarHandler] Compacting {self.path} instead of updating in place", level=2)
+            return False
+
+        preserve = [(m.offset_data - tarfile.BLOCKSIZE, tarfile.BLOCKSIZE + m.size) for m, _ in overwrites]
+        preserve += [(m.offset, tarfile.BLOCKSIZE) for m in tombstones]
+        preserve.append((end, file_size - end))
+        mtime = int(time.time())
+        try:
+            with append_journal.AppendJournal(self.path, preserve), open(self.path, 'r+b') as f:
+                for member, buffer in overwrites:
+                    header_offset = member.offset_data - tarfile.BLOCKSIZE
+                    f.seek(header_offset)
+                    header = f.read(tarfile.BLOCKSIZE)
+                    f.seek(header_offset)
+                    f.write(_touch_header(header, mtime))
+                    buffer.seek(0)
+                    shutil.copyfileobj(buffer, f, _COPY_CHUNK)
+                for member in tombstones:
+                    f.seek(member.offset)
+                    f.write(_tombstone_header(extents[member]))
+                # New members replace the end-of-archive marker, which tarfile writes again on close
+                f.seek(end)
+                with tarfile.open(fileobj=f, mode='w') as out_tar:
+                    out_tar.copybufsize = _COPY_CHUNK
+                    for arc_name, buffer, size in appends:
+                        info = tarfile.TarInfo(arc_name)
+                        info.size = size
+                        info.mtime = mtime
+                        info.mode = 0o644
+                        buffer.seek(0)
+                        _add_member(out_tar, info, buffer)
+                f.truncate()
+        except Exception as e:
+            debug_print(f"Exception in TarHandler._update_in_place: {e}", level=1, exc=e)
+            raise IOError(f"Error updating TAR file: {e}")
+
+        for member, _ in overwrites:
+            member.mtime = mtime
+        dropped = set(tombstones)
+        listing = [m for m in members if m.name != _TOMBSTONE_NAME and m not in dropped]
+        self._save_listing(listing + out_tar.members)
+        return True
+
+    def _append_segment(self) -> bool:
+        """
+        Commit new and replaced members to a .tar.gz by appending a gzip member.
+
+        Used when 'tar_gz_append' is enabled. A segmented .tar.gz ends with a small gzip
+        member holding only the end-of-archive blocks; it is cut off, the staged members are
+        written as a new gzip member (a segment), and the end member is written again. Gzip
+        readers concatenate members, so the result is one logical tar, and replaced members
+        are shadowed by their later copies. The cost is O(new data). Deletions, and archives
+        that are not segmented yet, go through a rebuild, which writes the segmented layout.
+        The rebuild also compacts the archive into one segment once it has more than
+        'tar_gz_max_segments' segments or replaced data exceeds 'tar_append_max_waste'.
+
+        Returns:
+            True if the changes were appended, False if a full rebuild is needed instead
+        """
+        if not TarConfig.get('tar_gz_append') or get_tar_compression(get_archive_format(self.path)) != ':gz':
+            return False
+        if self._compact or self.deleted_files or self.fileobj is not None or not self.tar_file:
+            return False
+        if not os.path.isfile(self.path) or self._gzip_reader is None:
+            return False
+        eof_offset = os.path.getsize(self.path) - len(_EOF_SEGMENT)
+        with open(self.path, 'rb') as f:
+            f.seek(max(eof_offset, 0))
+            if eof_offset <= 0 or f.read() != _EOF_SEGMENT:
+                return False
+
+        members = self._live_members()
+        index = self._listing.gzip_index if self._listing is not None else None
+        if index is None:
+            # Segments are counted from the gzip member boundaries a full scan records
+            self.tar_file.getmembers()
+            index = self._gzip_reader.index
+        segments = sum(1 for c in index.checkpoints if c.kind == GzipCheckpoint.MEMBER) - 1
+        if segments >= TarConfig.get('tar_gz_max_segments'):
+            debug_print(f"[TarHandler] Compacting {segments} segments of {self.path}", level=2)
+            return False
+        staged = {arc_path.replace('\\', '/'): buffer for arc_path, buffer in self.staged_files.items()}
+        latest = {m.name: m for m in members}
+        total = sum(m.size for m in members)
+        dead = total - sum(m.size for m in latest.values()) + sum(latest[n].size for n in staged if n in latest)
+        new_bytes = sum(_staged_size(buffer) for buffer in staged.values())
+        if dead > TarConfig.get('tar_append_max_waste') * (total + new_bytes):
+            debug_print(f"[TarHandler] Compacting {self.path} instead of appending", level=2)
+            return False
+
+        saved_index = GzipIndex.load(self.path)
+        segment_start = _members_end(members)
+        mtime = int(time.time())
+        try:
+            with append_journal.AppendJournal(self.path, [(eof_offset, len(_EOF_SEGMENT))]), \
+                    open(self.path, 'r+b') as raw:
+                raw.seek(eof_offset)
+                with ParallelGzipWriter(raw) as gz, _SegmentWriter(fileobj=gz, mode='w') as out_tar:
+                    out_tar.copybufsize = _COPY_CHUNK
+                    for arc_name, buffer in staged.items():
+                        info = tarfile.TarInfo(arc_name)
+                        info.size = _staged_size(buffer)
+                        info.mtime = mtime
+                        info.mode = 0o644
+                        buffer.seek(0)
+                        _add_member(out_tar, info, buffer, base=segment_start)
+                    appended = gz.tell()
+                new_eof_offset = raw.tell()
+                raw.write(_EOF_SEGMENT)
+                raw.truncate()
+        except Exception as e:
+            debug_print(f"Exception in TarHandler._append_segment: {e}", level=1, exc=e)
+            raise IOError(f"Error appending to TAR file: {e}")
+
+        # Seek indexes stay valid up to the old end member; extend them with the new members
+        if saved_index is not None and saved_index.size is not None:
+            _extend_gzip_index(saved_index, saved_index.size - _EOF_SIZE, eof_offset, appended, new_eof_offset)
+            saved_index.rebind(self.path)
+            saved_index.save(self.path)
+        _extend_gzip_index(index, segment_start, eof_offset, appended, new_eof_offset)
+        self._save_listing(members + out_tar.members, index)
+        return True
+
+    def _add_members(self, out_tar: tarfile.TarFile) -> None:
+        """
+        Write the unchanged members and then the staged ones to out_tar.
+
+        Both are streamed in _COPY_CHUNK pieces: unchanged members straight from the source
+        archive, staged ones from their buffers with the size the buffer already knows, so
+        commit memory stays O(chunk size) however large the members are.
+        """
+        out_tar.copybufsize = _COPY_CHUNK
+        if self.tar_file:
+            # Scanned headers rather than a saved listing, which does not keep owners or pax headers
+            members = self.tar_file.getmembers()
+            # Appended segments supersede earlier copies of a name; only the last one is kept
+            latest = {member.name: member for member in members}
+            for member in members:
+                if member.name == _TOMBSTONE_NAME or latest[member.name] is not member:
+                    continue
+                if member.name in self.deleted_files or member.name in self.staged_files:
+                    continue
+                fileobj = self.tar_file.extractfile(member) if not member.isdir() else None
+                _add_member(out_tar, member, fileobj)
+        mtime = int(time.time())
+        for arc_path, buffer in self.staged_files.items():
+            if arc_path in self.deleted_files:
+                continue
+            info = tarfile.TarInfo(arc_path.replace('\\', '/'))
+            info.size = _staged_size(buffer)
+            info.mtime = mtime
+            info.mode = 0o644
+            buffer.seek(0)
+            _add_member(out_tar, info, buffer)
+
+    def _rebuild(self):
+        """Rewrite the archive with the staged changes applied."""
         ext = get_archive_format(self.path)
         compression = get_tar_compression(ext)
         
         temp_fd, temp_path = self.fs.files.mkstemp()
         self.fs.files.close_fd(temp_fd)
         try:
-            with tarfile.open(temp_path, 'w' + compression) as out_tar:
-                if self.tar_file:
-                    for member in self.tar_file.getmembers():
-                        if member.name in self.deleted_files or member.name in self.staged_files:
-                            continue
-                        fileobj = self.tar_file.extractfile(member) if not member.isdir() else None
-                        out_tar.addfile(member, fileobj)
-                for arc_path, buffer in self.staged_files.items():
-                    if arc_path in self.deleted_files:
-                        continue
-                    arc_name = arc_path.replace('\\', '/')
-                    info = tarfile.TarInfo(arc_name)
-                    buffer.seek(0)
-                    data = buffer.read()
-                    info.size = len(data)
-                    info.mtime = int(time.time())
-                    info.mode = 0o644
-                    buf = self.fs.files.open(path=None, mode='r+b', buffering=-1, encoding=None)
-                    buf.write(data)
-                    buf.seek(0)
-                    out_tar.addfile(info, buf)
-                    buf.close()
+            if compression == ':gz' and TarConfig.get('tar_gz_append'):
+                # Segmented layout: the members in one gzip member, the end-of-archive blocks in
+                # another, so that later commits can append segments in between
+                with open(temp_path, 'wb') as raw:
+                    with ParallelGzipWriter(raw) as gz, _SegmentWriter(fileobj=gz, mode='w') as out_tar:
+                        self._add_members(out_tar)
+                    raw.write(_EOF_SEGMENT)
+            else:
+                with tarfile.open(temp_path, 'w' + compression) as out_tar:
+                    self._add_members(out_tar)
             self.fs.files.move(temp_path, self.path)
+            self._save_listing(out_tar.members)
         except Exception as e:
-            debug_print(f"Exception in TarHandler._commit: {e}", level=1, exc=e)
+            debug_print(f"Exception in TarHandler._rebuild: {e}", level=1, exc=e)
+            raise IOError(f"Error rebuilding TAR file: {e}")
         finally:
             if self.fs.files.exists(temp_path):
                 self.fs.files.remove(temp_path)
@@ -7,93 +7,31 @@ Contact: https://github.com/Munger
 License: MIT
 """
 
-
 import lzma
-import io
+import shutil
 
 from typing import Dict, List, Optional, BinaryIO, Any, Set
 
-from arcfs.api.config_api import ConfigAPI
-from arcfs.core.base_handler import ArchiveHandler
+from arcfs.core.base_handler import ArchiveHandler, ArchiveEntry
+from arcfs.core.compressed_stream import COPY_CHUNK, CompressedFileStream
+from arcfs.core.utils import get_base_name
+
 
-class XzStream:
+class XzStream(CompressedFileStream):
     """
     Stream wrapper for XZ files.
     Provides a file-like interface for reading and writing XZ compressed files.
-    All file operations are performed via the ARCFS file API and are agnostic to how files are buffered or stored.
+    Reads decompress chunk by chunk from the file; writes are compressed on close.
     """
-    def __init__(self, handler, path: str, mode: str, buffer_threshold: Optional[int] = None):
-        self.handler = handler
-        self.path = path
-        self.mode = mode
-        # Use config or config API for buffer threshold
-        if buffer_threshold is not None:
-            self._buffer_threshold = buffer_threshold
-        else:
-            try:
-                self._buffer_threshold = getattr(ConfigAPI, 'get_buffer_threshold', lambda: 64*1024)()
-            except Exception:
-                self._buffer_threshold = 64 * 1024
-        self._closed = False
-        self._write_mode = 'w' in mode or 'a' in mode
-        if not self._write_mode:
-            try:
-                lzma_mode = mode if 'b' in mode else mode + 'b'
-                with lzma.open(path, lzma_mode) as f:
-                    data = f.read()
-                # Use FileOperations for buffer management
-                self._buffer = self.handler.fs.files.open(path=None, mode='r+b', buffering=-1, encoding=None)
-                self._buffer.write(data)
-                self._buffer.seek(0)
-            except Exception as e:
-                raise IOError(f"Error opening XZ file: {e}")
-        else:
-            # Use FileOperations for buffer management
-            self._buffer = self.handler.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=None)
-
-    def write(self, b):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.write(b)
-
-    def read(self, size=-1):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.read(size)
-
-    def seek(self, offset, whence=io.SEEK_SET):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.seek(offset, whence)
-
-    def tell(self):
-        if self._closed:
-            raise ValueError("I/O operation on closed file.")
-        return self._buffer.tell()
-
-    @property
-    def closed(self):
-        return self._closed
-
-    def close(self):
-        if self._closed:
-            return
-        if self._write_mode:
-            # Write member_stream to file
-            try:
-                with lzma.open(self.path, 'wb') as f:
-                    f.write(self._buffer.get_bytes())
-            except Exception as e:
-                raise IOError(f"Error writing to XZ file: {e}")
-        self._buffer.close()
-        self._closed = True
+    format_name = 'XZ'
 
-    # Context manager support
-    def __enter__(self):
-        return self
+    def _open_reader(self) -> BinaryIO:
+        return lzma.open(self.path, 'rb')
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+    def _write_compressed(self, source: BinaryIO, target: str, append: bool) -> None:
+        # Appending adds a new XZ stream, which readers concatenate
+        with lzma.open(target, 'ab' if append else 'wb') as f:
+            shutil.copyfileobj(source, f, COPY_CHUNK)
 
 
 class XzConfig:
@@ -119,9 +57,46 @@ class XzConfig:
 
 
 class XzHandler(ArchiveHandler):
+    """
+    Handler for XZ compressed files, treating them as single-file archives.
+    """
     config = XzConfig
 
-    # --- Required abstract methods for ArchiveHandler ---
+    def __init__(self, path: str, mode: str = 'r', fs=None):
+        """
+        Initialize the XZ handler.
+
+        Args:
+            path: Path to the XZ file
+            mode: Access mode
+            fs: ArchiveFS instance (required)
+        """
+        if fs is None:
+            raise ValueError("XzHandler requires an ArchiveFS instance via the 'fs' argument.")
+        self.fs = fs
+        self.path = path
+        self.mode = mode
+        self.base_name = get_base_name(path)
+        self._open()
+
+    # --- Entry interface for ArchiveHandler ---
+    def list_entries(self) -> List[ArchiveEntry]:
+        return [ArchiveEntry(path=m['path'], size=m['size'], modified=m['modified'], is_dir=False)
+                for m in self.list_files()]
+
+    def open_entry(self, path: str, mode: str = 'r') -> BinaryIO:
+        return self.open_file(path, mode)
+
+    def get_entry_info(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.get_file_info(path)
+
+    def entry_exists(self, path: str) -> bool:
+        return self.file_exists(path)
+
+    def remove_entry(self, path: str) -> None:
+        return self.remove_file(path)
+
+    # --- Legacy stream interface ---
     def stream_exists(self, arc_path: str) -> bool:
         return self.file_exists(arc_path)
 
@@ -137,31 +112,6 @@ class XzHandler(ArchiveHandler):
     def remove_stream(self, arc_path: str):
         return self.remove_file(arc_path)
 
-    def __init__(self, path: str, mode: str = 'r', fs=None):
-        if fs is None:
-            raise ValueError("XzHandler requires an ArchiveFS instance via the 'fs' argument.")
-        self.fs = fs
-        self.path = path
-        self.mode = mode
-        self.base_name = get_base_name(self.fs.dirs.basename(path))
-        self._open()
-    """
-    Handler for XZ compressed files, treating them as single-file archives.
-    """
-    
-    def __init__(self, path: str, mode: str = 'r'):
-        """
-        Initialize the XZ handler.
-        
-        Args:
-            path: Path to the XZ file
-            mode: Access mode
-        """
-        self.path = path
-        self.mode = mode
-        self.base_name = get_base_name(DirectoryOperations().basename(path))
-        self._open()
-    
     def _open(self) -> None:
         """Open the XZ file."""
         # For XZ files, we don't need to keep the file open
@@ -181,12 +131,12 @@ class XzHandler(ArchiveHandler):
             List of dictionaries with file information
         """
         # XZ files only have one member
-        if not FileOperations.exists(self.path):
+        if not self.fs.files.exists(self.path):
             return []
             
         try:
             # Get file stats
-            stat = FileOperations.stat(self.path)
+            stat = self.fs.files.stat(self.path)
             
             # Create member object for the single file
             member = {
@@ -235,7 +185,7 @@ class XzHandler(ArchiveHandler):
             raise FileNotFoundError(f"File not found in XZ: {path}")
             
         # Open the XZ file
-        return XzStream(self.path, mode)
+        return XzStream(self.path, mode, handler=self)
     
     def get_file_info(self, path: str) -> Optional[Dict[str, Any]]:
         """
@@ -266,7 +216,7 @@ class XzHandler(ArchiveHandler):
                 return None
                 
             # Get file stats
-            stat = FileOperations.stat(self.path)
+            stat = self.fs.files.stat(self.path)
             
             # Return info for the single file
             return {
@@ -350,12 +300,6 @@ class XzHandler(ArchiveHandler):
             Set of supported extensions (with leading dot)
         """
         return {'.xz'}
-        if self._buffer_size is not None:
-            return self._buffer_size
-        try:
-            return getattr(ConfigAPI, 'get_buffer_threshold', lambda: 64*1024)()
-        except Exception:
-            return 64 * 1024
 
     def __getitem__(self, key):
         return getattr(self, key)
@@ -7,13 +7,42 @@ Contact: https://github.com/Munger
 License: MIT
 """
 
+import copy
 import io
+import os
+import time
+import tempfile
 import zipfile
-from typing import Dict, List, Optional, BinaryIO, Any, Set
+from datetime import datetime
+from typing import Dict, List, Optional, BinaryIO, Any, Set, Tuple
 from arcfs.api.config_api import ConfigAPI
-from arcfs.core.base_handler import ArchiveHandler
+from arcfs.core import append_journal, snapshot
+from arcfs.core.archive_tree import ArchiveTree
+from arcfs.core.base_handler import ArchiveHandler, ArchiveEntry
+from arcfs.core.file_window import FileWindow
+from arcfs.core.utils import copy_range
 from arcfs.core.logging import debug_print
 
+# Fixed part of a ZIP local file header: signature .. extra field length
+_LOCAL_HEADER_SIZE = 30
+# Largest piece decompressed and discarded at a time when skipping forward in a member
+_SKIP_CHUNK = 256 * 1024
+# Data descriptor following members written with flag bit 3 (signature, CRC, sizes)
+_DATA_DESCRIPTOR_SIZE = 16
+
+
+def _local_record_size(info: zipfile.ZipInfo) -> int:
+    """Approximate bytes a member occupies before the central directory."""
+    size = _LOCAL_HEADER_SIZE + len(info.filename.encode('utf-8')) + len(info.extra) + info.compress_size
+    if info.flag_bits & 0x08:
+        size += _DATA_DESCRIPTOR_SIZE
+    return size
+
+
+def _dos_timestamp(info: zipfile.ZipInfo) -> float:
+    """Unix timestamp of a member's DOS date and time."""
+    return time.mktime(datetime(*info.date_time).timetuple())
+
 class ZipStream:
     """
     Stream wrapper for ZIP members.
@@ -50,39 +79,105 @@ class ZipStream:
         self._closed = False
         self._write_mode = 'w' in mode or 'a' in mode
         self.handler = handler
+        self._member = None
+        self._pos = 0
         if 'r' in mode and not 'w' in mode:
             try:
-                data = zip_file.read(member_name)
-                # Use handler.fs.files for buffer management
-                self._buffer = self.handler.fs.files.open(path=None, mode='r+b', buffering=-1, encoding=self.handler.encoding if self.handler else None)
-                self._buffer.write(data)
-                self._buffer.seek(0)
+                self._info = zip_file.getinfo(member_name)
             except KeyError:
                 raise FileNotFoundError(f"Member '{member_name}' not found in ZIP archive.")
+            # Stored members are read in place; compressed ones are decompressed as they are read
+            window = None
+            if handler is not None and hasattr(handler, 'get_entry_window'):
+                window = handler.get_entry_window(member_name)
+            self._direct = window is not None
+            self._member = io.BufferedReader(window) if window is not None else zip_file.open(self._info)
+            self._buffer = None
         else:
             # Use handler.fs.files for buffer management
-            self._buffer = self.handler.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=self.handler.encoding if self.handler else None)
+            self._buffer = self.handler.fs.files.open(path=None, mode='w+b', buffering=-1, encoding=None)
 
     def write(self, b):
         if self._closed:
             raise ValueError("I/O operation on closed file.")
+        if self._buffer is None:
+            raise io.UnsupportedOperation("write")
         self._dirty = True
         return self._buffer.write(b)
 
     def read(self, size=-1):
         if self._closed:
             raise ValueError("I/O operation on closed file.")
-        return self._buffer.read(size)
+        if self._buffer is not None:
+            return self._buffer.read(size)
+        data = self._member.read(-1 if size is None or size < 0 else size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, b):
+        if self._closed:
+            raise ValueError("I/O operation on closed file.")
+        if self._buffer is not None:
+            return self._buffer.readinto(b)
+        n = self._member.readinto(b)
+        self._pos += n
+        return n
+
+    def readline(self, size=-1):
+        if self._closed:
+            raise ValueError("I/O operation on closed file.")
+        if self._buffer is not None:
+            return self._buffer.readline(size)
+        line = self._member.readline(-1 if size is None else size)
+        self._pos += len(line)
+        return line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
 
     def seek(self, offset, whence=io.SEEK_SET):
         if self._closed:
             raise ValueError("I/O operation on closed file.")
-        return self._buffer.seek(offset, whence)
+        if self._buffer is not None:
+            return self._buffer.seek(offset, whence)
+        if whence == io.SEEK_SET:
+            target = offset
+        elif whence == io.SEEK_CUR:
+            target = self._pos + offset
+        elif whence == io.SEEK_END:
+            target = self._info.file_size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if target < 0:
+            raise ValueError(f"Negative seek position {target}")
+        if self._direct:
+            self._pos = self._member.seek(target)
+            return self._pos
+        if target < self._pos:
+            # Deflate cannot run backwards: restart decompression from the member start
+            self._member.close()
+            self._member = self.zip_file.open(self._info)
+            self._pos = 0
+        while self._pos < target:
+            chunk = self._member.read(min(_SKIP_CHUNK, target - self._pos))
+            if not chunk:
+                break
+            self._pos += len(chunk)
+        self._pos = target
+        return target
 
     def tell(self):
         if self._closed:
             raise ValueError("I/O operation on closed file.")
-        return self._buffer.tell()
+        if self._buffer is not None:
+            return self._buffer.tell()
+        return self._pos
 
     @property
     def closed(self):
@@ -96,7 +191,11 @@ class ZipStream:
                 self._buffer.seek(0)
             data = self._buffer.read()
             self.zip_file.writestr(self.member_name, data)
-        self._buffer.close()
+        if self._buffer is not None:
+            self._buffer.close()
+        if self._member is not None:
+            self._member.close()
+            self._member = None
         self._closed = True
 
     # Context manager support
@@ -116,7 +215,8 @@ class ZipStream:
         return True
 
     def flush(self):
-        self._buffer.flush()
+        if self._buffer is not None:
+            self._buffer.flush()
 
 
 class ZipConfig:
@@ -146,6 +246,7 @@ class ZipHandler(ArchiveHandler):
     Handler for ZIP format archives.
     """
     config = ZipConfig
+    supports_fileobj = True
 
     # --- Required abstract methods for ArchiveHandler ---
     def stream_exists(self, arc_path: str) -> bool:
@@ -164,16 +265,39 @@ class ZipHandler(ArchiveHandler):
     def remove_stream(self, arc_path: str):
         return self.remove_member(arc_path)
 
-    def list_streams(self):
-        return self.list_members()
+    # --- ArchiveHandler entry interface ---
+    def entry_exists(self, path: str) -> bool:
+        return self.member_exists(path)
+
+    def get_entry_info(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.get_member_info(path)
+
+    def list_entries(self) -> List[ArchiveEntry]:
+        return [ArchiveEntry(path=m['path'], size=m['size'], modified=m['modified'], is_dir=m['is_dir'])
+                for m in self.list_members()]
+
+    def list_dir(self, path: str) -> List[str]:
+        return self.list_streams(path)
+
+    def open_entry(self, path: str, mode: str = 'r') -> BinaryIO:
+        return self.open_member(path, mode)
+
+    def remove_entry(self, path: str) -> None:
+        return self.remove_member(path)
+
+    def memory_usage(self) -> int:
+        """Approximate memory held by the parsed central directory, in bytes."""
+        if self.zip_file is None:
+            return 0
+        usage = len(self.zip_file.filelist) * 256
+        if self._tree is not None:
+            usage += self._tree.memory_usage()
+        return usage
 
-    """
-    Handler for ZIP format archives.
-    """
     def _open(self, mode: str = 'r'):
         pass
    
-    def __init__(self, path: str, mode: str = 'r', fs=None):
+    def __init__(self, path: str, mode: str = 'r', fs=None, fileobj=None):
         """
         Initialize the ZIP handler.
 
@@ -181,16 +305,28 @@ class ZipHandler(ArchiveHandler):
             path: Path to the ZIP file
             mode: Access mode
             fs: ArchiveFS instance (required)
+            fileobj: Optional seekable stream holding the ZIP (read mode only); closed with the handler
         """
         if fs is None:
             raise ValueError("ZipHandler requires an ArchiveFS instance via the 'fs' argument.")
+        if fileobj is not None and mode != 'r':
+            raise ValueError("ZipHandler can only read ZIP archives opened from a stream.")
         self.fs = fs
         self.path = path
         self.mode = mode
+        self.fileobj = fileobj
+        self._source = None
         self.zip_file = None
         self.temp_dir = None
         self.members_to_update = {}
+        self._tree: Optional[ArchiveTree] = None
+        self._mtime: Optional[float] = None
         self.modified = False
+        self._compact = False
+        if fileobj is None:
+            # Finish rolling back an append or transaction that was interrupted by a crash
+            snapshot.recover(path)
+            append_journal.recover(path)
         mode_map = {
             'r': self._open_read,
             'w': lambda: self._open_write('w'),
@@ -203,12 +339,17 @@ class ZipHandler(ArchiveHandler):
             raise ValueError(f"Unsupported mode: {mode}")
 
     def _open_read(self):
-        self.zip_file = zipfile.ZipFile(self.path, 'r')
+        self.zip_file = zipfile.ZipFile(self.fileobj if self.fileobj is not None else self.path, 'r')
 
     def _open_write(self, zip_mode):
-        if not self.fs.dirs.exists(self.fs.dirs.mkdirname(self.path)) and self.fs.dirs.mkdirname(self.path):
-            self.fs.dirs.mkdir(self.fs.dirs.mkdirname(self.path), create_parents=True)
-        self.zip_file = zipfile.ZipFile(self.path, zip_mode)
+        if not self.fs.dirs.exists(self.fs.dirs.dirname(self.path)) and self.fs.dirs.dirname(self.path):
+            self.fs.dirs.mkdir(self.fs.dirs.dirname(self.path), create_parents=True)
+        if zip_mode == 'a' and zipfile.is_zipfile(self.path):
+            # Changes are staged and committed on close, so the session only needs to read
+            self.zip_file = zipfile.ZipFile(self.path, 'r')
+        else:
+            snapshot.detach(self.path, copy=zip_mode == 'a')
+            self.zip_file = zipfile.ZipFile(self.path, zip_mode)
         self.temp_dir = tempfile.mkdtemp()
 
     def close(self) -> None:
@@ -218,8 +359,8 @@ class ZipHandler(ArchiveHandler):
                 self.zip_file.close()
                 self.zip_file = None
                
-                # If there are pending changes, rebuild the ZIP file
-                if self.modified and self.temp_dir:
+                # If there are pending changes, append them in place or rebuild the ZIP file
+                if self.modified and self.temp_dir and not self._append_changes():
                     self._rebuild_zip()
                
                 # Clean up temporary directory
@@ -229,72 +370,254 @@ class ZipHandler(ArchiveHandler):
         except Exception as e:
             debug_print(f"Exception in ZipHandler.close: {e}", level=1, exc=e)
             raise IOError(f"Error closing ZIP file: {e}")
+        finally:
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+            if self.fileobj is not None:
+                self.fileobj.close()
+                self.fileobj = None
+
+    def get_entry_window(self, path: str):
+        """
+        Return a zero-copy window over a stored (uncompressed, unencrypted) member.
+
+        Args:
+            path: Member path within the ZIP
+
+        Returns:
+            FileWindow over the member data, or None if the member cannot be served in place
+        """
+        if self.zip_file is None or self.modified:
+            return None
+        try:
+            info = self.zip_file.getinfo(path)
+        except KeyError:
+            return None
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1 or info.is_dir():
+            return None
+        source = self._window_source()
+        if source is None:
+            return None
+        header = source.read_at(info.header_offset, _LOCAL_HEADER_SIZE)
+        if len(header) != _LOCAL_HEADER_SIZE or header[:4] != zipfile.stringFileHeader:
+            return None
+        name_len = int.from_bytes(header[26:28], 'little')
+        extra_len = int.from_bytes(header[28:30], 'little')
+        data_offset = info.header_offset + _LOCAL_HEADER_SIZE + name_len + extra_len
+        return source.subwindow(data_offset, info.compress_size)
+
+    def _window_source(self):
+        # Windows are taken over the physical file, or over the window this ZIP was opened from
+        if self._source is None:
+            if self.fileobj is None:
+                self._source = FileWindow.from_path(self.path)
+            elif isinstance(self.fileobj, FileWindow):
+                self._source = self.fileobj.subwindow(0)
+        return self._source
+
+    def compact(self) -> None:
+        """
+        Rewrite the whole archive on close, reclaiming space left behind by in-place updates.
+        """
+        self._compact = True
+        self.modified = True
+        if not self.temp_dir:
+            self.temp_dir = self.fs.dirs.mkdtemp()
+
+    def _staged_changes(self) -> Tuple[List[str], List[Tuple[str, str]], Set[str]]:
+        """
+        Collect the changes staged in the temp directory.
+
+        Returns:
+            Tuple of (directory names, (temp path, member name) pairs, deleted member names)
+        """
+        dirs: List[str] = []
+        files: List[Tuple[str, str]] = []
+        deleted: Set[str] = set()
+        # The staging directory is always a plain local directory
+        for root, dir_names, file_names in os.walk(self.temp_dir):
+            rel_root = os.path.relpath(root, self.temp_dir).replace(os.sep, '/')
+            rel_root = '' if rel_root == '.' else rel_root + '/'
+            dirs.extend(rel_root + name + '/' for name in sorted(dir_names))
+            for name in sorted(file_names):
+                if name.endswith('.deleted'):
+                    deleted.add(rel_root + name[:-len('.deleted')])
+                else:
+                    files.append((os.path.join(root, name), rel_root + name))
+        return dirs, files, deleted
+
+    def _append_changes(self) -> bool:
+        """
+        Commit staged changes by appending to the existing archive instead of rebuilding it.
+
+        New and replaced members are written after the current end of the file, followed by
+        a new central directory that no longer lists deleted or superseded members. The cost
+        is O(new data + central directory). Writing starts where the previous central
+        directory began, so no stale copy of it is left behind; an AppendJournal records the
+        original length and saves the old central directory first, so a crash at any point
+        leaves an archive that is rolled back to its previous contents the next time it is
+        opened. Space held by superseded members is reclaimed by compact(), which
+        also runs automatically when it exceeds 'zip_append_max_waste' of the archive.
+
+        Returns:
+            True if the changes were appended, False if a full rebuild is needed instead
+        """
+        if self._compact or not ZipConfig.get('zip_inplace_append'):
+            return False
+        if not os.path.isfile(self.path) or not zipfile.is_zipfile(self.path):
+            return False
+        dirs, files, deleted = self._staged_changes()
+        with zipfile.ZipFile(self.path, 'r') as current:
+            infos = current.infolist()
+            if not infos:
+                return False
+            start_dir = current.start_dir
+            superseded = {arc_name for _, arc_name in files} | deleted | {d.rstrip('/') for d in deleted}
+            live = [i for i in infos if i.filename not in superseded and i.filename.rstrip('/') not in deleted]
+            file_size = os.path.getsize(self.path)
+            live_bytes = sum(_local_record_size(i) for i in live)
+            new_bytes = sum(os.path.getsize(temp_path) for temp_path, _ in files)
+            if file_size - live_bytes > ZipConfig.get('zip_append_max_waste') * (file_size + new_bytes):
+                debug_print(f"[ZipHandler] Compacting {self.path} instead of appending", level=2)
+                return False
+        try:
+            # The old central directory and end record are overwritten, so the journal keeps a copy
+            with append_journal.AppendJournal(self.path, preserve=[(start_dir, file_size - start_dir)]):
+                with zipfile.ZipFile(self.path, 'a') as zf:
+                    for info in list(zf.filelist):
+                        if info.filename in superseded or info.filename.rstrip('/') in deleted:
+                            zf.filelist.remove(info)
+                            zf.NameToInfo.pop(info.filename, None)
+                    # Append mode positions writes at the old central directory
+                    zf._didModify = True
+                    for dir_name in dirs:
+                        if dir_name not in zf.NameToInfo:
+                            zf.writestr(dir_name, b'')
+                    for temp_path, arc_name in files:
+                        zf.write(temp_path, arc_name)
+        except Exception as e:
+            debug_print(f"Exception in ZipHandler._append_changes: {e}", level=1, exc=e)
+            raise IOError(f"Error appending to ZIP file: {e}")
+        return True
+
+    def _record_extent(self, source: BinaryIO, info: zipfile.ZipInfo) -> Optional[int]:
+        """
+        Measure the on-disk record of a member: local header, data and data descriptor.
+
+        Args:
+            source: Binary file object over the archive
+            info: Member to measure
+
+        Returns:
+            Record length in bytes, or None if the local header does not match the directory
+        """
+        source.seek(info.header_offset)
+        header = source.read(_LOCAL_HEADER_SIZE)
+        if len(header) != _LOCAL_HEADER_SIZE or header[:4] != zipfile.stringFileHeader:
+            return None
+        name_len = int.from_bytes(header[26:28], 'little')
+        extra_len = int.from_bytes(header[28:30], 'little')
+        length = _LOCAL_HEADER_SIZE + name_len + extra_len + info.compress_size
+        if info.flag_bits & 0x08:
+            # Descriptor sizes are 8 bytes wide when the local header carries a ZIP64 field
+            source.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_len)
+            extra = source.read(extra_len)
+            zip64 = False
+            while len(extra) >= 4:
+                field_id = int.from_bytes(extra[0:2], 'little')
+                field_len = int.from_bytes(extra[2:4], 'little')
+                zip64 = zip64 or field_id == 1
+                extra = extra[4 + field_len:]
+            source.seek(info.header_offset + length)
+            signed = source.read(4) == b'PK\x07\x08'
+            length += (4 if signed else 0) + 4 + (16 if zip64 else 8)
+        return length
+
+    def _copy_raw_members(self, old_zip: zipfile.ZipFile, members: List[zipfile.ZipInfo],
+                          out: BinaryIO, new_zip: zipfile.ZipFile) -> None:
+        """
+        Copy members from old_zip into new_zip without recompressing them.
+
+        Records that lie back to back in the old archive are copied as one range. Members
+        whose local header cannot be located are recompressed instead.
+
+        Args:
+            old_zip: Source archive
+            members: Members to copy, as listed by old_zip
+            out: File object new_zip writes to
+            new_zip: Destination archive, open for writing
+        """
+        source = old_zip.fp
+        run_start = run_end = None
+        run_dst = 0
+
+        def flush_run():
+            if run_start is not None:
+                out.flush()
+                copy_range(source.fileno(), out.fileno(), run_start, run_end - run_start, run_dst)
+
+        for item in sorted(members, key=lambda i: i.header_offset):
+            length = self._record_extent(source, item)
+            if length is None:
+                flush_run()
+                run_start = None
+                out.seek(new_zip.start_dir)
+                new_zip.writestr(item, old_zip.read(item.filename))
+                continue
+            if run_start is None or item.header_offset != run_end:
+                flush_run()
+                run_start, run_end, run_dst = item.header_offset, item.header_offset, new_zip.start_dir
+            copied = copy.copy(item)
+            copied.header_offset = run_dst + (item.header_offset - run_start)
+            run_end = item.header_offset + length
+            new_zip.start_dir = run_dst + (run_end - run_start)
+            new_zip.filelist.append(copied)
+            new_zip.NameToInfo[copied.filename] = copied
+        flush_run()
+        out.seek(new_zip.start_dir)
+        new_zip._didModify = True
 
     def _rebuild_zip(self) -> None:
-        """Rebuild the ZIP file with modifications."""
+        """
+        Rebuild the ZIP file with modifications.
+
+        Unchanged members are copied as raw records (local header, compressed data and data
+        descriptor) without being decompressed, so their CRCs and compression are preserved
+        and the cost of a rebuild is dominated by disk speed rather than deflate speed.
+        """
+        dirs, files, deleted = self._staged_changes()
+        staged = set(dirs) | {arc_name for _, arc_name in files}
         # Create a temporary file for the new ZIP
         temp_fd, temp_path = self.fs.files.mkstemp()
        
         try:
             # Create a new ZIP file
-            with zipfile.ZipFile(temp_path, 'w') as new_zip:
+            with open(temp_path, 'w+b') as out, zipfile.ZipFile(out, 'w') as new_zip:
                 # First, copy existing members that haven't been modified
-                if self.fs.dirs.exists(self.path):
-                    try:
-                        with zipfile.ZipFile(self.path, 'r') as old_zip:
-                            for item in old_zip.infolist():
+                # (a partially copied directory would be corrupt, so copy errors abort the rebuild)
+                if self.fs.dirs.exists(self.path) and zipfile.is_zipfile(self.path):
+                    with zipfile.ZipFile(self.path, 'r') as old_zip:
+                        kept = [item for item in old_zip.infolist()
                                 # Skip members that have been modified or deleted
-                                if self.fs.dirs.join(self.temp_dir, item.filename) in self.members_to_update:
-                                    continue
-                               
-                                # Check for deletion markers
-                                if self.fs.dirs.exists(self.fs.dirs.join(self.temp_dir, item.filename + ".deleted")):
-                                    continue
-                               
-                                # Copy the member to the new ZIP
-                                data = old_zip.read(item.filename)
-                                new_zip.writestr(item, data)
-                    except Exception:
-                        debug_print(f"Exception in ZipHandler._rebuild_zip (reading old ZIP)", level=1)
-                        pass
+                                if item.filename not in staged
+                                and item.filename.rstrip('/') not in deleted]
+                        self._copy_raw_members(old_zip, kept, out, new_zip)
                
                 # Now add all the modified/new members from the temp directory
-                for root, dirs, files in self.fs.dirs.walk(self.temp_dir):
-                    # Get the relative path from the temp directory
-                    rel_root = self.fs.dirs.relpath(root, self.temp_dir)
-                    if rel_root == '.':
-                        rel_root = ''
-                   
-                    # Add directories (ZIP doesn't technically need directory members, but some tools expect them)
-                    for dir_name in dirs:
-                        dir_path = self.fs.dirs.join(rel_root, dir_name)
-                        if dir_path:
-                            # Add trailing slash to indicate it's a directory
-                            if not dir_path.endswith('/'):
-                                dir_path += '/'
-                           
-                            # Add an empty directory member
-                            new_zip.writestr(dir_path, '')
-                   
-                    # Add files
-                    for file_name in files:
-                        # Skip special marker files
-                        if file_name.endswith('.deleted'):
-                            continue
-                           
-                        file_path = self.fs.dirs.join(root, file_name)
-                        arc_name = self.fs.dirs.join(rel_root, file_name) if rel_root else file_name
-                        arc_name = arc_name.replace('\\', '/')  # Use forward slashes for ZIP
-                       
-                        # Add file to ZIP
-                        new_zip.write(file_path, arc_name)
+                # (ZIP doesn't technically need directory members, but some tools expect them)
+                for dir_name in dirs:
+                    new_zip.writestr(dir_name, '')
+                for file_path, arc_name in files:
+                    new_zip.write(file_path, arc_name)
            
             # Replace the original file with the new one
             self.fs.files.close_fd(temp_fd)
             self.fs.files.move(temp_path, self.path)
            
-        except Exception:
-            raise IOError(f"Error rebuilding ZIP file")
+        except Exception as e:
+            debug_print(f"Exception in ZipHandler._rebuild_zip: {e}", level=1, exc=e)
+            raise IOError(f"Error rebuilding ZIP file: {e}")
         finally:
             # Clean up the temporary file if it still exists
             if self.fs.dirs.exists(temp_path):
@@ -315,15 +638,11 @@ class ZipHandler(ArchiveHandler):
                 # Determine if it's a directory
                 is_dir = info.filename.endswith('/')
                
-                # Convert DOS timestamp to Unix timestamp
-                dos_time = info.date_time
-                timestamp = time.mktime(datetime(*dos_time).timetuple())
-               
                 # Create member object
                 member = {
                     'path': info.filename,
                     'size': info.file_size,
-                    'modified': timestamp,
+                    'modified': _dos_timestamp(info),
                     'is_dir': is_dir
                 }
                
@@ -334,6 +653,34 @@ class ZipHandler(ArchiveHandler):
             # Return empty list for invalid or empty ZIP files
             return []
 
+    def directory_tree(self) -> ArchiveTree:
+        """
+        Directory tree of the archive with this session's staged changes applied, built
+        from one pass over the central directory on first use.
+        """
+        if self._tree is None:
+            tree = ArchiveTree()
+            if self.zip_file is not None:
+                for info in self.zip_file.infolist():
+                    tree.add(info.filename, is_dir=info.is_dir(), member=info)
+            if self.temp_dir and os.path.isdir(self.temp_dir):
+                dirs, files, deleted = self._staged_changes()
+                # Staged files are committed even after a deletion marker for the same name
+                for name in deleted:
+                    tree.remove(name)
+                for name in dirs:
+                    tree.add(name, is_dir=True, staged=True)
+                for _, name in files:
+                    tree.add(name, staged=True)
+            self._tree = tree
+        return self._tree
+
+    def _archive_mtime(self) -> float:
+        # Shared by every implicit directory, so stat the archive once per handler
+        if self._mtime is None:
+            self._mtime = os.path.getmtime(self.path) if self.fileobj is None and os.path.exists(self.path) else time.time()
+        return self._mtime
+
     def list_streams(self, path: str) -> List[str]:
         """
         List contents of a directory in the ZIP.
@@ -344,51 +691,7 @@ class ZipHandler(ArchiveHandler):
         Returns:
             List of member names in the directory
         """
-        # Normalize path to include trailing slash for directories
-        if path and not path.endswith('/'):
-            path += '/'
-       
-        try:
-            # Get all members in the ZIP
-            members = set()
-            prefix_len = len(path)
-           
-            for name in self.zip_file.namelist():
-                # Skip members not in this directory
-                if not name.startswith(path):
-                    continue
-               
-                # Get the part after the directory prefix
-                relative_name = name[prefix_len:]
-               
-                # Skip empty names
-                if not relative_name:
-                    continue
-               
-                # Get only the first component
-                if '/' in relative_name:
-                    dir_name = relative_name.split('/', 1)[0]
-                    members.add(dir_name)
-                else:
-                    members.add(relative_name)
-           
-            # Check in the temporary directory for new members
-            if self.temp_dir and self.fs.dirs.exists(self.temp_dir):
-                temp_path = self.fs.dirs.join(self.temp_dir, path.rstrip('/'))
-                if self.fs.dirs.is_dir(temp_path):
-                    for item in self.fs.dirs.listdir(temp_path):
-                        # Skip deleted markers
-                        if item.endswith('.deleted'):
-                            members.discard(item[:-8])  # Remove the deleted member
-                        else:
-                            members.add(item)
-           
-            # Convert to list and sort
-            return sorted(members)
-           
-        except Exception:
-            # Return empty list for invalid or empty ZIP files
-            return []
+        return self.directory_tree().list_dir(path)
 
     def open_member(self, path: str, mode: str = 'r') -> BinaryIO:
         """
@@ -419,25 +722,23 @@ class ZipHandler(ArchiveHandler):
            
             # Create the full path in the temp directory
             temp_path = self.fs.dirs.join(self.temp_dir, path)
+            self.fs.dirs.mkdir(self.fs.dirs.dirname(temp_path), create_parents=True)
            
             # Mark as modified and track the updated member
             self.modified = True
             self.members_to_update[temp_path] = path
+            if self._tree is not None:
+                self._tree.add(path, staged=True)
            
             # Open the temp file with the requested mode
             return self.fs.files.open(temp_path, mode)
        
-        # For read mode, if a temp file exists for this member, flush it to the archive
+        # For read mode, serve a member written earlier in this session from its staged copy
         if self.temp_dir:
             temp_path = self.fs.dirs.join(self.temp_dir, path)
             if self.fs.files.exists(temp_path):
-                with self.fs.files.open(temp_path, 'rb') as f:
-                    data = f.read()
-                self.zip_file.writestr(path, data)
-                self.fs.files.remove(temp_path)
-                if temp_path in self.members_to_update:
-                    del self.members_to_update[temp_path]
-        return ZipStream(self.zip_file, path, mode, handler=self, fs=self.fs)
+                return self.fs.files.open(temp_path, 'rb')
+        return ZipStream(self.zip_file, path, mode, handler=self)
 
     def get_member_info(self, path: str) -> Optional[Dict[str, Any]]:
         """
@@ -459,92 +760,40 @@ class ZipHandler(ArchiveHandler):
                 'path': path
             }
        
-        # Normalize path
-        norm_path = path.rstrip('/')
-        is_dir = path.endswith('/')
-       
-        try:
-            # First check if there's a direct match
-            try:
-                info = self.zip_file.getinfo(norm_path)
-               
-                # Convert DOS timestamp to Unix timestamp
-                dos_time = info.date_time
-                timestamp = time.mktime(datetime(*dos_time).timetuple())
-               
-                return {
-                    'size': info.file_size,
-                    'compressed_size': info.compress_size,
-                    'modified': timestamp,
-                    'is_dir': False,
-                    'path': path
-                }
-            except KeyError:
-                pass
-               
-            # Check if it's a directory by looking for path/
-            if not is_dir:
-                try:
-                    info = self.zip_file.getinfo(norm_path + '/')
-                   
-                    # Convert DOS timestamp to Unix timestamp
-                    dos_time = info.date_time
-                    timestamp = time.mktime(datetime(*dos_time).timetuple())
-                   
-                    return {
-                        'size': 0,
-                        'compressed_size': 0,
-                        'modified': timestamp,
-                        'is_dir': True,
-                        'path': path
-                    }
-                except KeyError:
-                    pass
-           
-            # Check if any members start with this directory
-            dir_path = norm_path + '/'
-            for name in self.zip_file.namelist():
-                if name.startswith(dir_path):
-                    # It's a directory
-                    return {
-                        'size': 0,
-                        'compressed_size': 0,
-                        'modified': self.fs.files.stat(self.path).st_mtime if self.fs.files.exists(self.path) else time.time(),
-                        'is_dir': True,
-                        'path': path
-                    }
-           
-            # Check in the temporary directory if we're in write mode
-            if self.temp_dir:
-                temp_path = self.fs.dirs.join(self.temp_dir, norm_path)
-                if self.fs.files.exists(temp_path):
-                    stat = self.fs.files.stat(temp_path)
-                    return {
-                        'size': stat.st_size,
-                        'compressed_size': stat.st_size,  # Same as size for temp files
-                        'modified': stat.st_mtime,
-                        'is_dir': self.fs.dirs.is_dir(temp_path),
-                        'path': path
-                    }
-               
-                # Check if it's a directory in the temp directory
-                temp_dir_path = self.fs.dirs.join(self.temp_dir, norm_path)
-                if self.fs.dirs.is_dir(temp_dir_path):
-                    stat = self.fs.files.stat(temp_dir_path)
-                    return {
-                        'size': 0,
-                        'compressed_size': 0,
-                        'modified': stat.st_mtime,
-                        'is_dir': True,
-                        'path': path
-                    }
-           
-            # Not found
-            return None
-           
-        except Exception:
-            # Error accessing the ZIP
+        node = self.directory_tree().find(path)
+        if node is None:
             return None
+        return self._node_info(node, path)
+
+    def _node_info(self, node, path: str) -> Dict[str, Any]:
+        if node.staged:
+            # Written or created in this session: described by its staged copy
+            temp_path = os.path.join(self.temp_dir, path.rstrip('/'))
+            size = 0 if node.is_dir or not os.path.isfile(temp_path) else os.path.getsize(temp_path)
+            return {
+                'size': size,
+                'compressed_size': size,  # Same as size for temp files
+                'modified': os.path.getmtime(temp_path) if os.path.exists(temp_path) else time.time(),
+                'is_dir': node.is_dir,
+                'path': path
+            }
+        if node.member is None:
+            # A directory implied by the members below it
+            return {
+                'size': 0,
+                'compressed_size': 0,
+                'modified': self._archive_mtime(),
+                'is_dir': True,
+                'path': path
+            }
+        info = node.member
+        return {
+            'size': 0 if node.is_dir else info.file_size,
+            'compressed_size': 0 if node.is_dir else info.compress_size,
+            'modified': _dos_timestamp(info),
+            'is_dir': node.is_dir,
+            'path': path
+        }
 
     def member_exists(self, path: str) -> bool:
         """
@@ -587,12 +836,12 @@ class ZipHandler(ArchiveHandler):
             temp_path = self.fs.dirs.join(self.temp_dir, path.rstrip('/'))
             self.fs.dirs.mkdir(temp_path, create_parents=True)
            
-            # Add directory member to the ZIP
-            self.zip_file.writestr(path, '')  # Empty content for directory
-           
+            # The directory member is written from the temp directory on close
             # Mark as modified
             self.modified = True
             self.members_to_update[temp_path] = path
+            if self._tree is not None:
+                self._tree.add(path, is_dir=True, staged=True)
             return
            
         # For pure read mode
@@ -617,13 +866,15 @@ class ZipHandler(ArchiveHandler):
         # Create a sentinel file to mark for deletion
         norm_path = path.rstrip('/')
         temp_path = self.fs.dirs.join(self.temp_dir, norm_path + ".deleted")
-        self.fs.dirs.mkdir(self.fs.dirs.mkdirname(temp_path), create_parents=True)
+        self.fs.dirs.mkdir(self.fs.dirs.dirname(temp_path), create_parents=True)
         with self.fs.files.open(temp_path, 'w') as f:
             f.write("DELETED")
        
         # Mark as modified
         self.modified = True
         self.members_to_update[temp_path] = path
+        if self._tree is not None:
+            self._tree.remove(path)
         return
            
     @classmethod
@@ -0,0 +1,110 @@
+"""
+Unit tests for the ARCFS archive directory tree.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import io
+import tarfile
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core.archive_tree import ArchiveTree
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+def test_tree_creates_implicit_parents_and_prunes_on_remove():
+    tree = ArchiveTree()
+    tree.add("a/b/c.txt", member="c")
+    tree.add("a/d/", is_dir=True, member="d")
+    assert tree.list_dir("") == ["a"]
+    assert tree.list_dir("a") == ["b", "d"]
+    assert tree.find("a/b").implicit and tree.is_dir("a/b")
+    assert not tree.is_dir("a/b/c.txt")
+    assert tree.find("a/b/c.txt/x") is None
+    # An implicit directory goes with its last entry; an explicit one stays
+    assert tree.remove("a/b/c.txt")
+    assert tree.find("a/b") is None
+    assert tree.list_dir("a") == ["d"]
+    # Removing a directory's own entry keeps what is below it
+    tree.add("a/d/e.txt", member="e")
+    tree.remove("a/d")
+    assert tree.find("a/d").implicit and tree.list_dir("a/d") == ["e.txt"]
+    assert len(tree) == 3
+
+
+def test_tree_walk_is_top_down_and_prunable():
+    tree = ArchiveTree()
+    for name in ("x/1.txt", "x/y/2.txt", "z/3.txt", "top.txt"):
+        tree.add(name)
+    assert list(tree.walk("")) == [
+        ("", ["x", "z"], ["top.txt"]),
+        ("x", ["y"], ["1.txt"]),
+        ("x/y", [], ["2.txt"]),
+        ("z", [], ["3.txt"]),
+    ]
+    steps = []
+    for root, dirs, files in tree.walk(""):
+        steps.append(root)
+        if "x" in dirs:
+            dirs.remove("x")
+    assert steps == ["", "z"]
+
+
+def test_walk_zip_parses_central_directory_once(fs, tmp_path, monkeypatch):
+    from arcfs.handlers.zip_handler import ZipHandler
+    archive = str(tmp_path / "many.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(300):
+            # No directory entries: every directory is implicit
+            zf.writestr(f"d{i % 3}/s{i % 7}/f{i}.txt", str(i))
+    opens = []
+    original = ZipHandler._open_read
+
+    def counting_open_read(self):
+        opens.append(self.path)
+        return original(self)
+    monkeypatch.setattr(ZipHandler, "_open_read", counting_open_read)
+    steps = list(fs.dirs.walk(archive))
+    assert len(opens) == 1
+    assert steps[0] == (archive, ["d0", "d1", "d2"], [])
+    assert steps[1][0] == f"{archive}/d0"
+    assert sum(len(files) for _, _, files in steps) == 300
+    sub = list(fs.dirs.walk(f"{archive}/d1/s2"))
+    assert sub == [(f"{archive}/d1/s2", [], sorted(f"f{i}.txt" for i in range(300) if i % 3 == 1 and i % 7 == 2))]
+    assert fs.dirs.is_dir(f"{archive}/d2/s6")
+    assert not fs.dirs.is_dir(f"{archive}/d0/s0/f0.txt")
+    assert not fs.dirs.is_dir(f"{archive}/missing")
+    assert fs.files.get_info(f"{archive}/d0")["is_dir"]
+
+
+def test_tar_tree_overlays_staged_writes_and_deletions(fs, tmp_path):
+    from arcfs.handlers.tar_handler import TarHandler
+    archive = str(tmp_path / "data.tar")
+    with tarfile.open(archive, "w") as tf:
+        for name in ("a/one.txt", "a/two.txt", "b/three.txt"):
+            info = tarfile.TarInfo(name)
+            info.size = 3
+            tf.addfile(info, io.BytesIO(b"abc"))
+    handler = TarHandler(archive, "a", fs=fs)
+    try:
+        assert handler.list_dir("") == ["a", "b"]
+        assert handler.get_member_info("a")["is_dir"]
+        handler.write("c/new.txt", "fresh")
+        handler.remove_member("b/three.txt")
+        assert handler.list_dir("") == ["a", "c"]
+        assert handler.get_member_info("c/new.txt")["size"] == 5
+        assert list(handler.walk("")) == [("", ["a", "c"], []), ("a", [], ["one.txt", "two.txt"]),
+                                          ("c", [], ["new.txt"])]
+    finally:
+        handler.close()
+    with TarHandler(archive, "r", fs=fs) as handler:
+        assert handler.list_dir("") == ["a", "c"]
@@ -0,0 +1,101 @@
+"""
+Unit tests for the ARCFS asyncio API.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import asyncio
+import threading
+import time
+import pytest
+from arcfs import AsyncArchiveFS
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_async_files_round_trip(tmp_path):
+    archive = str(tmp_path / "data.zip")
+
+    async def main():
+        async with AsyncArchiveFS() as afs:
+            await afs.files.write(f"{archive}/a.txt", "hello")
+            await afs.dirs.mkdir(f"{archive}/sub")
+            async with await afs.files.open(f"{archive}/big.bin", "wb") as f:
+                for i in range(4):
+                    await f.write(bytes([i]) * 100000)
+            chunks = []
+            async with await afs.files.open(f"{archive}/big.bin", "rb") as f:
+                async for chunk in f:
+                    chunks.append(chunk)
+            assert b"".join(chunks) == b"".join(bytes([i]) * 100000 for i in range(4))
+            assert len(chunks) > 1
+            assert await afs.files.read(f"{archive}/a.txt") == "hello"
+            assert "sub" in await afs.dirs.list_dir(archive)
+            assert await afs.files.exists(f"{archive}/a.txt")
+    run(main())
+
+
+def test_async_text_iteration_yields_lines(tmp_path):
+    archive = str(tmp_path / "text.zip")
+    text = "first\nsecond\nthird"
+
+    async def main():
+        async with AsyncArchiveFS() as afs:
+            await afs.files.write(f"{archive}/lines.txt", text)
+            with open(str(tmp_path / "plain.txt"), "w") as f:
+                f.write(text)
+            for path in (f"{archive}/lines.txt", str(tmp_path / "plain.txt")):
+                async with await afs.files.open(path, "r") as f:
+                    lines = [line async for line in f]
+                assert lines == ["first\n", "second\n", "third"]
+    run(main())
+
+
+def test_async_batch_commits_on_exit(tmp_path):
+    archive = str(tmp_path / "batch.tar")
+
+    async def main():
+        async with AsyncArchiveFS() as afs:
+            async with afs.batch as batch:
+                for i in range(10):
+                    await batch.write(f"{archive}/f{i}.txt", str(i))
+            assert await afs.files.read(f"{archive}/f9.txt") == "9"
+    run(main())
+
+
+def test_reads_on_different_archives_overlap(tmp_path, monkeypatch):
+    from arcfs.api.files_api import FilesAPI
+    paths = [str(tmp_path / f"a{i}.zip") for i in range(3)]
+    running = []
+    peak = []
+    lock = threading.Lock()
+    original = FilesAPI.read
+
+    def slow_read(self, path, *args, **kwargs):
+        with lock:
+            running.append(path)
+            peak.append(len(running))
+        time.sleep(0.1)
+        with lock:
+            running.remove(path)
+        return original(self, path, *args, **kwargs)
+
+    async def main():
+        async with AsyncArchiveFS(max_workers=4) as afs:
+            for path in paths:
+                await afs.files.write(f"{path}/x.txt", path)
+            monkeypatch.setattr(FilesAPI, "read", slow_read)
+            results = await asyncio.gather(*(afs.files.read(f"{p}/x.txt") for p in paths))
+            assert results == paths
+            assert max(peak) == 3
+            # The same archive is limited to one operation at a time by default
+            peak.clear()
+            await asyncio.gather(*(afs.files.read(f"{paths[0]}/x.txt") for _ in range(3)))
+            assert max(peak) == 1
+    run(main())
@@ -0,0 +1,153 @@
+"""
+Unit tests for ARCFS batch sessions.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+
+
+@pytest.fixture(scope="function")
+def fs(tmp_path):
+    return ArchiveFS()
+
+
+def count_commits(monkeypatch, handler_cls, *names):
+    calls = []
+    for name in names:
+        original = getattr(handler_cls, name)
+
+        def counted(self, *args, _original=original, _name=name, **kwargs):
+            calls.append(_name)
+            return _original(self, *args, **kwargs)
+        monkeypatch.setattr(handler_cls, name, counted)
+    return calls
+
+
+def test_batch_writes_rebuild_zip_once(fs, tmp_path, monkeypatch):
+    from arcfs.handlers.zip_handler import ZipHandler
+    archive = str(tmp_path / "many.zip")
+    fs.files.write(f"{archive}/seed.txt", "seed")
+    calls = count_commits(monkeypatch, ZipHandler, "_append_changes", "_rebuild_zip")
+    with fs.batch as batch:
+        for i in range(1000):
+            batch.write(f"{archive}/d/f{i}.txt", f"file {i}")
+        # Reads inside the session see the staged data
+        assert batch.read(f"{archive}/d/f7.txt") == "file 7"
+        assert calls == []
+    assert calls == ["_append_changes"]
+    assert fs.files.read(f"{archive}/d/f999.txt") == "file 999"
+    assert fs.files.read(f"{archive}/seed.txt") == "seed"
+
+
+def test_batch_rollback_discards_changes(fs, tmp_path):
+    archive = str(tmp_path / "keep.zip")
+    fs.files.write(f"{archive}/a.txt", "original")
+    with open(archive, "rb") as f:
+        before = f.read()
+    with pytest.raises(RuntimeError):
+        with fs.batch as batch:
+            batch.write(f"{archive}/a.txt", "changed")
+            batch.write(f"{archive}/b.txt", "new")
+            raise RuntimeError("abort")
+    with open(archive, "rb") as f:
+        assert f.read() == before
+    # The failed session no longer intercepts writes
+    fs.files.write(f"{archive}/c.txt", "after")
+    assert fs.files.read(f"{archive}/c.txt") == "after"
+
+
+def test_batch_session_commits_tar_once(fs, tmp_path, monkeypatch):
+    import tarfile
+    from arcfs.handlers.tar_handler import TarHandler
+    archive = str(tmp_path / "batch.tar.gz")
+    calls = count_commits(monkeypatch, TarHandler, "_commit")
+    with fs.batch_session() as session:
+        for i in range(20):
+            session.write(f"{archive}/f{i}.bin", bytes([i]) * 100)
+        with session.open(f"{archive}/f3.bin", "rb") as f:
+            assert f.read() == b"\3" * 100
+        session.remove(f"{archive}/f0.bin")
+    assert calls == ["_commit"]
+    with tarfile.open(archive) as tf:
+        assert tf.getnames() == [f"f{i}.bin" for i in range(1, 20)]
+
+
+def test_manual_batch_commit(fs, tmp_path):
+    archive = str(tmp_path / "manual.zip")
+    batch = fs.batch
+    batch.write(f"{archive}/x.txt", "x")
+    batch.mkdir(f"{archive}/sub")
+    batch.commit()
+    assert fs.files.read(f"{archive}/x.txt") == "x"
+    with pytest.raises(RuntimeError):
+        batch.commit()
+
+
+def test_inspecting_batch_does_not_start_a_session(fs, tmp_path):
+    archive = str(tmp_path / "plain.zip")
+    assert not hasattr(fs.batch, "x")
+    fs.files.write(f"{archive}/a.txt", "a")
+    # The write reached the disk rather than a session nobody commits
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.read("a.txt") == b"a"
+
+
+def test_text_stream_left_open_is_committed(fs, tmp_path):
+    archive = str(tmp_path / "text.zip")
+    with fs.batch_session():
+        f = fs.files.open(f"{archive}/notes.txt", "w")
+        f.write("buffered text")
+    assert fs.files.read(f"{archive}/notes.txt") == "buffered text"
+
+
+def test_batch_commits_archives_in_parallel(fs, tmp_path, monkeypatch):
+    import threading
+    import time
+    from arcfs.core.global_config import GlobalConfig
+    from arcfs.handlers.zip_handler import ZipHandler
+    GlobalConfig.set("batch_commit_workers", 4)
+    threads = set()
+    original = ZipHandler.close
+
+    def slow_close(self):
+        threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return original(self)
+    monkeypatch.setattr(ZipHandler, "close", slow_close)
+    try:
+        with fs.batch as batch:
+            for shard in range(8):
+                batch.write(str(tmp_path / f"shard{shard}.zip" / "data.txt"), f"shard {shard}")
+    finally:
+        GlobalConfig.reset("batch_commit_workers")
+    assert len(threads) > 1
+    for shard in range(8):
+        assert fs.files.read(str(tmp_path / f"shard{shard}.zip" / "data.txt")) == f"shard {shard}"
+
+
+def test_batch_commit_errors_are_aggregated(fs, tmp_path, monkeypatch):
+    from arcfs.core.batch_session import BatchCommitError
+    from arcfs.handlers.zip_handler import ZipHandler
+    bad = str(tmp_path / "bad.zip")
+    original = ZipHandler.close
+
+    def failing_close(self):
+        if self.path == bad:
+            original(self)
+            raise IOError("disk full")
+        return original(self)
+    monkeypatch.setattr(ZipHandler, "close", failing_close)
+    with pytest.raises(BatchCommitError) as info:
+        with fs.batch as batch:
+            batch.write(f"{bad}/a.txt", "a")
+            batch.write(str(tmp_path / "good.zip" / "b.txt"), "b")
+    assert list(info.value.errors) == [bad]
+    assert info.value.committed == [str(tmp_path / "good.zip")]
+    assert fs.files.read(str(tmp_path / "good.zip" / "b.txt")) == "b"
@@ -127,3 +127,18 @@ def test_bzip2_multiple_open_close(temp_dir):
         # ready to read from archive using fs.files API
         with fs.files.open(path, mode="rb") as f:
             assert bz2.decompress(f.read()) == b"x" * 100
+
+def test_bzip2_handler_streams_lines(temp_dir):
+    from arcfs.handlers.bzip2_handler import Bzip2Handler
+    path = os.path.join(temp_dir, "lines.bz2")
+    fs = ArchiveFS()
+    data = b"".join(b"line %d\n" % i for i in range(50000))
+    handler = Bzip2Handler(path, mode="w", fs=fs)
+    with handler.open_entry(handler.base_name, mode="w") as f:
+        f.write(data)
+    handler = Bzip2Handler(path, mode="r", fs=fs)
+    with handler.open_entry(handler.base_name, mode="r") as f:
+        assert f.readline() == b"line 0\n"
+        assert f.tell() == 7
+        f.seek(len(data) - 8)
+        assert list(f) == [b"e 49999\n"]
@@ -0,0 +1,173 @@
+"""
+Unit tests for ARCFS parallel extraction.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import bz2
+import io
+import lzma
+import tarfile
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+def sample_files():
+    files = {f"dir{i % 5}/file{i}.txt": (f"content {i}\n" * (i + 1)).encode() for i in range(60)}
+    files["big/blob.bin"] = os.urandom(3 * 1024 * 1024 + 17)
+    files["empty.txt"] = b""
+    return files
+
+
+def check_tree(target, files):
+    for name, data in files.items():
+        with open(os.path.join(target, name), "rb") as f:
+            assert f.read() == data, name
+
+
+def test_extract_all_zip_in_parallel(fs, tmp_path):
+    files = sample_files()
+    archive = str(tmp_path / "data.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("only_dir/", b"")
+        for name, data in files.items():
+            zf.writestr(name, data)
+    reports = []
+    result = fs.archives.extract_all(archive, str(tmp_path / "out"), workers=4, progress=reports.append)
+    check_tree(str(tmp_path / "out"), files)
+    assert os.path.isdir(tmp_path / "out" / "only_dir")
+    assert result.files_done == result.files_total == len(files)
+    assert result.bytes_done == sum(len(d) for d in files.values())
+    assert reports[-1] == result
+
+
+@pytest.mark.parametrize("ext,mode", [(".tar", "w"), (".tar.gz", "w:gz"), (".tar.xz", "w:xz")])
+def test_extract_all_tar_streams_to_writer_pool(fs, tmp_path, ext, mode):
+    files = sample_files()
+    archive = str(tmp_path / f"data{ext}")
+    with tarfile.open(archive, mode) as tf:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        link = tarfile.TarInfo("links/to_blob")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "../big/blob.bin"
+        tf.addfile(link)
+    result = fs.archives.extract_all(archive, str(tmp_path / "out"), workers=3)
+    check_tree(str(tmp_path / "out"), files)
+    with open(tmp_path / "out" / "links" / "to_blob", "rb") as f:
+        assert f.read() == files["big/blob.bin"]
+    assert result.files_done == len(files) + 1
+
+
+def test_extract_all_skips_unsafe_names(fs, tmp_path):
+    archive = str(tmp_path / "evil.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("../escape.txt", b"x")
+        zf.writestr("safe.txt", b"y")
+    fs.archives.extract_all(archive, str(tmp_path / "out"))
+    assert not (tmp_path / "escape.txt").exists()
+    assert (tmp_path / "out" / "safe.txt").read_bytes() == b"y"
+
+
+def test_extract_all_nested_archive(fs, tmp_path):
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as zf:
+        zf.writestr("a/b.txt", "nested")
+    outer = str(tmp_path / "outer.zip")
+    with zipfile.ZipFile(outer, "w") as zf:
+        zf.writestr("inner.zip", inner.getvalue())
+    fs.archives.extract_all(f"{outer}/inner.zip", str(tmp_path / "out"))
+    assert (tmp_path / "out" / "a" / "b.txt").read_text() == "nested"
+
+
+@pytest.mark.parametrize("module, ext", [(bz2, ".tar.bz2"), (lzma, ".tar.xz")])
+def test_extract_all_tar_of_concatenated_streams(fs, tmp_path, module, ext):
+    plain = io.BytesIO()
+    with tarfile.open(fileobj=plain, mode="w") as tf:
+        for i in range(6):
+            data = os.urandom(100 * 1024)
+            info = tarfile.TarInfo(f"f{i}.bin")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    raw = plain.getvalue()
+    archive = str(tmp_path / f"multi{ext}")
+    # Compressed in independent pieces, as pbzip2, pixz and compress_dir write them
+    with open(archive, "wb") as f:
+        for start in range(0, len(raw), 128 * 1024):
+            f.write(module.compress(raw[start:start + 128 * 1024]))
+    out = str(tmp_path / "out")
+    fs.archives.extract_all(archive, out)
+    with tarfile.open(archive) as tf:
+        for member in tf.getmembers():
+            with open(os.path.join(out, member.name), "rb") as f:
+                assert f.read() == tf.extractfile(member).read()
+
+
+def test_extract_all_tar_last_member_of_a_name_wins(fs, tmp_path):
+    archive = str(tmp_path / "dups.tar")
+    with tarfile.open(archive, "w") as tf:
+        for data in (b"x" * (8 * 1024 * 1024), b"ten bytes!"):
+            info = tarfile.TarInfo("x.bin")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        info = tarfile.TarInfo(".arcfs-deleted")
+        info.size = 3
+        tf.addfile(info, io.BytesIO(b"old"))
+    out = str(tmp_path / "out")
+    fs.archives.extract_all(archive, out, workers=4)
+    with open(os.path.join(out, "x.bin"), "rb") as f:
+        assert f.read() == b"ten bytes!"
+    assert not os.path.exists(os.path.join(out, ".arcfs-deleted"))
+
+
+def test_extract_all_tar_restores_modes_and_mtimes(fs, tmp_path):
+    archive = str(tmp_path / "meta.tar.gz")
+    with tarfile.open(archive, "w:gz") as tf:
+        info = tarfile.TarInfo("bin")
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o750
+        info.mtime = 1000000000
+        tf.addfile(info)
+        for name, mode, mtime in (("bin/run.sh", 0o755, 1200000000), ("bin/notes.txt", 0o600, 1300000000)):
+            data = os.urandom(300 * 1024)
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = mode
+            info.mtime = mtime
+            tf.addfile(info, io.BytesIO(data))
+    out = str(tmp_path / "out")
+    fs.archives.extract_all(archive, out, workers=4)
+    for name, mode, mtime in (("bin", 0o750, 1000000000), ("bin/run.sh", 0o755, 1200000000),
+                              ("bin/notes.txt", 0o600, 1300000000)):
+        st = os.stat(os.path.join(out, name))
+        assert st.st_mode & 0o7777 == mode, name
+        assert int(st.st_mtime) == mtime, name
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc/self/fd")
+def test_extract_all_truncated_tar_closes_outputs(fs, tmp_path):
+    plain = io.BytesIO()
+    with tarfile.open(fileobj=plain, mode="w") as tf:
+        data = os.urandom(4 * 1024 * 1024)
+        info = tarfile.TarInfo("big.bin")
+        info.size = len(data)
+        tf.addfile(info, io.BytesIO(data))
+    archive = str(tmp_path / "cut.tar")
+    with open(archive, "wb") as f:
+        f.write(plain.getvalue()[:2 * 1024 * 1024])
+    before = len(os.listdir("/proc/self/fd"))
+    with pytest.raises(tarfile.ReadError):
+        fs.archives.extract_all(archive, str(tmp_path / "out"), workers=2)
+    assert len(os.listdir("/proc/self/fd")) == before
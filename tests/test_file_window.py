@@ -0,0 +1,104 @@
+"""
+Unit tests for ARCFS file windows and nested archive access.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import io
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import shutil
+import tarfile
+import tempfile
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core.file_window import FileWindow
+
+
+@pytest.fixture(scope="function")
+def temp_dir():
+    d = tempfile.mkdtemp()
+    yield d
+    shutil.rmtree(d)
+
+
+def test_window_read_seek(temp_dir):
+    path = os.path.join(temp_dir, 'data.bin')
+    with open(path, 'wb') as f:
+        f.write(b'0123456789')
+    with FileWindow.from_path(path, 2, 5) as window:
+        assert window.size == 5
+        assert window.read() == b'23456'
+        window.seek(-2, io.SEEK_END)
+        assert window.read(10) == b'56'
+        assert window.read_at(1, 2) == b'34'
+        assert window.tell() == 5
+
+
+def test_subwindow_is_flattened(temp_dir):
+    path = os.path.join(temp_dir, 'data.bin')
+    with open(path, 'wb') as f:
+        f.write(b'abcdefghij')
+    outer = FileWindow.from_path(path, 1, 8)
+    inner = outer.subwindow(2, 3)
+    outer.close()
+    assert inner.offset == 3
+    assert inner.read() == b'def'
+    inner.close()
+
+
+def test_window_over_file_object():
+    window = FileWindow(io.BytesIO(b'hello world'), 6)
+    assert window.read() == b'world'
+
+
+def _zip_bytes(compression):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', compression) as zf:
+        zf.writestr('file.txt', 'nested content')
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("outer_name", ['outer.tar', 'outer.tar.gz'])
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_read_zip_nested_in_tar(temp_dir, outer_name, compression):
+    outer = os.path.join(temp_dir, outer_name)
+    data = _zip_bytes(compression)
+    with tarfile.open(outer, 'w:gz' if outer_name.endswith('.gz') else 'w') as tf:
+        info = tarfile.TarInfo('folder/nested.zip')
+        info.size = len(data)
+        tf.addfile(info, io.BytesIO(data))
+    fs = ArchiveFS()
+    path = f"{outer}/folder/nested.zip/file.txt"
+    with fs.files.open(path, 'r') as f:
+        assert f.read() == 'nested content'
+    assert fs.files.exists(path)
+    assert not fs.files.exists(f"{outer}/folder/nested.zip/missing.txt")
+    assert fs.dirs.list_dir(f"{outer}/folder/nested.zip") == ['file.txt']
+
+
+def test_stored_nested_member_is_window(temp_dir):
+    tar_buf = io.BytesIO()
+    with tarfile.open(fileobj=tar_buf, mode='w') as tf:
+        info = tarfile.TarInfo('deep.txt')
+        info.size = 4
+        tf.addfile(info, io.BytesIO(b'deep'))
+    outer = os.path.join(temp_dir, 'outer.zip')
+    with zipfile.ZipFile(outer, 'w') as zf:
+        zf.writestr('inner.tar', tar_buf.getvalue())
+    fs = ArchiveFS()
+    with fs.files.open(f"{outer}/inner.tar/deep.txt", 'rb') as f:
+        assert isinstance(f, FileWindow)
+        assert f.read() == b'deep'
+
+
+def test_write_into_nested_archive_not_supported(temp_dir):
+    outer = os.path.join(temp_dir, 'outer.zip')
+    with zipfile.ZipFile(outer, 'w') as zf:
+        zf.writestr('inner.zip', _zip_bytes(zipfile.ZIP_STORED))
+    fs = ArchiveFS()
+    with pytest.raises(NotImplementedError):
+        fs.files.open(f"{outer}/inner.zip/new.txt", 'w')
@@ -0,0 +1,82 @@
+"""
+Unit tests for ARCFS glob.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import io
+import tarfile
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+def touch(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def make_tar_gz(path, names):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tarfile.open(path, "w:gz") as tf:
+        for name in names:
+            info = tarfile.TarInfo(name)
+            info.size = 1
+            tf.addfile(info, io.BytesIO(b"x"))
+
+
+def test_star_stays_in_one_component_and_double_star_recurses(fs, tmp_path):
+    root = str(tmp_path)
+    for name in ("a.txt", "sub/b.txt", "sub/deep/c.txt", "sub/deep/d.log"):
+        touch(os.path.join(root, name))
+    assert fs.dirs.glob(f"{root}/*.txt") == [f"{root}/a.txt"]
+    assert fs.dirs.glob(f"{root}/s?b/*.txt") == [f"{root}/sub/b.txt"]
+    assert sorted(fs.dirs.glob(f"{root}/**/*.txt")) == [f"{root}/a.txt", f"{root}/sub/b.txt", f"{root}/sub/deep/c.txt"]
+    assert fs.dirs.glob(f"{root}/sub/deep/[cd].*") == [f"{root}/sub/deep/c.txt", f"{root}/sub/deep/d.log"]
+    assert fs.dirs.glob(f"{root}/sub/deep/c.txt") == [f"{root}/sub/deep/c.txt"]
+    assert fs.dirs.glob(f"{root}/missing/*.txt") == []
+
+
+def test_glob_inside_archives_matches_against_the_index(fs, tmp_path):
+    root = str(tmp_path)
+    archive = os.path.join(root, "pkg", "app.zip")
+    os.makedirs(os.path.dirname(archive))
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("config/main.ini", "a")
+        zf.writestr("config/extra.ini", "b")
+        zf.writestr("config/notes.txt", "c")
+        zf.writestr("lib/x/config/other.ini", "d")
+    assert fs.dirs.glob(f"{root}/**/*.zip/config/*.ini") == [
+        f"{archive}/config/extra.ini", f"{archive}/config/main.ini"]
+    assert fs.dirs.glob(f"{archive}/**/config/*.ini") == [
+        f"{archive}/config/extra.ini", f"{archive}/config/main.ini", f"{archive}/lib/x/config/other.ini"]
+    # '**' on its own does not enter archives
+    assert fs.dirs.glob(f"{root}/**/*.ini") == []
+
+
+def test_glob_opens_only_archives_whose_names_match(fs, tmp_path, monkeypatch):
+    from arcfs.handlers.tar_handler import TarHandler
+    root = str(tmp_path)
+    for i in range(40):
+        make_tar_gz(os.path.join(root, f"group{i % 4}", f"pkg{i}.tar.gz"), ["config/app.ini", "data/blob.bin"])
+    opened = []
+    original = TarHandler._open_archive
+
+    def counting_open(self):
+        opened.append(os.path.basename(self.path))
+        return original(self)
+    monkeypatch.setattr(TarHandler, "_open_archive", counting_open)
+    found = fs.dirs.glob(f"{root}/**/pkg1?.tar.gz/config/*.ini")
+    assert found == [os.path.join(root, f"group{i % 4}", f"pkg{i}.tar.gz") + "/config/app.ini"
+                     for i in sorted(range(10, 20), key=lambda i: (i % 4, str(i)))]
+    assert sorted(opened) == sorted(f"pkg{i}.tar.gz" for i in range(10, 20))
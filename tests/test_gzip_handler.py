@@ -128,3 +128,42 @@ def test_gzip_multiple_open_close(temp_dir):
         handler = GzipHandler(path, mode="r", fs=fs)
         with handler.open_entry(handler.base_name, mode="r") as f:
             assert f.read() == b"x" * 100
+
+def test_gzip_streaming_lines_and_positions(temp_dir):
+    path = os.path.join(temp_dir, "lines.gz")
+    fs = DummyFS(temp_dir)
+    data = b"".join(b"line %d\n" % i for i in range(50000))
+    handler = GzipHandler(path, mode="w", fs=fs)
+    with handler.open_entry(handler.base_name, mode="w") as f:
+        f.write(data)
+    handler = GzipHandler(path, mode="r", fs=fs)
+    with handler.open_entry(handler.base_name, mode="r") as f:
+        assert f.readline() == b"line 0\n"
+        assert f.tell() == 7
+        f.seek(len(data) - 8)
+        assert list(f) == [b"e 49999\n"]
+        f.seek(7)
+        buf = bytearray(7)
+        assert f.readinto(buf) == 7
+        assert bytes(buf) == b"line 1\n"
+
+def test_gzip_failed_write_leaves_target_intact(temp_dir, monkeypatch):
+    import gzip
+    path = os.path.join(temp_dir, "keep.gz")
+    with gzip.open(path, "wb") as f:
+        f.write(b"original")
+    fs = DummyFS(temp_dir)
+
+    def failing_copy(src, dst, length=0):
+        dst.write(b"partial")
+        raise OSError("disk full")
+    monkeypatch.setattr("arcfs.handlers.gzip_handler.shutil.copyfileobj", failing_copy)
+    for mode in ("w", "a"):
+        handler = GzipHandler(path, mode=mode, fs=fs)
+        f = handler.open_entry(handler.base_name, mode=mode)
+        f.write(b"new data")
+        with pytest.raises(IOError):
+            f.close()
+        with gzip.open(path, "rb") as f:
+            assert f.read() == b"original"
+    assert sorted(os.listdir(temp_dir)) == ["keep.gz"]
@@ -0,0 +1,108 @@
+"""
+Unit tests for the ARCFS gzip seek checkpoint index.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import gzip
+import io
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import random
+import shutil
+import tarfile
+import tempfile
+import zlib
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core.gzip_index import GzipCheckpoint, GzipIndex, IndexedGzipReader
+
+SPACING = 256 * 1024
+
+
+@pytest.fixture(scope="function")
+def temp_dir():
+    d = tempfile.mkdtemp()
+    yield d
+    shutil.rmtree(d)
+
+
+def sample_data(lines=100000):
+    rng = random.Random(7)
+    return b''.join(b'%d %f\n' % (i, rng.random()) for i in range(lines))
+
+
+def sync_flushed_gzip(data, block=64 * 1024):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    parts = []
+    for i in range(0, len(data), block):
+        parts.append(compressor.compress(data[i:i + block]))
+        parts.append(compressor.flush(zlib.Z_SYNC_FLUSH))
+    parts.append(compressor.flush())
+    return b''.join(parts)
+
+
+def test_random_seeks_match_data(temp_dir):
+    data = sample_data()
+    path = os.path.join(temp_dir, 'data.gz')
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(data))
+    index = GzipIndex.for_file(path, SPACING)
+    with IndexedGzipReader(path, index=index, persist=False) as reader:
+        assert reader.read() == data
+        assert index.size == len(data)
+        assert any(c.kind == GzipCheckpoint.STATE for c in index.checkpoints)
+        rng = random.Random(1)
+        for _ in range(30):
+            offset = rng.randrange(len(data))
+            reader.seek(offset)
+            assert reader.read(1000) == data[offset:offset + 1000]
+
+
+def test_multi_member_stream(temp_dir):
+    path = os.path.join(temp_dir, 'multi.gz')
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(b'first-') + gzip.compress(b'second'))
+    with IndexedGzipReader(path, persist=False) as reader:
+        assert reader.seek(0, io.SEEK_END) == 12
+        reader.seek(4)
+        assert reader.read() == b't-second'
+        kinds = [c.kind for c in reader.index.checkpoints]
+        assert kinds.count(GzipCheckpoint.MEMBER) == 2
+
+
+def test_sync_points_are_persisted_and_validated(temp_dir):
+    data = sample_data()
+    path = os.path.join(temp_dir, 'sync.gz')
+    with open(path, 'wb') as f:
+        f.write(sync_flushed_gzip(data))
+    index = GzipIndex.build(path, SPACING, save=True)
+    assert any(c.kind == GzipCheckpoint.SYNC for c in index.checkpoints)
+    loaded = GzipIndex.load(path)
+    assert loaded is not None
+    assert loaded.size == len(data)
+    assert all(c.persistable for c in loaded.checkpoints)
+    with IndexedGzipReader(path, persist=False) as reader:
+        offset = len(data) - 5000
+        reader.seek(offset)
+        assert reader.read(100) == data[offset:offset + 100]
+    # Any change to the archive makes the saved index stale
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(b'x'))
+    assert GzipIndex.load(path) is None
+
+
+def test_tar_gz_member_reads(temp_dir):
+    path = os.path.join(temp_dir, 'logs.tar.gz')
+    contents = {f'logs/{i}.log': (b'entry %d\n' % i) * 2000 for i in range(20)}
+    with tarfile.open(path, 'w:gz') as tf:
+        for name, payload in contents.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            tf.addfile(info, io.BytesIO(payload))
+    fs = ArchiveFS()
+    for name in reversed(list(contents)):
+        with fs.files.open(os.path.join(path, name), 'rb') as f:
+            assert f.read() == contents[name]
@@ -0,0 +1,180 @@
+"""
+Unit tests for the ARCFS handler pool.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import io
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core.handler_pool import HandlerPool, stat_key
+
+
+class FakeHandler:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStream:
+    def __init__(self):
+        self.closed = False
+
+
+@pytest.fixture(scope="function")
+def temp_dir():
+    d = tempfile.mkdtemp()
+    yield d
+    shutil.rmtree(d)
+
+
+def make_file(temp_dir, name, data=b'data'):
+    path = os.path.join(temp_dir, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_pool_reuses_handler(temp_dir):
+    path = make_file(temp_dir, 'a.zip')
+    pool = HandlerPool(max_open=4)
+    first = pool.acquire(path, lambda: FakeHandler(path))
+    pool.release(first)
+    second = pool.acquire(path, lambda: FakeHandler(path))
+    pool.release(second)
+    assert first is second
+    assert pool.stats()['hits'] == 1
+    assert pool.stats()['misses'] == 1
+
+
+def test_pool_lru_eviction(temp_dir):
+    paths = [make_file(temp_dir, f'{i}.zip') for i in range(3)]
+    pool = HandlerPool(max_open=2)
+    handlers = []
+    for path in paths:
+        handler = pool.acquire(path, lambda p=path: FakeHandler(p))
+        pool.release(handler)
+        handlers.append(handler)
+    assert len(pool) == 2
+    assert handlers[0].closed
+    assert not handlers[1].closed and not handlers[2].closed
+
+
+def test_pool_does_not_evict_handler_with_open_stream(temp_dir):
+    paths = [make_file(temp_dir, f'{i}.zip') for i in range(2)]
+    pool = HandlerPool(max_open=1)
+    first = pool.acquire(paths[0], lambda: FakeHandler(paths[0]))
+    stream = FakeStream()
+    pool.track_stream(first, stream)
+    pool.release(first)
+    second = pool.acquire(paths[1], lambda: FakeHandler(paths[1]))
+    pool.release(second)
+    assert not first.closed
+    stream.closed = True
+    third = pool.acquire(paths[1], lambda: FakeHandler(paths[1]))
+    pool.release(third)
+    assert first.closed
+
+
+def test_pool_invalidates_on_change(temp_dir):
+    path = make_file(temp_dir, 'a.zip')
+    pool = HandlerPool()
+    first = pool.acquire(path, lambda: FakeHandler(path))
+    pool.release(first)
+    old_key = stat_key(path)
+    with open(path, 'ab') as f:
+        f.write(b'more')
+    assert stat_key(path) != old_key
+    second = pool.acquire(path, lambda: FakeHandler(path))
+    pool.release(second)
+    assert second is not first
+    assert first.closed
+
+
+def test_pool_invalidate_defers_busy_handler(temp_dir):
+    path = make_file(temp_dir, 'a.zip')
+    pool = HandlerPool()
+    handler = pool.acquire(path, lambda: FakeHandler(path))
+    pool.invalidate(path)
+    assert not handler.closed
+    pool.release(handler)
+    assert handler.closed
+    assert len(pool) == 0
+
+
+def test_stream_provider_reuses_zip_handler(temp_dir):
+    path = os.path.join(temp_dir, 'test.zip')
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('a.txt', b'alpha')
+        zf.writestr('b.txt', b'beta')
+    fs = ArchiveFS()
+    with fs.files.open(os.path.join(path, 'a.txt'), 'rb') as f:
+        assert f.read() == b'alpha'
+    with fs.files.open(os.path.join(path, 'b.txt'), 'rb') as f:
+        assert f.read() == b'beta'
+    stats = fs._stream_provider.pool.stats()
+    assert stats['open'] == 1
+    assert stats['hits'] >= 1
+
+
+def test_pool_gives_each_thread_its_own_unsafe_handler(temp_dir):
+    path = make_file(temp_dir, 'a.tar')
+    pool = HandlerPool(max_open=8)
+
+    class UnsafeHandler(FakeHandler):
+        thread_safe = False
+
+    first = pool.acquire(path, lambda: UnsafeHandler(path))
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.acquire(path, lambda: UnsafeHandler(path))))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+    # The same thread shares its own lease, and a released handler is reused by anyone
+    assert pool.acquire(path, lambda: UnsafeHandler(path)) is first
+    pool.release(first)
+    pool.release(first)
+    pool.release(other[0])
+    assert pool.acquire(path, lambda: UnsafeHandler(path)) in (first, other[0])
+
+
+def test_concurrent_tar_gz_reads(temp_dir):
+    path = os.path.join(temp_dir, 'members.tar.gz')
+    expected = {f"m{i}.txt": (f"member{i}-" * (2000 + i * 37)).encode() for i in range(40)}
+    with tarfile.open(path, 'w:gz') as tf:
+        for name, data in expected.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    fs = ArchiveFS()
+    errors = []
+
+    def reader(start):
+        for _ in range(3):
+            for i in range(start % 5, 40, 8):
+                name = f"m{i}.txt"
+                try:
+                    with fs.files.open(f"{path}/{name}", 'rb') as f:
+                        if f.read() != expected[name]:
+                            errors.append(name)
+                except Exception as e:
+                    errors.append(repr(e))
+
+    threads = [threading.Thread(target=reader, args=(t,)) for t in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
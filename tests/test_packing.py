@@ -0,0 +1,97 @@
+"""
+Unit tests for ARCFS parallel archive creation.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import bz2
+import lzma
+import tarfile
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core import packing
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+def make_tree(root):
+    files = {f"dir{i % 4}/sub/file{i}.txt": (f"line {i}\n" * (i * 50 + 1)).encode() for i in range(40)}
+    # Spans several compression blocks, with a compressible tail
+    files["big/blob.bin"] = os.urandom(2 * 1024 * 1024 + 5) + b"z" * 300000
+    files["empty.txt"] = b""
+    for name, data in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    os.makedirs(os.path.join(root, "empty_dir"))
+    return files
+
+
+def test_compress_dir_zip_is_valid_and_ordered(fs, tmp_path):
+    source = str(tmp_path / "src")
+    files = make_tree(source)
+    archive = str(tmp_path / "out.zip")
+    reports = []
+    # A tiny memory budget forces the feeder to wait for the writer
+    result = packing.pack_zip(source, archive, workers=4, progress=reports.append, max_memory=64 * 1024)
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        names = zf.namelist()
+        for name, data in files.items():
+            assert zf.read(name) == data, name
+        assert "empty_dir/" in names
+        assert zf.getinfo("big/blob.bin").compress_type == zipfile.ZIP_DEFLATED
+    assert names == sorted(names, key=lambda n: n.rstrip("/").split("/"))
+    assert result.bytes_done == sum(len(d) for d in files.values())
+    assert reports[-1] == result
+
+
+@pytest.mark.parametrize("ext", [".tar", ".tar.gz", ".tar.bz2", ".tar.xz"])
+def test_compress_dir_tar_round_trips(fs, tmp_path, ext, monkeypatch):
+    # Small streams, so bzip2 and xz output is several concatenated streams
+    monkeypatch.setattr(packing, "_STREAM_CHUNK", 256 * 1024)
+    source = str(tmp_path / "src")
+    files = make_tree(source)
+    archive = str(tmp_path / f"out{ext}")
+    fs.archives.compress_dir(source, archive, workers=3)
+    decompressor = {".tar.bz2": bz2.BZ2Decompressor, ".tar.xz": lzma.LZMADecompressor}.get(ext)
+    if decompressor is not None:
+        # Data left over after the first stream means more streams follow
+        first = decompressor()
+        first.decompress(open(archive, "rb").read())
+        assert first.eof and first.unused_data
+    with tarfile.open(archive) as tf:
+        for name, data in files.items():
+            assert tf.extractfile(name).read() == data, name
+        assert tf.getmember("empty_dir").isdir()
+    out = str(tmp_path / "back")
+    fs.archives.extract_all(archive, out)
+    assert open(os.path.join(out, "big/blob.bin"), "rb").read() == files["big/blob.bin"]
+
+
+def test_compress_dir_replaces_existing_archive_and_is_readable_through_fs(fs, tmp_path):
+    source = str(tmp_path / "src")
+    files = make_tree(source)
+    archive = str(tmp_path / "out.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("stale.txt", "old")
+    assert fs.files.read(f"{archive}/stale.txt") == "old"
+    fs.archives.compress_dir(source, archive)
+    assert not fs.files.exists(f"{archive}/stale.txt")
+    assert fs.files.read(f"{archive}/dir1/sub/file1.txt") == files["dir1/sub/file1.txt"].decode()
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_compress_dir_rejects_missing_source(fs, tmp_path):
+    with pytest.raises(NotADirectoryError):
+        fs.archives.compress_dir(str(tmp_path / "missing"), str(tmp_path / "out.zip"))
+    assert not os.path.exists(tmp_path / "out.zip")
@@ -0,0 +1,54 @@
+"""
+Unit tests for ARCFS parallel gzip compression.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import gzip
+import io
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import random
+import pytest
+from arcfs.core.gzip_index import GzipCheckpoint, GzipIndex, IndexedGzipReader
+from arcfs.core.parallel_deflate import ParallelGzipWriter
+
+
+def sample_data(lines=50000):
+    rng = random.Random(11)
+    return b''.join(b'%d %f\n' % (i, rng.random()) for i in range(lines))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_output_is_one_valid_gzip_member(workers):
+    data = sample_data()
+    out = io.BytesIO()
+    with ParallelGzipWriter(out, workers=workers, block_size=64 * 1024) as writer:
+        for i in range(0, len(data), 10000):
+            writer.write(data[i:i + 10000])
+    compressed = out.getvalue()
+    assert gzip.decompress(compressed) == data
+    # Dictionary priming keeps the ratio close to a single zlib stream
+    assert len(compressed) < len(gzip.compress(data)) * 1.05
+
+
+def test_empty_input():
+    out = io.BytesIO()
+    ParallelGzipWriter(out, workers=2).close()
+    assert gzip.decompress(out.getvalue()) == b''
+
+
+def test_block_boundaries_feed_gzip_index():
+    data = sample_data()
+    out = io.BytesIO()
+    index = GzipIndex(spacing=128 * 1024)
+    with ParallelGzipWriter(out, workers=3, block_size=64 * 1024, index=index) as writer:
+        writer.write(data)
+    assert index.size == len(data)
+    assert index.checkpoints and all(c.kind == GzipCheckpoint.SYNC for c in index.checkpoints)
+    with IndexedGzipReader(io.BytesIO(out.getvalue()), index=index) as reader:
+        offset = len(data) - 1234
+        reader.seek(offset)
+        assert reader.read() == data[offset:]
@@ -16,3 +16,67 @@ from pathlib import Path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from arcfs import ArchiveFS
+from arcfs.core.path_resolver import PathResolver
+from arcfs.core.handler_manager import HandlerManager
+from arcfs.core.utils import SuffixMatcher, get_archive_format, is_archive_format
+
+
+class DummyHandler:
+    pass
+
+
+class TestSuffixMatcher(unittest.TestCase):
+    def test_longest_suffix_wins(self):
+        matcher = SuffixMatcher({'.gz', '.tar.gz', '.tar'})
+        self.assertEqual(matcher.match('backup.TAR.GZ'), '.tar.gz')
+        self.assertEqual(matcher.match('notes.gz'), '.gz')
+        self.assertEqual(matcher.match('notes.txt'), '')
+        self.assertEqual(matcher.match(''), '')
+
+    def test_archive_format_helpers(self):
+        self.assertTrue(is_archive_format('data.zip'))
+        self.assertEqual(get_archive_format('data.tar.bz2'), '.tar.bz2')
+        self.assertFalse(is_archive_format('data.txt'))
+
+
+class TestPathResolver(unittest.TestCase):
+    def test_resolve_archive_path(self):
+        info = PathResolver().resolve('/tmp/data/archive.tar.gz/dir/file.txt')
+        self.assertEqual(info.physical_path, '/tmp/data/archive.tar.gz')
+        self.assertEqual(info.archive_components, ('dir', 'file.txt'))
+        self.assertEqual(info.get_entry_path(), 'dir/file.txt')
+
+    def test_resolve_plain_path(self):
+        info = PathResolver().resolve('relative/file.txt')
+        self.assertEqual(info.physical_path, 'relative/file.txt')
+        self.assertEqual(info.archive_components, ())
+
+    def test_resolve_is_cached(self):
+        resolver = PathResolver()
+        first = resolver.resolve('/tmp/a.zip/x.txt')
+        second = resolver.resolve('/tmp/a.zip/x.txt')
+        self.assertIs(first, second)
+        self.assertEqual(resolver.hits, 1)
+
+    def test_cache_is_bounded(self):
+        resolver = PathResolver(cache_size=2)
+        for name in ('a', 'b', 'c'):
+            resolver.resolve(f'/tmp/{name}.zip/x')
+        self.assertEqual(len(resolver._cache), 2)
+        self.assertNotIn('/tmp/a.zip/x', resolver._cache)
+
+    def test_registration_rebuilds_matcher(self):
+        resolver = PathResolver()
+        self.assertEqual(resolver.resolve('/tmp/a.arcfstest/x').archive_components, ())
+        HandlerManager.register_handler('.arcfstest', DummyHandler)
+        try:
+            self.assertIs(HandlerManager.get_handler_for_path('/tmp/a.arcfstest'), DummyHandler)
+            self.assertEqual(resolver.resolve('/tmp/a.arcfstest/x').archive_components, ('x',))
+        finally:
+            HandlerManager.deregister_handler('.arcfstest')
+        self.assertIsNone(HandlerManager.get_handler_for_path('/tmp/a.arcfstest'))
+        self.assertEqual(resolver.resolve('/tmp/a.arcfstest/x').archive_components, ())
+
+
+if __name__ == '__main__':
+    unittest.main()
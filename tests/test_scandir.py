@@ -0,0 +1,94 @@
+"""
+Unit tests for ARCFS scandir.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import io
+import stat
+import tarfile
+import time
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+@pytest.fixture
+def sample_zip(tmp_path):
+    archive = str(tmp_path / "sample.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("docs/readme.txt", "hello " * 100)
+        zf.writestr("docs/img/logo.bin", b"\x00" * 10)
+        zf.writestr(zipfile.ZipInfo("docs/empty/", (2020, 5, 17, 12, 0, 0)), b"")
+        zf.writestr("top.txt", "top")
+    return archive
+
+
+def test_scandir_zip_entries_carry_listing_stat(fs, sample_zip, monkeypatch):
+    from arcfs.api.files_api import FilesAPI
+
+    def no_get_info(*args, **kwargs):
+        raise AssertionError("scandir must not call get_info")
+    monkeypatch.setattr(FilesAPI, "get_info", no_get_info)
+    with fs.dirs.scandir(f"{sample_zip}/docs") as it:
+        entries = {e.name: e for e in it}
+    assert sorted(entries) == ["empty", "img", "readme.txt"]
+    readme = entries["readme.txt"]
+    assert readme.is_file() and not readme.is_dir()
+    assert readme.path == f"{sample_zip}/docs/readme.txt"
+    assert readme.size == 600
+    assert 0 < readme.compressed_size < readme.size
+    assert stat.S_ISREG(readme.stat().st_mode) and readme.stat().st_size == 600
+    assert entries["img"].is_dir() and entries["empty"].is_dir()
+    assert entries["empty"].mtime == time.mktime((2020, 5, 17, 12, 0, 0, 0, 0, -1))
+    assert stat.S_ISDIR(entries["img"].stat().st_mode)
+    assert [e.name for e in fs.dirs.scandir(sample_zip)] == ["docs", "top.txt"]
+
+
+def test_scandir_is_lazy_and_errors_eagerly(fs, sample_zip, tmp_path):
+    it = fs.dirs.scandir(sample_zip)
+    first = next(it)
+    assert first.name == "docs"
+    it.close()
+    with pytest.raises(StopIteration):
+        next(it)
+    with pytest.raises(FileNotFoundError):
+        fs.dirs.scandir(str(tmp_path / "missing.zip") + "/docs")
+    with pytest.raises(NotADirectoryError):
+        fs.dirs.scandir(str(tmp_path / "nothing_here"))
+
+
+def test_scandir_physical_and_tar(fs, tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "file.txt").write_text("abc")
+    archive = str(tmp_path / "data.tar.gz")
+    with tarfile.open(archive, "w:gz") as tf:
+        info = tarfile.TarInfo("a/b.txt")
+        info.size = 4
+        info.mtime = 1600000000
+        tf.addfile(info, io.BytesIO(b"data"))
+    entries = {e.name: e for e in fs.dirs.scandir(str(tmp_path))}
+    assert entries["sub"].is_dir() and entries["file.txt"].size == 3
+    assert entries["file.txt"].path == os.path.join(str(tmp_path), "file.txt")
+    (entry,) = list(fs.dirs.scandir(f"{archive}/a"))
+    assert (entry.name, entry.size, entry.mtime, entry.compressed_size) == ("b.txt", 4, 1600000000, 4)
+    (parent,) = list(fs.dirs.scandir(archive))
+    assert parent.name == "a" and parent.is_dir()
+
+
+def test_walk_archive_is_built_on_scandir_and_prunable(fs, sample_zip):
+    roots = []
+    for root, dirs, files in fs.dirs.walk(sample_zip):
+        roots.append(root)
+        if "img" in dirs:
+            dirs.remove("img")
+    assert roots == [sample_zip, f"{sample_zip}/docs", f"{sample_zip}/docs/empty"]
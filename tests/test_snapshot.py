@@ -0,0 +1,128 @@
+"""
+Unit tests for ARCFS transaction snapshots.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core import snapshot
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+@pytest.fixture(params=["reflink", "hardlink"])
+def link_mode(request, monkeypatch):
+    if request.param == "hardlink":
+        monkeypatch.setattr(snapshot, "_reflink", lambda src, dst: False)
+    return request.param
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_transaction_rolls_back_inplace_append(fs, tmp_path, link_mode):
+    archive = str(tmp_path / "data.zip")
+    fs.files.write(f"{archive}/a.txt", "original")
+    before = read_bytes(archive)
+    with pytest.raises(RuntimeError):
+        with fs.files.transaction([archive]):
+            fs.files.write(f"{archive}/b.txt", "new")
+            assert fs.files.read(f"{archive}/b.txt") == "new"
+            raise RuntimeError("abort")
+    assert read_bytes(archive) == before
+    assert fs.files.read(f"{archive}/a.txt") == "original"
+    assert sorted(os.listdir(tmp_path)) == ["data.zip"]
+
+
+def test_transaction_commit_keeps_changes(fs, tmp_path, link_mode):
+    archive = str(tmp_path / "data.tar.gz")
+    fs.files.write(f"{archive}/a.txt", "original")
+    with fs.files.transaction([f"{archive}/a.txt"]):
+        fs.files.write(f"{archive}/a.txt", "changed")
+    assert fs.files.read(f"{archive}/a.txt") == "changed"
+    assert sorted(os.listdir(tmp_path)) == ["data.tar.gz"]
+
+
+@pytest.mark.parametrize("overwrite", ["open", "append", "stream", "copy"])
+def test_transaction_rolls_back_direct_overwrite(fs, tmp_path, link_mode, overwrite):
+    archive = str(tmp_path / "data.zip")
+    other = str(tmp_path / "other.zip")
+    fs.files.write(f"{archive}/a.txt", "original")
+    fs.files.write(f"{other}/b.txt", "other")
+    before = read_bytes(archive)
+    with pytest.raises(RuntimeError):
+        with fs.files.transaction([archive]):
+            if overwrite == "open":
+                with fs.files.open(archive, "wb") as f:
+                    f.write(b"garbage")
+            elif overwrite == "append":
+                with fs.files.open(archive, "ab") as f:
+                    f.write(b"garbage")
+            elif overwrite == "stream":
+                path_info = fs.files._path_resolver.resolve(archive)
+                with fs.files._stream_provider.get_stream(path_info, "wb") as f:
+                    f.write(b"garbage")
+            else:
+                fs.files.copy(other, archive)
+            assert read_bytes(archive) != before
+            raise RuntimeError("abort")
+    assert read_bytes(archive) == before
+    assert fs.files.read(f"{archive}/a.txt") == "original"
+    assert sorted(os.listdir(tmp_path)) == ["data.zip", "other.zip"]
+
+
+def test_hardlink_snapshot_is_detached_before_inplace_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "_reflink", lambda src, dst: False)
+    archive = str(tmp_path / "data.bin")
+    with open(archive, "wb") as f:
+        f.write(b"before")
+    path = snapshot.take(archive)
+    assert os.path.samefile(archive, path)
+    snapshot.detach(archive)
+    assert not os.path.samefile(archive, path)
+    with open(archive, "ab") as f:
+        f.write(b" after")
+    assert read_bytes(path) == b"before"
+
+
+def test_interrupted_transaction_is_rolled_back_on_open(fs, tmp_path):
+    first = str(tmp_path / "first.zip")
+    second = str(tmp_path / "second.zip")
+    fs.files.write(f"{first}/a.txt", "one")
+    fs.files.write(f"{second}/b.txt", "two")
+    journal = snapshot.TransactionJournal([first, second])
+    journal.begin()
+    fs.files.write(f"{first}/a.txt", "changed")
+    fs.files.write(f"{second}/b.txt", "changed")
+    # The process dies here: opening either archive afterwards rolls back both
+    snapshot._active.discard(journal.path)
+    fs2 = ArchiveFS()
+    assert fs2.files.read(f"{second}/b.txt") == "two"
+    with zipfile.ZipFile(first) as zf:
+        assert zf.read("a.txt") == b"one"
+    assert sorted(os.listdir(tmp_path)) == ["first.zip", "second.zip"]
+
+
+def test_committed_transaction_leftovers_are_discarded(fs, tmp_path):
+    archive = str(tmp_path / "data.zip")
+    fs.files.write(f"{archive}/a.txt", "one")
+    journal = snapshot.TransactionJournal([archive])
+    journal.begin()
+    fs.files.write(f"{archive}/a.txt", "changed")
+    # The journal is gone (committed) but the snapshot and pointer were never removed
+    snapshot._active.discard(journal.path)
+    os.remove(journal.path)
+    assert not snapshot.recover(archive)
+    assert fs.files.read(f"{archive}/a.txt") == "changed"
+    assert sorted(os.listdir(tmp_path)) == ["data.zip"]
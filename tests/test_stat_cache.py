@@ -0,0 +1,122 @@
+"""
+Unit tests for the ARCFS entry metadata cache.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import zipfile
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.stat_cache import MISS, StatCache
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+@pytest.fixture
+def sample_zip(tmp_path):
+    archive = str(tmp_path / "deps.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("pkg/module.py", "x = 1")
+        zf.writestr("README", "readme")
+    return archive
+
+
+@pytest.fixture
+def count_lookups(monkeypatch):
+    from arcfs.handlers.zip_handler import ZipHandler
+    calls = []
+    original = ZipHandler.get_entry_info
+
+    def counting(self, path):
+        calls.append(path)
+        return original(self, path)
+    monkeypatch.setattr(ZipHandler, "get_entry_info", counting)
+    return calls
+
+
+def test_repeated_checks_hit_the_cache(fs, sample_zip, count_lookups):
+    for _ in range(50):
+        assert fs.files.exists(f"{sample_zip}/pkg/module.py")
+        assert fs.files.is_file(f"{sample_zip}/pkg/module.py")
+        assert fs.files.is_dir(f"{sample_zip}/pkg")
+        assert not fs.files.exists(f"{sample_zip}/pkg/missing.py")
+    assert sorted(count_lookups) == ["pkg", "pkg/missing.py", "pkg/module.py"]
+    stats = fs.files.cache_stats()
+    assert stats["misses"] == 3
+    assert stats["negative_hits"] == 49
+    assert stats["hits"] == 50 * 4 - 3 - 49
+    # Equivalent spellings of the same entry share one cache slot
+    assert fs.files.exists(f"{sample_zip}/pkg//./module.py")
+    assert len(count_lookups) == 3
+
+
+def test_get_info_returns_independent_copies(fs, sample_zip):
+    first = fs.files.get_info(f"{sample_zip}/README")
+    first["size"] = -1
+    assert fs.files.get_info(f"{sample_zip}/README")["size"] == 6
+
+
+def test_writes_through_arcfs_invalidate(fs, sample_zip):
+    target = f"{sample_zip}/pkg/new.py"
+    assert not fs.files.exists(target)
+    fs.files.write(target, "y = 2")
+    assert fs.files.exists(target)
+    fs.files.remove(target)
+    assert not fs.files.exists(target)
+
+
+def test_out_of_band_change_is_detected(fs, sample_zip):
+    assert not fs.files.exists(f"{sample_zip}/late.txt")
+    with zipfile.ZipFile(sample_zip, "a") as zf:
+        zf.writestr("late.txt", "late")
+    assert fs.files.exists(f"{sample_zip}/late.txt")
+
+
+def test_batch_session_sees_staged_entries(fs, sample_zip):
+    target = f"{sample_zip}/staged.txt"
+    assert not fs.files.exists(target)
+    with fs.batch_session() as session:
+        session.files.write(target, "staged")
+        assert fs.files.exists(target)
+    assert fs.files.exists(target)
+
+
+def test_cache_size_and_ttl_bounds(tmp_path):
+    archive = str(tmp_path / "a.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a", "a")
+    cache = StatCache(max_entries=2, ttl=0.05)
+    stamp = (1, 2, 3, 4)
+    keys = [cache.make_key(archive, (name,)) for name in ("a", "b", "c")]
+    cache.store(keys[0], stamp, {"is_dir": False})
+    cache.store(keys[1], stamp, None)
+    cache.store(keys[2], stamp, None)
+    assert len(cache) == 2
+    assert cache.lookup(keys[0], stamp) is MISS
+    assert cache.lookup(keys[1], stamp) is None
+    assert cache.lookup(keys[2], (1, 2, 3, 5)) is MISS
+    cache.store(keys[0], stamp, {"is_dir": False})
+    time.sleep(0.06)
+    assert cache.lookup(keys[0], stamp) is MISS
+    cache.store(keys[0], stamp, {"is_dir": False})
+    cache.invalidate(archive)
+    assert len(cache) == 0
+
+
+def test_cache_can_be_disabled(fs, sample_zip, count_lookups):
+    GlobalConfig.set("stat_cache_size", 0)
+    try:
+        for _ in range(3):
+            assert fs.files.exists(f"{sample_zip}/README")
+    finally:
+        GlobalConfig.set("stat_cache_size", 65536)
+    assert len(count_lookups) == 3
@@ -91,3 +91,257 @@ def test_tar_multiple_open_close(fs, tmp_path):
         fs.files.write(f"{archive}/{filename}", content, binary=True)
         assert fs.files.read(f"{archive}/{filename}", binary=True) == content
 
+
+
+def test_tar_member_index_reads_in_place(fs, tmp_path):
+    import io
+    import tarfile
+    from arcfs.core.file_window import FileWindow
+    from arcfs.handlers.tar_handler import TarHandler
+    archive = str(tmp_path / "indexed.tar")
+    with tarfile.open(archive, "w") as tf:
+        for i in range(50):
+            data = f"member {i}".encode()
+            info = tarfile.TarInfo(f"dir/f{i}.txt")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    with TarHandler(archive, "r", fs=fs) as handler:
+        offset, size = handler.get_member_offset("dir/f7.txt")
+        assert size == len(b"member 7")
+        assert handler.get_member_offset("dir") is None
+        with handler.open_member("dir/f7.txt", "rb") as f:
+            assert isinstance(f, FileWindow)
+            assert f.read() == b"member 7"
+    with open(archive, "rb") as raw:
+        raw.seek(offset)
+        assert raw.read(size) == b"member 7"
+
+
+def make_plain_tar(path, count=4, size=64 * 1024):
+    import io
+    import tarfile
+    with tarfile.open(path, "w") as tf:
+        for i in range(count):
+            info = tarfile.TarInfo(f"m{i}.bin")
+            info.size = size
+            tf.addfile(info, io.BytesIO(bytes([i]) * size))
+    with tarfile.open(path) as tf:
+        tf.getmembers()
+        return tf.offset
+
+
+def test_tar_inplace_update_keeps_existing_bytes(fs, tmp_path):
+    import tarfile
+    archive = str(tmp_path / "inplace.tar")
+    end = make_plain_tar(archive)
+    with open(archive, "rb") as f:
+        original = f.read(end)
+    fs.files.write(f"{archive}/new.txt", "hello")
+    with open(archive, "rb") as f:
+        assert f.read(end) == original
+    # Same-size replacement is written where the member lies
+    fs.files.write(f"{archive}/m1.bin", "x" * 64 * 1024)
+    with tarfile.open(archive) as tf:
+        assert tf.getnames() == ["m0.bin", "m1.bin", "m2.bin", "m3.bin", "new.txt"]
+        assert tf.extractfile("m1.bin").read() == b"x" * 64 * 1024
+        assert tf.extractfile("new.txt").read() == b"hello"
+    fs.files.remove(f"{archive}/m2.bin")
+    fs.files.write(f"{archive}/m3.bin", "resized")
+    with tarfile.open(archive) as tf:
+        assert tf.getnames().count(".arcfs-deleted") == 2
+        assert tf.extractfile("m3.bin").read() == b"resized"
+    assert not fs.files.exists(f"{archive}/m2.bin")
+    assert fs.files.read(f"{archive}/m3.bin") == "resized"
+
+
+def test_tar_interrupted_update_is_rolled_back(fs, tmp_path):
+    from arcfs.core.append_journal import AppendJournal, journal_path
+    archive = str(tmp_path / "crash.tar")
+    make_plain_tar(archive, count=2)
+    with open(archive, "rb") as f:
+        original = f.read()
+    AppendJournal(archive, preserve=[(0, 512)]).begin()
+    with open(archive, "r+b") as f:
+        f.write(b"\0" * 512)
+        f.seek(0, os.SEEK_END)
+        f.write(b"partial member data")
+    assert fs.files.read(f"{archive}/m1.bin", encoding="latin-1") == "\1" * 64 * 1024
+    assert not os.path.exists(journal_path(archive))
+    with open(archive, "rb") as f:
+        assert f.read() == original
+
+
+def test_tar_compacts_when_waste_is_high(fs, tmp_path):
+    import tarfile
+    archive = str(tmp_path / "waste.tar")
+    make_plain_tar(archive)
+    for i in range(3):
+        fs.files.remove(f"{archive}/m{i}.bin")
+    # Three quarters of the archive is dead, so the last removal rebuilds it
+    assert os.path.getsize(archive) < 2 * 64 * 1024
+    with tarfile.open(archive) as tf:
+        assert tf.getnames() == ["m3.bin"]
+
+
+def test_tar_gz_append_mode_adds_segments(fs, tmp_path):
+    import gzip
+    import io
+    import tarfile
+    from arcfs.handlers.tar_handler import TarConfig
+    from arcfs.core.gzip_index import GzipIndex, IndexedGzipReader
+    archive = str(tmp_path / "day.tar.gz")
+    with tarfile.open(archive, "w:gz") as tf:
+        info = tarfile.TarInfo("h0.log")
+        info.size = 5
+        tf.addfile(info, io.BytesIO(b"hour0"))
+    TarConfig.set("tar_gz_append", True)
+    TarConfig.set("tar_gz_max_segments", 4)
+    try:
+        # The first commit rebuilds into the segmented layout
+        fs.files.write(f"{archive}/h1.log", "hour1")
+        GzipIndex.build(archive, save=True)
+        with open(archive, "rb") as f:
+            before = f.read()[:-29]
+        for i in range(2, 5):
+            fs.files.write(f"{archive}/h{i}.log", f"hour{i}" * 1000)
+        with open(archive, "rb") as f:
+            assert f.read().startswith(before)
+        with tarfile.open(archive) as tf:
+            assert tf.getnames() == [f"h{i}.log" for i in range(5)]
+        # The saved seek index was extended rather than invalidated
+        index = GzipIndex.load(archive)
+        assert index is not None
+        data = gzip.decompress(open(archive, "rb").read())
+        with IndexedGzipReader(archive, index=index, persist=False) as reader:
+            reader.seek(len(data) - 3000)
+            assert reader.read() == data[-3000:]
+        assert fs.files.read(f"{archive}/h3.log") == "hour3" * 1000
+        # A fifth segment crosses the threshold and compacts the archive
+        fs.files.write(f"{archive}/h2.log", "replaced")
+        with tarfile.open(archive) as tf:
+            assert tf.getnames() == ["h0.log", "h1.log", "h3.log", "h4.log", "h2.log"]
+        with IndexedGzipReader(archive, persist=False) as reader:
+            reader.read()
+            assert len(reader.index.checkpoints) == 2
+        assert fs.files.read(f"{archive}/h2.log") == "replaced"
+    finally:
+        TarConfig.reset()
+
+
+def test_tar_compaction_keeps_last_copy_of_replaced_members(fs, tmp_path):
+    import io
+    import tarfile
+    from arcfs.handlers.tar_handler import TarConfig, TarHandler
+    archive = str(tmp_path / "dup.tar.gz")
+    with tarfile.open(archive, "w:gz") as tf:
+        info = tarfile.TarInfo("a.log")
+        info.size = 3
+        tf.addfile(info, io.BytesIO(b"old"))
+    TarConfig.set("tar_gz_append", True)
+    try:
+        fs.files.write(f"{archive}/b.log", "b")
+        # Appended as a later segment, superseding the first copy
+        fs.files.write(f"{archive}/a.log", "new")
+        with tarfile.open(archive) as tf:
+            assert tf.getnames() == ["a.log", "b.log", "a.log"]
+        fs._stream_provider.invalidate(archive)
+        handler = TarHandler(archive, "a", fs=fs)
+        handler.compact()
+        handler.close()
+        with tarfile.open(archive) as tf:
+            assert tf.getnames() == ["b.log", "a.log"]
+            assert tf.extractfile("a.log").read() == b"new"
+    finally:
+        TarConfig.reset()
+
+
+def test_tar_commit_streams_large_members(fs, tmp_path):
+    import tarfile
+    import tracemalloc
+    from arcfs.handlers.tar_handler import TarHandler
+    archive = str(tmp_path / "stream.tar.gz")
+    chunk = b"0123456789abcdef" * 65536
+    handler = TarHandler(archive, "a", fs=fs)
+    f = handler.open_member("big.bin", "wb")
+    for _ in range(32):
+        f.write(chunk)
+    tracemalloc.start()
+    try:
+        handler.close()
+        # The second commit copies the unchanged member from the source archive
+        with TarHandler(archive, "a", fs=fs) as handler:
+            handler.write("small.txt", b"small")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 8 * len(chunk)
+    with tarfile.open(archive) as tf:
+        assert tf.getnames() == ["big.bin", "small.txt"]
+        assert tf.getmember("big.bin").size == 32 * len(chunk)
+
+
+def test_tar_listing_index_answers_without_decompressing(fs, tmp_path):
+    import io
+    import tarfile
+    from arcfs.core.listing_index import ListingIndex
+    from arcfs.handlers.tar_handler import TarConfig, TarHandler
+    archive = str(tmp_path / "listed.tar.xz")
+    with tarfile.open(archive, "w:xz") as tf:
+        for i in range(3):
+            info = tarfile.TarInfo(f"dir/f{i}.txt")
+            info.size = 6
+            tf.addfile(info, io.BytesIO(f"file {i}".encode()))
+    TarConfig.set("tar_listing_index", True)
+    try:
+        # The first scan saves the listing
+        with TarHandler(archive, "r", fs=fs) as handler:
+            assert handler.list_dir("dir") == ["f0.txt", "f1.txt", "f2.txt"]
+        assert os.path.exists(ListingIndex.sidecar_path(archive))
+        with TarHandler(archive, "r", fs=fs) as handler:
+            assert handler.list_dir("") == ["dir"]
+            assert [e.path for e in handler.list_entries()] == [f"dir/f{i}.txt" for i in range(3)]
+            assert handler.member_exists("dir/f1.txt")
+            assert handler.get_member_info("dir/f1.txt")["size"] == 6
+            assert handler._tar_file is None
+            # Data is still read from the archive, opened on first use
+            with handler.open_member("dir/f2.txt", "rb") as f:
+                assert f.read() == b"file 2"
+        # A commit refreshes the listing
+        fs.files.write(f"{archive}/dir/new.txt", "new")
+        listing = ListingIndex.load(archive)
+        assert listing is not None
+        assert [m.name for m in listing.members][-1] == "dir/new.txt"
+        with TarHandler(archive, "r", fs=fs) as handler:
+            with handler.open_member("dir/new.txt", "rb") as f:
+                assert f.read() == b"new"
+        # A listing no longer matching the archive is ignored
+        with tarfile.open(archive, "w:xz") as tf:
+            info = tarfile.TarInfo("other.txt")
+            tf.addfile(info, io.BytesIO())
+        assert ListingIndex.load(archive) is None
+        with TarHandler(archive, "r", fs=fs) as handler:
+            assert handler.list_dir("") == ["other.txt"]
+    finally:
+        TarConfig.reset()
+
+
+def test_tar_listing_index_follows_inplace_updates(fs, tmp_path):
+    from arcfs.core.file_window import FileWindow
+    from arcfs.core.listing_index import ListingIndex
+    from arcfs.handlers.tar_handler import TarConfig, TarHandler
+    archive = str(tmp_path / "listed.tar")
+    make_plain_tar(archive, count=3, size=1024)
+    TarConfig.set("tar_listing_index", True)
+    try:
+        fs.files.remove(f"{archive}/m0.bin")
+        fs.files.write(f"{archive}/m1.bin", "y" * 1024)
+        fs.files.write(f"{archive}/added.txt", "added")
+        listing = ListingIndex.load(archive)
+        assert [m.name for m in listing.members] == ["m1.bin", "m2.bin", "added.txt"]
+        with TarHandler(archive, "r", fs=fs) as handler:
+            for name, data in [("m1.bin", b"y" * 1024), ("m2.bin", b"\2" * 1024), ("added.txt", b"added")]:
+                with handler.open_member(name, "rb") as f:
+                    assert isinstance(f, FileWindow)
+                    assert f.read() == data
+    finally:
+        TarConfig.reset()
@@ -0,0 +1,143 @@
+"""
+Unit tests for ARCFS parallel directory walking.
+
+Author: Tim Hosking
+Contact: https://github.com/Munger
+License: MIT
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import io
+import tarfile
+import threading
+import zipfile
+from contextlib import contextmanager
+import pytest
+from arcfs.arcfs import ArchiveFS
+from arcfs.core.global_config import GlobalConfig
+from arcfs.core.walker import walk_tree
+
+
+@pytest.fixture(scope="function")
+def fs():
+    return ArchiveFS()
+
+
+def _write(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _make_zip(path, names):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name in names:
+            zf.writestr(name, name)
+
+
+def _make_tgz(path, names):
+    with tarfile.open(path, "w:gz") as tf:
+        for name in names:
+            data = name.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = str(tmp_path / "root")
+    _write(os.path.join(root, "b.txt"))
+    _write(os.path.join(root, "sub", "c.txt"))
+    _write(os.path.join(root, "sub", "deep", "d.txt"))
+    _write(os.path.join(root, "notes.txt.gz"))
+    _make_zip(os.path.join(root, "a.zip"), ["x/one.txt", "top.txt"])
+    _make_tgz(os.path.join(root, "sub", "logs.tar.gz"), ["2024/jan.log", "2024/feb.log"])
+    return root
+
+
+def test_walk_yields_each_directory_once_in_order(fs, tree):
+    steps = list(fs.dirs.walk(tree))
+    j = os.path.join
+    assert steps == [
+        (tree, ["a.zip", "sub"], ["b.txt", "notes.txt.gz"]),
+        (j(tree, "a.zip"), ["x"], ["top.txt"]),
+        (j(tree, "a.zip", "x"), [], ["one.txt"]),
+        (j(tree, "sub"), ["deep", "logs.tar.gz"], ["c.txt"]),
+        (j(tree, "sub", "deep"), [], ["d.txt"]),
+        (j(tree, "sub", "logs.tar.gz"), ["2024"], []),
+        (j(tree, "sub", "logs.tar.gz", "2024"), [], ["feb.log", "jan.log"]),
+    ]
+    # The same order whatever the pool size
+    GlobalConfig.set("walk_workers", 1)
+    try:
+        assert list(fs.dirs.walk(tree)) == steps
+    finally:
+        GlobalConfig.set("walk_workers", None)
+
+
+def test_walk_prunes_removed_dirs_and_archives(fs, tree):
+    roots = []
+    for root, dirs, files in fs.dirs.walk(tree):
+        roots.append(os.path.relpath(root, tree))
+        dirs[:] = [d for d in dirs if d not in ("a.zip", "deep")]
+    assert roots == [".", "sub", os.path.join("sub", "logs.tar.gz"), os.path.join("sub", "logs.tar.gz", "2024")]
+
+
+def test_walk_reports_broken_archives(fs, tree):
+    with open(os.path.join(tree, "sub", "broken.zip"), "wb") as f:
+        f.write(b"not a zip")
+    errors = []
+    roots = [root for root, _, _ in fs.dirs.walk(tree, onerror=errors.append)]
+    assert len(errors) == 1
+    assert os.path.join(tree, "sub", "broken.zip") not in roots
+    assert os.path.join(tree, "sub", "logs.tar.gz") in roots
+
+
+def test_walk_tree_bounds_open_archives(tmp_path):
+    root = str(tmp_path)
+    for i in range(12):
+        _make_zip(os.path.join(root, f"a{i:02}.zip"), ["f.txt"])
+    lock = threading.Lock()
+    state = {"open": 0, "peak": 0}
+    barrier = threading.Event()
+
+    @contextmanager
+    def open_archive(path):
+        with lock:
+            state["open"] += 1
+            state["peak"] = max(state["peak"], state["open"])
+        barrier.wait(0.05)
+        try:
+            with zipfile.ZipFile(path) as zf:
+                yield _ZipListing(zf)
+        finally:
+            with lock:
+                state["open"] -= 1
+
+    steps = list(walk_tree(root, open_archive, workers=8, max_open_archives=3))
+    assert [os.path.basename(r) for r, _, _ in steps[1:]] == [f"a{i:02}.zip" for i in range(12)]
+    assert all(files == ["f.txt"] for _, _, files in steps[1:])
+    assert 1 < state["peak"] <= 3
+
+
+def test_walk_tree_memory_limit_still_walks_everything(tmp_path):
+    root = str(tmp_path)
+    for i in range(5):
+        _write(os.path.join(root, f"d{i}", "f.txt"))
+    steps = list(walk_tree(root, None, workers=4, max_memory=0))
+    assert [os.path.basename(r) for r, _, _ in steps] == [os.path.basename(root)] + [f"d{i}" for i in range(5)]
+
+
+class _ZipListing:
+    """Minimal handler stand-in exposing directory_tree() over an open ZipFile."""
+
+    def __init__(self, zf):
+        from arcfs.core.archive_tree import ArchiveTree
+        self._tree = ArchiveTree()
+        for info in zf.infolist():
+            self._tree.add(info.filename, is_dir=info.is_dir(), member=info)
+
+    def directory_tree(self):
+        return self._tree
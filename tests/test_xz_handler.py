@@ -136,3 +136,18 @@ def test_xz_multiple_open_close(temp_dir):
         with fs.files.open(path, 'rb') as f:
             with lzma.LZMAFile(f, 'r') as xz:
                 assert xz.read() == b"x" * 100
+
+def test_xz_handler_streams_lines(temp_dir):
+    from arcfs.handlers.xz_handler import XzHandler
+    path = os.path.join(temp_dir, "lines.xz")
+    fs = ArchiveFS()
+    data = b"".join(b"line %d\n" % i for i in range(50000))
+    handler = XzHandler(path, mode="w", fs=fs)
+    with handler.open_entry(handler.base_name, mode="w") as f:
+        f.write(data)
+    handler = XzHandler(path, mode="r", fs=fs)
+    with handler.open_entry(handler.base_name, mode="r") as f:
+        assert f.readline() == b"line 0\n"
+        assert f.tell() == 7
+        f.seek(len(data) - 8)
+        assert list(f) == [b"e 49999\n"]
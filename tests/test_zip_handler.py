@@ -13,6 +13,7 @@ import shutil
 import zipfile
 import pytest
 from arcfs.arcfs import ArchiveFS
+from arcfs.handlers.zip_handler import ZipHandler
 
 
 def make_zip(fs, path, files):
@@ -147,3 +148,175 @@ def test_zip_multiple_open_close(temp_dir):
             with zipfile.ZipFile(archive, 'r') as zip_file:
                 with zip_file.open("x.txt", 'r') as stream:
                     assert stream.read() == b"x" * 100
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_zip_member_streams_with_seeks(temp_dir, compression):
+    path = os.path.join(temp_dir, "stream.zip")
+    data = b"".join(b"line %d\n" % i for i in range(100000))
+    with zipfile.ZipFile(path, 'w', compression) as zf:
+        zf.writestr("big.txt", data)
+    fs = ArchiveFS()
+    with fs.files.open(os.path.join(path, "big.txt"), 'rb') as f:
+        assert f.read(10) == data[:10]
+        f.seek(500000)
+        assert f.read(100) == data[500000:500100]
+        f.seek(20)
+        assert f.tell() == 20
+        chunk = bytearray(50)
+        assert f.readinto(chunk) == 50
+        assert bytes(chunk) == data[20:70]
+        f.seek(-8, os.SEEK_END)
+        assert f.read() == data[-8:]
+
+
+def test_zip_member_readline_iteration(temp_dir):
+    path = os.path.join(temp_dir, "lines.zip")
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("lines.txt", b"one\ntwo\nthree\n")
+    fs = ArchiveFS()
+    handler = ZipHandler(path, 'r', fs=fs)
+    stream = handler.open_member("lines.txt", 'rb')
+    assert stream.readline() == b"one\n"
+    assert list(stream) == [b"two\n", b"three\n"]
+    stream.close()
+    handler.close()
+
+
+def make_large_zip(path, count=20):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i in range(count):
+            zf.writestr(f"m{i}.bin", os.urandom(64 * 1024))
+
+
+def test_zip_inplace_append_keeps_existing_bytes(temp_dir):
+    path = os.path.join(temp_dir, "append.zip")
+    make_large_zip(path)
+    with open(path, 'rb') as f:
+        original = f.read()
+    with zipfile.ZipFile(path) as zf:
+        start_dir = zf.start_dir
+    fs = ArchiveFS()
+    fs.files.write(os.path.join(path, "new.txt"), "hello")
+    # The new member overwrites the old central directory instead of following it
+    with open(path, 'rb') as f:
+        assert f.read(start_dir) == original[:start_dir]
+        f.seek(start_dir)
+        assert f.read(4) == b"PK\x03\x04"
+    fs.files.write(os.path.join(path, "m1.bin"), "replaced")
+    with open(path, 'rb') as f:
+        assert f.read(start_dir) == original[:start_dir]
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist().count("m1.bin") == 1
+        assert zf.read("new.txt") == b"hello"
+        assert zf.read("m1.bin") == b"replaced"
+
+
+def test_zip_interrupted_append_is_rolled_back(temp_dir):
+    from arcfs.core.append_journal import AppendJournal, journal_path
+    path = os.path.join(temp_dir, "crash.zip")
+    make_large_zip(path, count=3)
+    with open(path, 'rb') as f:
+        original = f.read()
+    AppendJournal(path).begin()
+    with open(path, 'ab') as f:
+        f.write(b"partial member data")
+    fs = ArchiveFS()
+    assert fs.dirs.list_dir(path) == ["m0.bin", "m1.bin", "m2.bin"]
+    assert not os.path.exists(journal_path(path))
+    with open(path, 'rb') as f:
+        assert f.read() == original
+
+
+def test_zip_failed_append_restores_central_directory(temp_dir, monkeypatch):
+    path = os.path.join(temp_dir, "fail.zip")
+    make_large_zip(path, count=3)
+    with open(path, 'rb') as f:
+        original = f.read()
+    real_write = zipfile.ZipFile.write
+
+    def failing_write(self, *args, **kwargs):
+        real_write(self, *args, **kwargs)
+        raise OSError("disk full")
+    monkeypatch.setattr(zipfile.ZipFile, "write", failing_write)
+    fs = ArchiveFS()
+    with pytest.raises(IOError):
+        fs.files.write(os.path.join(path, "new.bin"), os.urandom(256 * 1024))
+    with open(path, 'rb') as f:
+        assert f.read() == original
+    with zipfile.ZipFile(path) as zf:
+        assert zf.namelist() == ["m0.bin", "m1.bin", "m2.bin"]
+
+
+def test_zip_compacts_when_waste_is_high(temp_dir):
+    path = os.path.join(temp_dir, "waste.zip")
+    make_large_zip(path, count=4)
+    fs = ArchiveFS()
+    for i in range(3):
+        fs.files.remove(os.path.join(path, f"m{i}.bin"))
+    # Three quarters of the archive is dead, so the last removal rebuilds it
+    assert os.path.getsize(path) < 2 * 64 * 1024
+    with zipfile.ZipFile(path) as zf:
+        assert zf.namelist() == ["m3.bin"]
+
+
+class _Unseekable:
+    """Write-only wrapper that makes zipfile emit data descriptors."""
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, b):
+        return self._f.write(b)
+
+    def flush(self):
+        self._f.flush()
+
+    def tell(self):
+        raise OSError("unseekable")
+
+    def seekable(self):
+        return False
+
+
+def raw_member_data(path, info):
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset + 26)
+        name_len, extra_len = int.from_bytes(f.read(2), 'little'), int.from_bytes(f.read(2), 'little')
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        return f.read(info.compress_size)
+
+
+def test_zip_rebuild_copies_members_without_recompressing(temp_dir):
+    path = os.path.join(temp_dir, "raw.zip")
+    payload = b"line of text\n" * 5000
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr("stored.txt", payload, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("best.txt", payload, compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
+        zf.writestr("gone.txt", payload, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("bz.txt", payload, compress_type=zipfile.ZIP_BZIP2)
+    streamed = os.path.join(temp_dir, "streamed.zip")
+    with open(streamed, 'wb') as f, zipfile.ZipFile(_Unseekable(f), 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("described.txt", payload)
+    with zipfile.ZipFile(streamed) as zf:
+        assert zf.getinfo("described.txt").flag_bits & 0x08
+    with zipfile.ZipFile(path) as zf:
+        before = {i.filename: (i.compress_type, i.CRC, i.compress_size, raw_member_data(path, i))
+                  for i in zf.infolist()}
+    fs = ArchiveFS()
+    for archive in (path, streamed):
+        handler = ZipHandler(archive, 'a', fs=fs)
+        if archive == path:
+            handler.remove_member("gone.txt")
+        handler.compact()
+        handler.close()
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ["best.txt", "bz.txt", "stored.txt"]
+        for info in zf.infolist():
+            assert (info.compress_type, info.CRC, info.compress_size,
+                    raw_member_data(path, info)) == before[info.filename]
+            assert zf.read(info) == payload
+    with zipfile.ZipFile(streamed) as zf:
+        assert zf.testzip() is None
+        assert zf.read("described.txt") == payload